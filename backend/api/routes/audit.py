@@ -2,22 +2,151 @@
 Audit API Routes
 Handles running audits and retrieving results.
 """
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+from fastapi import APIRouter, HTTPException, Request, BackgroundTasks
 from fastapi.responses import StreamingResponse
 from typing import Optional
+from collections import Counter, deque
+from datetime import datetime
 import uuid
 import asyncio
-import json
 from loguru import logger
 
+from config import settings
+from api.routes.company import require_company
+from audit.engine import get_audit_engine
 from core.schemas import AuditFindingsResponse, AJEResponse, RiskScore, AccountingStandard
-from core.audit_trail import audit_trail
-from core.progress import progress_tracker
+from core.audit_trail import audit_trail, AuditRecord
+from core.cache import LRUCache
+from core.tasks import spawn_background
+from core.progress import (
+    progress_tracker, format_sse, encode_step, sse_stream, heartbeat_loop, drain_queue, preview_strings, HEARTBEAT_FRAME
+)
 
 router = APIRouter()
 
-# In-memory storage for audit results
-audit_results: dict[str, dict] = {}
+# Constant SSE frame sent when an audit stream finishes
+AUDIT_END_FRAME = format_sse({"type": "end", "message": "Audit complete"})
+
+# Secondary index: company_id -> audit_ids in completion order (most recent last)
+company_to_audits: dict[str, deque[str]] = {}
+
+
+def _on_audit_evicted(audit_id: str, result: dict):
+    """Keep the company index and audit trail in sync when an audit result is evicted."""
+    audit_trail.records.pop(audit_id, None)
+    audit_ids = company_to_audits.get(result.get("company_id"))
+    if audit_ids and audit_id in audit_ids:
+        audit_ids.remove(audit_id)
+        if not audit_ids:
+            company_to_audits.pop(result.get("company_id"), None)
+
+
+# In-memory storage for audit results (bounded, least recently used evicted first)
+audit_results: LRUCache = LRUCache(
+    maxsize=settings.AUDIT_RESULTS_MAX_ENTRIES,
+    on_evict=_on_audit_evicted
+)
+
+
+def _extract_prompt_issue(prompt_preview: str) -> Optional[str]:
+    """Pull the 'Issue:' line out of a finding explanation prompt."""
+    for line in prompt_preview.splitlines():
+        if line.startswith("Issue: "):
+            return line[len("Issue: "):].strip()
+    return None
+
+
+def _build_finding_indexes(findings: list[dict], record) -> dict:
+    """
+    Build per-finding lookups for the reasoning endpoint.
+    Computed once when the audit completes so each request is a dict lookup.
+    """
+    findings_by_id = {f["finding_id"]: f for f in findings if f.get("finding_id")}
+    
+    # Group finding explanation interactions by the issue they explain
+    interactions_by_issue: dict[str, list[dict]] = {}
+    for interaction in record.gemini_interactions:
+        if interaction.get("purpose") != "finding_explanation":
+            continue
+        issue = _extract_prompt_issue(interaction.get("prompt_preview") or "")
+        if issue is None:
+            continue
+        interactions_by_issue.setdefault(issue, []).append({
+            "timestamp": interaction.get("timestamp"),
+            "purpose": interaction.get("purpose"),
+            "prompt_preview": interaction.get("prompt_preview"),
+            "response_preview": interaction.get("response_preview"),
+            "model": interaction.get("model")
+        })
+    
+    interactions_by_finding = {
+        finding_id: interactions_by_issue[f.get("issue", "")]
+        for finding_id, f in findings_by_id.items()
+        if f.get("issue", "") in interactions_by_issue
+    }
+    
+    # Map reasoning steps to the findings their summaries mention
+    reasoning_steps_by_finding: dict[str, list[dict]] = {}
+    for step in record.reasoning_chain:
+        if not isinstance(step, dict):
+            continue
+        matched = set()
+        for fs in step.get("details", {}).get("findings_summary", []):
+            if isinstance(fs, dict) and fs.get("id") in findings_by_id:
+                matched.add(fs["id"])
+            elif isinstance(fs, str):
+                matched.update(fid for fid in findings_by_id if fid in fs)
+        for finding_id in matched:
+            reasoning_steps_by_finding.setdefault(finding_id, []).append(step)
+    
+    return {
+        "findings_by_id": findings_by_id,
+        "interactions_by_finding": interactions_by_finding,
+        "reasoning_steps_by_finding": reasoning_steps_by_finding
+    }
+
+
+def _get_audit_record(audit_id: str) -> AuditRecord:
+    """Fetch the audit trail record, which is evicted together with its result."""
+    record = audit_trail.get_record(audit_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Audit trail no longer available")
+    return record
+
+
+def _audit_by_id(audit_id: str) -> dict:
+    """Look up an audit result by its ID."""
+    result = audit_results.get(audit_id)
+    if result is None:
+        logger.warning(f"[_audit_by_id] Audit not found: {audit_id}")
+        raise HTTPException(status_code=404, detail="Audit not found")
+    return result
+
+
+def _latest_audit(company_id: str) -> tuple[str, dict]:
+    """Look up the most recent audit result for a company via the company index."""
+    audit_ids = company_to_audits.get(company_id)
+    if audit_ids:
+        latest_id = audit_ids[-1]
+        result = audit_results.get(latest_id)
+        if result is not None:
+            return latest_id, result
+    
+    logger.warning(f"[_latest_audit] No audit found for company: {company_id}")
+    raise HTTPException(status_code=404, detail="No audit found for this company")
+
+
+def resolve_audit(company_id: str, audit_id: Optional[str] = None) -> tuple[str, dict]:
+    """
+    Resolve the audit result for a request.
+    Uses the explicit audit_id when given, otherwise the most recent audit for the company.
+    
+    Returns:
+        Tuple of (audit_id, result)
+    """
+    if audit_id:
+        return audit_id, _audit_by_id(audit_id)
+    return _latest_audit(company_id)
 
 
 async def _run_audit_task(
@@ -29,12 +158,11 @@ async def _run_audit_task(
 ):
     """Background task to run the actual audit."""
     try:
-        from audit.engine import get_audit_engine
         # Get checkpoint data if resuming
         checkpoint = None
         if resume:
             checkpoint = progress_tracker.get_checkpoint(audit_id)
-            logger.info(f"[_run_audit_task] Resuming from checkpoint: {checkpoint}")
+            logger.info(f"[_run_audit_task] Resuming from checkpoint phase: {(checkpoint or {}).get('phase')}")
         
         # Create audit trail record (or reuse existing)
         if not resume:
@@ -76,11 +204,10 @@ async def _run_audit_task(
         
         # Checkpoint callback
         def save_checkpoint(phase: str, data: dict):
-            progress_tracker.save_checkpoint(audit_id, {
-                "phase": phase, 
-                "data": data,
-                "accounting_standard": accounting_standard.value
-            })
+            progress_tracker.merge_checkpoint(
+                audit_id, phase, data,
+                accounting_standard=accounting_standard.value
+            )
         
         # Quota exceeded callback
         def on_quota_exceeded():
@@ -90,16 +217,18 @@ async def _run_audit_task(
         # Gemini call logging callback
         def gemini_callback(purpose: str, prompt: str, response: str, error: str = None):
             """Stream Gemini API call details to frontend."""
+            # Steps stay in the replay history for the life of the process, so
+            # only previews go there; the full text is kept in the audit trail
             progress_tracker.add_step(
                 audit_id,
                 "gemini_call",
                 f"Gemini API: {purpose}",
-                data={
+                data=preview_strings({
                     "purpose": purpose,
-                    "prompt": prompt[:500] + "..." if len(prompt) > 500 else prompt,
-                    "response": response[:800] + "..." if response and len(response) > 800 else response,
+                    "prompt": prompt,
+                    "response": response,
                     "error": error
-                }
+                })
             )
         
         # Run the audit
@@ -131,19 +260,33 @@ async def _run_audit_task(
         logger.info(f"[_run_audit_task] AJEs count: {len(results['ajes'])}")
         logger.info(f"[_run_audit_task] Risk level: {results['risk_score'].get('risk_level', 'unknown')}")
         
+        # Findings are immutable once the audit completes, so aggregate counts once here
+        findings = results["findings"]
+        by_severity = Counter(f.get("severity", "unknown") for f in findings)
+        by_category = Counter(f.get("category", "unknown") for f in findings)
+        
         # Store results
         audit_results[audit_id] = {
             "company_id": company_id,
-            "findings": results["findings"],
+            "findings": findings,
             "ajes": results["ajes"],
             "risk_score": results["risk_score"],
-            "audit_trail": record,
-            "accounting_standard": results.get("accounting_standard", accounting_standard.value)
+            "accounting_standard": results.get("accounting_standard", accounting_standard.value),
+            "completed_at": datetime.now().isoformat(),  # Versions exports (ETags) across resumes
+            "by_severity": dict(by_severity),
+            "by_category": dict(by_category),
+            **_build_finding_indexes(findings, record)
         }
+        audit_ids = company_to_audits.setdefault(company_id, deque())
+        if audit_id in audit_ids:
+            # Resumed audit - move to the most recent position
+            audit_ids.remove(audit_id)
+        audit_ids.append(audit_id)
         
         # Finalize audit trail
+        # Hashing serializes the full record (including prompts), so keep it off the event loop
         logger.info(f"[_run_audit_task] Finalizing audit trail")
-        audit_trail.finalize_record(audit_id)
+        await asyncio.to_thread(audit_trail.finalize_record, audit_id)
         
         response = {
             "audit_id": audit_id,
@@ -184,14 +327,8 @@ async def run_audit(
     standard_name = "IFRS" if accounting_standard == AccountingStandard.IFRS else "US GAAP"
     logger.info(f"[run_audit] Starting audit for company: {company_id} with {standard_name} rules")
     
-    from api.routes.company import companies
-    
-    if company_id not in companies:
-        logger.error(f"[run_audit] Company not found: {company_id}")
-        raise HTTPException(status_code=404, detail="Company not found")
-    
-    company_data = companies[company_id]
-    audit_id = str(uuid.uuid4())
+    company_data = await require_company(company_id)
+    audit_id = uuid.uuid4().hex
     
     # Start progress tracking immediately
     progress_tracker.start_operation(audit_id, "audit")
@@ -203,8 +340,11 @@ async def run_audit(
     progress_tracker.add_step(audit_id, "info", f"Auditing: {company_data['metadata'].name} using {standard_name}")
     
     # Schedule the audit to run in background
-    # Use asyncio.create_task so it runs concurrently
-    asyncio.create_task(_run_audit_task(company_id, company_data, audit_id, accounting_standard=accounting_standard))
+    # Tracked background task so it runs concurrently and is not garbage-collected
+    spawn_background(
+        _run_audit_task(company_id, company_data, audit_id, accounting_standard=accounting_standard),
+        name=f"audit-{audit_id}"
+    )
     
     # Return immediately so frontend can connect to SSE
     return {
@@ -217,86 +357,68 @@ async def run_audit(
 
 
 @router.get("/{company_id}/stream/{audit_id}")
-async def stream_audit_progress(company_id: str, audit_id: str):
+async def stream_audit_progress(company_id: str, audit_id: str, request: Request):
     """
     Stream audit progress updates via Server-Sent Events.
     Connect to this endpoint before starting an audit to receive real-time updates.
     """
     async def event_generator():
         queue = progress_tracker.subscribe(audit_id)
+        heartbeat = asyncio.create_task(heartbeat_loop(queue))
         try:
-            while True:
-                try:
-                    # Wait for progress update with timeout
-                    step = await asyncio.wait_for(queue.get(), timeout=30.0)
+            finished = False
+            while not finished:
+                # Block for the next update, then drain the burst behind it
+                # so it goes out in a single write
+                steps = drain_queue(queue, await queue.get())
+                
+                frames = []
+                for step in steps:
+                    step_type = step.get("type")
                     
-                    if step.get("type") == "end":
-                        yield f"data: {json.dumps({'type': 'end', 'message': 'Audit complete'})}\n\n"
+                    if step_type == "end":
+                        frames.append(AUDIT_END_FRAME)
+                        finished = True
                         break
                     
-                    yield f"data: {json.dumps(step)}\n\n"
+                    if step_type == "heartbeat":
+                        frames.append(HEARTBEAT_FRAME)
+                        # Heartbeats double as a completion check for missed end signals
+                        if progress_tracker.is_completed(audit_id):
+                            frames.append(AUDIT_END_FRAME)
+                            finished = True
+                            break
+                        continue
                     
-                except asyncio.TimeoutError:
-                    # Send heartbeat
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
-                    
-                    # Check if operation completed
-                    if progress_tracker.is_completed(audit_id):
-                        yield f"data: {json.dumps({'type': 'end', 'message': 'Audit complete'})}\n\n"
-                        break
+                    frames.append(encode_step(step))
+                
+                yield b"".join(frames)
                         
         finally:
+            heartbeat.cancel()
             progress_tracker.unsubscribe(audit_id, queue)
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    body, headers = sse_stream(event_generator(), request.headers.get("accept-encoding", ""))
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
 
 
 @router.get("/{company_id}/findings", response_model=AuditFindingsResponse)
 async def get_findings(company_id: str, audit_id: Optional[str] = None):
     """Get audit findings for a company."""
-    logger.info(f"[get_findings] Fetching findings for company: {company_id}, audit_id: {audit_id}")
+    logger.debug("[get_findings] Fetching findings for company: {}, audit_id: {}", company_id, audit_id)
     
-    # Find the most recent audit for this company if no audit_id provided
-    if audit_id:
-        if audit_id not in audit_results:
-            logger.warning(f"[get_findings] Audit not found: {audit_id}")
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        # Find most recent audit for company
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            logger.warning(f"[get_findings] No audit found for company: {company_id}")
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    # Fall back to the most recent audit for this company if no audit_id provided
+    audit_id, result = resolve_audit(company_id, audit_id)
     
     findings = result["findings"]
-    logger.info(f"[get_findings] Found {len(findings)} findings")
+    logger.opt(lazy=True).debug("[get_findings] Found {} findings", lambda: len(findings))
     
-    # Calculate counts by severity and category
-    by_severity = {}
-    by_category = {}
-    for f in findings:
-        sev = f.get("severity", "unknown")
-        cat = f.get("category", "unknown")
-        by_severity[sev] = by_severity.get(sev, 0) + 1
-        by_category[cat] = by_category.get(cat, 0) + 1
+    # Counts are precomputed at audit completion
+    by_severity = result["by_severity"]
+    by_category = result["by_category"]
     
-    logger.info(f"[get_findings] By severity: {by_severity}")
-    logger.info(f"[get_findings] By category: {by_category}")
+    logger.debug("[get_findings] By severity: {}", by_severity)
+    logger.debug("[get_findings] By category: {}", by_category)
     
     return AuditFindingsResponse(
         audit_id=audit_id,
@@ -311,26 +433,11 @@ async def get_findings(company_id: str, audit_id: Optional[str] = None):
 @router.get("/{company_id}/ajes", response_model=AJEResponse)
 async def get_ajes(company_id: str, audit_id: Optional[str] = None):
     """Get Adjusting Journal Entries for a company audit."""
-    logger.info(f"[get_ajes] Fetching AJEs for company: {company_id}, audit_id: {audit_id}")
+    logger.debug("[get_ajes] Fetching AJEs for company: {}, audit_id: {}", company_id, audit_id)
     
-    if audit_id:
-        if audit_id not in audit_results:
-            logger.warning(f"[get_ajes] Audit not found: {audit_id}")
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            logger.warning(f"[get_ajes] No audit found for company: {company_id}")
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    audit_id, result = resolve_audit(company_id, audit_id)
     
-    logger.info(f"[get_ajes] Found {len(result['ajes'])} AJEs")
+    logger.opt(lazy=True).debug("[get_ajes] Found {} AJEs", lambda: len(result["ajes"]))
     
     return AJEResponse(
         audit_id=audit_id,
@@ -343,26 +450,11 @@ async def get_ajes(company_id: str, audit_id: Optional[str] = None):
 @router.get("/{company_id}/risk-score", response_model=RiskScore)
 async def get_risk_score(company_id: str, audit_id: Optional[str] = None):
     """Get risk assessment for a company audit."""
-    logger.info(f"[get_risk_score] Fetching risk score for company: {company_id}, audit_id: {audit_id}")
+    logger.debug("[get_risk_score] Fetching risk score for company: {}, audit_id: {}", company_id, audit_id)
     
-    if audit_id:
-        if audit_id not in audit_results:
-            logger.warning(f"[get_risk_score] Audit not found: {audit_id}")
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            logger.warning(f"[get_risk_score] No audit found for company: {company_id}")
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    audit_id, result = resolve_audit(company_id, audit_id)
     
-    logger.info(f"[get_risk_score] Risk score: {result['risk_score']}")
+    logger.debug("[get_risk_score] Risk score: {}", result["risk_score"])
     
     return RiskScore(
         audit_id=audit_id,
@@ -373,29 +465,20 @@ async def get_risk_score(company_id: str, audit_id: Optional[str] = None):
 
 @router.get("/{company_id}/trail")
 async def get_audit_trail(company_id: str, audit_id: Optional[str] = None):
-    """Get the full audit trail for regulatory compliance."""
-    logger.info(f"[get_audit_trail] Fetching audit trail for company: {company_id}, audit_id: {audit_id}")
+    """
+    Get the full audit trail for regulatory compliance.
     
-    if audit_id:
-        if audit_id not in audit_results:
-            logger.warning(f"[get_audit_trail] Audit not found: {audit_id}")
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            logger.warning(f"[get_audit_trail] No audit found for company: {company_id}")
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    Trails are held in memory alongside audit results and dropped when the
+    result is evicted, so this returns 404 for audits that are no longer
+    retained (or whose trail was lost to a restart).
+    """
+    logger.debug("[get_audit_trail] Fetching audit trail for company: {}, audit_id: {}", company_id, audit_id)
     
-    record = result["audit_trail"]
+    audit_id, _ = resolve_audit(company_id, audit_id)
     
-    logger.info(f"[get_audit_trail] Returning audit trail with {len(record.reasoning_chain)} reasoning steps")
+    record = _get_audit_record(audit_id)
+    
+    logger.opt(lazy=True).debug("[get_audit_trail] Returning audit trail with {} reasoning steps", lambda: len(record.reasoning_chain))
     
     return {
         "audit_id": audit_id,
@@ -411,64 +494,17 @@ async def get_finding_reasoning(company_id: str, finding_id: str, audit_id: Opti
     Get detailed AI reasoning for a specific finding.
     Returns the full AI explanation, related transactions, and detection methodology.
     """
-    logger.info(f"[get_finding_reasoning] Fetching reasoning for finding: {finding_id}")
-    
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    logger.debug("[get_finding_reasoning] Fetching reasoning for finding: {}", finding_id)
     
-    # Find the specific finding
-    finding = None
-    for f in result["findings"]:
-        if f.get("finding_id") == finding_id:
-            finding = f
-            break
+    audit_id, result = resolve_audit(company_id, audit_id)
     
+    # Lookups are precomputed at audit completion
+    finding = result["findings_by_id"].get(finding_id)
     if not finding:
         raise HTTPException(status_code=404, detail=f"Finding {finding_id} not found")
     
-    # Get related AI interactions from audit trail
-    record = result["audit_trail"]
-    related_ai_interactions = []
-    for interaction in record.gemini_interactions:
-        if interaction.get("purpose") == "finding_explanation":
-            # Check if this interaction relates to this finding
-            prompt_preview = interaction.get("prompt_preview", "")
-            if finding.get("issue", "") in prompt_preview or finding_id in prompt_preview:
-                related_ai_interactions.append({
-                    "timestamp": interaction.get("timestamp"),
-                    "purpose": interaction.get("purpose"),
-                    "prompt_preview": interaction.get("prompt_preview"),
-                    "response_preview": interaction.get("response_preview"),
-                    "model": interaction.get("model")
-                })
-    
-    # Get related reasoning steps
-    related_steps = []
-    for step in record.reasoning_chain:
-        if isinstance(step, dict):
-            step_text = step.get("step", "")
-            details = step.get("details", {})
-            # Check if step mentions this finding
-            findings_summary = details.get("findings_summary", [])
-            for fs in findings_summary:
-                if isinstance(fs, dict) and fs.get("id") == finding_id:
-                    related_steps.append(step)
-                    break
-                elif isinstance(fs, str) and finding_id in fs:
-                    related_steps.append(step)
-                    break
+    related_ai_interactions = result["interactions_by_finding"].get(finding_id, [])
+    related_steps = result["reasoning_steps_by_finding"].get(finding_id, [])
     
     return {
         "finding_id": finding_id,
@@ -492,25 +528,13 @@ async def get_reasoning_chain(company_id: str, audit_id: Optional[str] = None):
     """
     Get the complete AI reasoning chain for an audit.
     Shows step-by-step how the AI analyzed the data and reached conclusions.
+    Returns 404 once the audit's trail is no longer retained in memory.
     """
-    logger.info(f"[get_reasoning_chain] Fetching reasoning chain for company: {company_id}")
+    logger.debug("[get_reasoning_chain] Fetching reasoning chain for company: {}", company_id)
     
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-        
-        if not result:
-            raise HTTPException(status_code=404, detail="No audit found for this company")
+    audit_id, result = resolve_audit(company_id, audit_id)
     
-    record = result["audit_trail"]
+    record = _get_audit_record(audit_id)
     
     # Format reasoning chain with full details
     formatted_chain = []
@@ -580,16 +604,11 @@ async def resume_audit(company_id: str, audit_id: str):
     """
     logger.info(f"[resume_audit] Resuming audit: {audit_id}")
     
-    from api.routes.company import companies
-    
-    if company_id not in companies:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_data = await require_company(company_id)
     
     if not progress_tracker.has_checkpoint(audit_id):
         raise HTTPException(status_code=400, detail="No checkpoint available for resume")
     
-    company_data = companies[company_id]
-    
     # Reset cancellation and set status to running
     progress_tracker.reset_cancellation(audit_id)
     progress_tracker.add_step(audit_id, "info", "Resuming audit from checkpoint...")
@@ -613,7 +632,10 @@ async def resume_audit(company_id: str, audit_id: str):
             accounting_standard = AccountingStandard.GAAP
     
     # Schedule the resumed audit to run in background
-    asyncio.create_task(_run_audit_task(company_id, company_data, audit_id, resume=True, accounting_standard=accounting_standard))
+    spawn_background(
+        _run_audit_task(company_id, company_data, audit_id, resume=True, accounting_standard=accounting_standard),
+        name=f"audit-{audit_id}"
+    )
     
     return {
         "audit_id": audit_id,
@@ -4,14 +4,38 @@ Handles the Auditor Assistant chatbot.
 """
 from fastapi import APIRouter, HTTPException
 from typing import Optional
+from collections import deque
 from loguru import logger
 
+from config import settings
+from api.routes.audit import audit_results
+from api.routes.company import companies
+from chatbot.assistant import AuditorAssistant
+from core.cache import LRUCache
 from core.schemas import ChatRequest, ChatResponse
 
 router = APIRouter()
 
-# Chat history storage
-chat_sessions: dict[str, list[dict]] = {}
+# Messages kept per chat session (older messages are dropped automatically)
+CHAT_HISTORY_MAX_MESSAGES = 20
+
+# Chat history storage: session_id -> deque of messages (bounded, idle sessions expire)
+chat_sessions: LRUCache = LRUCache(
+    maxsize=settings.CHAT_SESSIONS_MAX_ENTRIES,
+    ttl=settings.CHAT_SESSION_TTL_SECONDS
+)
+
+# Shared assistant instance (its Gemini client follows runtime API key updates)
+_assistant_instance: Optional[AuditorAssistant] = None
+
+
+def get_assistant() -> AuditorAssistant:
+    """Return (and lazily create) the shared AuditorAssistant instance."""
+    global _assistant_instance
+    if _assistant_instance is None:
+        logger.info("[get_assistant] Creating AuditorAssistant instance")
+        _assistant_instance = AuditorAssistant()
+    return _assistant_instance
 
 
 @router.post("/", response_model=ChatResponse)
@@ -23,37 +47,37 @@ async def chat(request: ChatRequest):
     logger.info(f"[chat] Received message: {request.message[:50]}...")
     logger.info(f"[chat] Company ID: {request.company_id}, Audit ID: {request.audit_id}")
     
-    from chatbot.assistant import AuditorAssistant
-    
-    assistant = AuditorAssistant()
+    assistant = get_assistant()
     
     # Build context from audit data if available
     context = {}
     if request.company_id:
-        from api.routes.company import companies
-        if request.company_id in companies:
-            context["company"] = companies[request.company_id]["metadata"]
+        company = await companies.load(request.company_id)
+        if company is not None:
+            context["company"] = company["metadata"]
     
     if request.audit_id:
-        from api.routes.audit import audit_results
         if request.audit_id in audit_results:
             context["audit"] = audit_results[request.audit_id]
     
     # Get session history
     session_id = f"{request.company_id or 'general'}_{request.audit_id or 'none'}"
-    history = chat_sessions.get(session_id, [])
+    history = chat_sessions.get(session_id)
+    if history is None:
+        history = deque(maxlen=CHAT_HISTORY_MAX_MESSAGES)
     
     # Generate response
     response = await assistant.respond(
         message=request.message,
         context=context,
-        history=history
+        history=list(history)
     )
     
-    # Update session history
+    # Update session history (maxlen evicts the oldest messages)
     history.append({"role": "user", "content": request.message})
     history.append({"role": "assistant", "content": response["message"]})
-    chat_sessions[session_id] = history[-20:]  # Keep last 20 messages
+    # Re-store to refresh the session's idle timeout
+    chat_sessions[session_id] = history
     
     return ChatResponse(
         message=response["message"],
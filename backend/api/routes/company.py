@@ -2,13 +2,24 @@
 Company API Routes
 Handles company generation, upload, and retrieval.
 """
-from fastapi import APIRouter, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi.responses import Response
+from pydantic import BaseModel
 from typing import Optional
+from pathlib import Path
+from datetime import datetime
+import asyncio
+import pickle
 import uuid
+import orjson
 import pandas as pd
 import io
+import itertools
 from loguru import logger
 
+from config import settings
+from core.cache import LRUCache
+from core.company_store import CompanyStore
 from core.schemas import (
     CompanyMetadata, CompanyGenerateRequest, CompanyUploadRequest,
     ChartOfAccounts, GeneralLedger, TrialBalance, Industry, AccountingBasis
@@ -16,8 +27,84 @@ from core.schemas import (
 
 router = APIRouter()
 
-# In-memory storage (replace with database in production)
-companies: dict[str, dict] = {}
+# Company storage: hot companies in memory, all companies in SQLite
+companies: CompanyStore = CompanyStore(
+    path=settings.COMPANY_STORE_PATH,
+    cache_size=settings.COMPANY_CACHE_MAX_ENTRIES
+)
+
+
+# Rendered JSON bodies for the large GET payloads, keyed by (company_id, kind).
+# Each entry keeps the model it was rendered from, so replacing the model
+# (e.g. deriving a new TB, or rehydrating an evicted company) re-renders.
+# Stored models are treated as read-only; replace them rather than mutate.
+_rendered_responses: LRUCache = LRUCache(maxsize=settings.RENDERED_RESPONSE_CACHE_MAX_ENTRIES)
+
+
+async def require_company(company_id: str) -> dict:
+    """Fetch a stored company or raise 404 (usable as a route dependency)."""
+    company = await companies.load(company_id)
+    if company is None:
+        logger.warning(f"[require_company] Company not found: {company_id}")
+        raise HTTPException(status_code=404, detail="Company not found")
+    return company
+
+
+def _json_response(company_id: str, kind: str, model: BaseModel) -> Response:
+    """Serve a stored model as JSON, rendering it only once while it is unchanged."""
+    key = (company_id, kind)
+    cached = _rendered_responses.get(key)
+    if cached is None or cached[0] is not model:
+        cached = (model, model.model_dump_json().encode())
+        _rendered_responses[key] = cached
+    return Response(content=cached[1], media_type="application/json")
+
+
+SCENARIOS_DIR = Path(__file__).parent.parent.parent / "example_data" / "scenarios"
+SCENARIOS_INDEX_PATH = SCENARIOS_DIR / "index.json"
+
+# Parsed demo scenarios, invalidated by file modification times
+_scenarios_index_cache: Optional[tuple[float, list[dict], dict[str, dict]]] = None
+_scenario_cache: dict[str, tuple[tuple, dict]] = {}
+
+# Fallback IDs for smart-upload entries Gemini returns without one (unique per process)
+_upload_entry_ids = itertools.count()
+
+# Shape Gemini must return for the smart upload (structured output)
+SMART_UPLOAD_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "company_name": {"type": "STRING"},
+        "industry": {"type": "STRING"},
+        "accounting_basis": {"type": "STRING"},
+        "entries": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "entry_id": {"type": "STRING"},
+                    "date": {"type": "STRING"},
+                    "account_code": {"type": "STRING"},
+                    "account_name": {"type": "STRING"},
+                    "description": {"type": "STRING"},
+                    "debit": {"type": "NUMBER"},
+                    "credit": {"type": "NUMBER"},
+                    "vendor_or_customer": {"type": "STRING", "nullable": True}
+                },
+                "required": ["date", "account_code", "debit", "credit"]
+            }
+        },
+        "detected_issues": {"type": "ARRAY", "items": {"type": "STRING"}},
+        "error": {"type": "STRING", "nullable": True}
+    },
+    "required": ["entries"]
+}
+
+# Smart-upload prompt previews: only this much of each file is ever read
+UPLOAD_PREVIEW_GL_CHARS = 10000
+UPLOAD_PREVIEW_TB_CHARS = 5000
+# Leading rows of an Excel upload converted for the smart-upload prompt preview
+UPLOAD_PREVIEW_EXCEL_ROWS = 500
 
 
 @router.post("/generate", response_model=CompanyMetadata)
@@ -47,7 +134,7 @@ async def generate_company(request: CompanyGenerateRequest):
         )
         
         company_id = company_data["metadata"].id
-        companies[company_id] = company_data
+        await companies.save(company_id, company_data)
         
         logger.info(f"[generate_company] Company generated successfully: id={company_id}, name={company_data['metadata'].name}")
         logger.info(f"[generate_company] COA accounts: {len(company_data['coa'].accounts) if company_data.get('coa') else 0}")
@@ -77,28 +164,28 @@ async def upload_company(
     Uses AI-powered parsing to normalize data from any format.
     All AI decisions are logged in the audit trail.
     """
-    from core.audit_trail import audit_trail
+    from core.audit_trail import AuditRecord
     from parsers.normalizer import DataNormalizer
     
     logger.info(f"[upload_company] Uploading company: {company_name}")
     logger.info(f"[upload_company] Industry: {industry}, Basis: {accounting_basis}, Period: {reporting_period}")
     
     # Create company ID early for audit trail
-    company_id = str(uuid.uuid4())
+    company_id = uuid.uuid4().hex
     
-    # Create audit record for file upload
-    audit_record = audit_trail.create_record(
+    # Create audit record for file upload; it is stored with the company
+    # rather than in the shared audit trail, so audits cannot evict it
+    audit_record = AuditRecord(
         audit_id=f"upload-{company_id}",
         company_id=company_id,
-        created_by="file_upload"
+        created_by="file_upload",
+        input_type="uploaded"
     )
-    audit_record.input_type = "uploaded"
     
     try:
         normalizer = DataNormalizer()
         
         # Parse uploaded files with AI-powered normalization
-        logger.info(f"[upload_company] Parsing GL file: {gl_file.filename}")
         audit_record.add_reasoning_step("Starting file upload processing", {
             "company_name": company_name,
             "gl_file": gl_file.filename,
@@ -106,22 +193,21 @@ async def upload_company(
             "coa_file": coa_file.filename if coa_file else None
         })
         
-        gl_content = await gl_file.read()
-        gl_data = await normalizer.parse_file(gl_content, gl_file.filename, "general_ledger", audit_record)
+        async def parse_upload(file: Optional[UploadFile], file_type: str):
+            if file is None:
+                return None
+            logger.info(f"[upload_company] Parsing {file_type} file: {file.filename}")
+            await file.seek(0)
+            return await normalizer.parse_file(file.file, file.filename, file_type, audit_record)
+        
+        # Parse the files concurrently so their Gemini column-detection calls overlap
+        gl_data, tb_data, coa_data = await asyncio.gather(
+            parse_upload(gl_file, "general_ledger"),
+            parse_upload(tb_file, "trial_balance"),
+            parse_upload(coa_file, "chart_of_accounts")
+        )
         logger.info(f"[upload_company] GL parsed: {len(gl_data.entries) if gl_data else 0} entries")
         
-        tb_data = None
-        if tb_file:
-            logger.info(f"[upload_company] Parsing TB file: {tb_file.filename}")
-            tb_content = await tb_file.read()
-            tb_data = await normalizer.parse_file(tb_content, tb_file.filename, "trial_balance", audit_record)
-        
-        coa_data = None
-        if coa_file:
-            logger.info(f"[upload_company] Parsing COA file: {coa_file.filename}")
-            coa_content = await coa_file.read()
-            coa_data = await normalizer.parse_file(coa_content, coa_file.filename, "chart_of_accounts", audit_record)
-        
         # Create company metadata
         metadata = CompanyMetadata(
             id=company_id,
@@ -138,16 +224,18 @@ async def upload_company(
             "coa_accounts": len(coa_data.accounts) if coa_data else 0
         })
         
-        # Finalize audit record
-        audit_trail.finalize_record(audit_record.audit_id)
+        # Finalize audit record; it is persisted with the company so the
+        # compliance trail outlives the in-memory audit trail cache
+        audit_record.compute_integrity_hash()
         
-        companies[company_id] = {
+        await companies.save(company_id, {
             "metadata": metadata,
             "coa": coa_data,
             "gl": gl_data,
             "tb": tb_data,
-            "upload_audit": audit_record.to_dict()
-        }
+            "upload_audit_id": audit_record.audit_id,
+            "upload_audit": audit_record
+        })
         
         logger.info(f"[upload_company] Company uploaded successfully: id={company_id}")
         return metadata
@@ -162,100 +250,80 @@ async def upload_company(
 @router.get("/")
 async def list_companies():
     """List all companies."""
-    logger.info(f"[list_companies] Listing {len(companies)} companies")
+    logger.opt(lazy=True).debug("[list_companies] Listing {} companies", lambda: len(companies))
     
     return [
         {
-            "id": company_id,
-            "name": data["metadata"].name,
-            "industry": data["metadata"].industry,
-            "is_synthetic": data["metadata"].is_synthetic
+            "id": metadata.id,
+            "name": metadata.name,
+            "industry": metadata.industry,
+            "is_synthetic": metadata.is_synthetic
         }
-        for company_id, data in companies.items()
+        for metadata in companies.list_metadata()
     ]
 
 
 @router.get("/scenarios")
 async def list_scenarios():
     """List all available demo scenarios."""
-    import json
-    from pathlib import Path
-    
-    logger.info("[list_scenarios] Listing available scenarios")
+    logger.debug("[list_scenarios] Listing available scenarios")
     
     try:
-        scenarios_path = Path(__file__).parent.parent.parent / "example_data" / "scenarios" / "index.json"
-        with open(scenarios_path, 'r') as f:
-            data = json.load(f)
-        return data["scenarios"]
+        return _load_scenarios_index()
     except Exception as e:
         logger.error(f"[list_scenarios] Error: {e}")
         return []
 
 
 @router.get("/{company_id}", response_model=CompanyMetadata)
-async def get_company(company_id: str):
+async def get_company(company_id: str, company: dict = Depends(require_company)):
     """Get company metadata by ID."""
-    logger.info(f"[get_company] Fetching company: {company_id}")
-    
-    if company_id not in companies:
-        logger.warning(f"[get_company] Company not found: {company_id}")
-        raise HTTPException(status_code=404, detail="Company not found")
+    logger.debug("[get_company] Fetching company: {}", company_id)
     
-    logger.info(f"[get_company] Returning company: {companies[company_id]['metadata'].name}")
-    return companies[company_id]["metadata"]
+    metadata = company["metadata"]
+    logger.debug("[get_company] Returning company: {}", metadata.name)
+    return metadata
 
 
 @router.get("/{company_id}/coa", response_model=ChartOfAccounts)
-async def get_chart_of_accounts(company_id: str):
+async def get_chart_of_accounts(company_id: str, company: dict = Depends(require_company)):
     """Get Chart of Accounts for a company."""
-    logger.info(f"[get_chart_of_accounts] Fetching COA for company: {company_id}")
-    
-    if company_id not in companies:
-        logger.warning(f"[get_chart_of_accounts] Company not found: {company_id}")
-        raise HTTPException(status_code=404, detail="Company not found")
+    logger.debug("[get_chart_of_accounts] Fetching COA for company: {}", company_id)
     
-    coa = companies[company_id].get("coa")
+    coa = company.get("coa")
     if not coa:
         logger.warning(f"[get_chart_of_accounts] COA not available for company: {company_id}")
         raise HTTPException(status_code=404, detail="Chart of Accounts not available")
     
-    logger.info(f"[get_chart_of_accounts] Returning {len(coa.accounts)} accounts")
-    return coa
+    logger.opt(lazy=True).debug("[get_chart_of_accounts] Returning {} accounts", lambda: len(coa.accounts))
+    return _json_response(company_id, "coa", coa)
 
 
 @router.get("/{company_id}/gl", response_model=GeneralLedger)
-async def get_general_ledger(company_id: str):
+async def get_general_ledger(company_id: str, company: dict = Depends(require_company)):
     """Get General Ledger for a company."""
-    logger.info(f"[get_general_ledger] Fetching GL for company: {company_id}")
-    
-    if company_id not in companies:
-        logger.warning(f"[get_general_ledger] Company not found: {company_id}")
-        raise HTTPException(status_code=404, detail="Company not found")
+    logger.debug("[get_general_ledger] Fetching GL for company: {}", company_id)
     
-    gl = companies[company_id].get("gl")
+    gl = company.get("gl")
     if not gl:
         logger.warning(f"[get_general_ledger] GL not available for company: {company_id}")
         raise HTTPException(status_code=404, detail="General Ledger not available")
     
-    logger.info(f"[get_general_ledger] Returning {len(gl.entries)} entries")
-    return gl
+    logger.opt(lazy=True).debug("[get_general_ledger] Returning {} entries", lambda: len(gl.entries))
+    return _json_response(company_id, "gl", gl)
 
 
 @router.get("/{company_id}/tb", response_model=TrialBalance)
-async def get_trial_balance(company_id: str):
+async def get_trial_balance(company_id: str, company: dict = Depends(require_company)):
     """Get Trial Balance for a company."""
-    logger.info(f"[get_trial_balance] Fetching TB for company: {company_id}")
+    logger.debug("[get_trial_balance] Fetching TB for company: {}", company_id)
     
-    if company_id not in companies:
-        logger.warning(f"[get_trial_balance] Company not found: {company_id}")
-        raise HTTPException(status_code=404, detail="Company not found")
-    
-    tb = companies[company_id].get("tb")
+    # Totals and is_balanced are computed once when the TB is built and stored with it
+    tb = company.get("tb")
     if not tb:
         # Try to derive from GL if available
-        gl = companies[company_id].get("gl")
-        coa = companies[company_id].get("coa")
+        gl = company.get("gl")
+        coa = company.get("coa")
         if gl and coa:
             logger.info(f"[get_trial_balance] deriving TB from GL for company: {company_id}")
             from generators.tb_generator import TBGenerator
@@ -264,16 +332,34 @@ async def get_trial_balance(company_id: str):
                 company_id=company_id,
                 gl=gl,
                 coa=coa,
-                reporting_period=companies[company_id]["metadata"].reporting_period
+                reporting_period=company["metadata"].reporting_period
             )
-            # Save it
-            companies[company_id]["tb"] = tb
+            # Save it (reassign so the store persists the change)
+            company["tb"] = tb
+            await companies.save(company_id, company)
         else:
             logger.warning(f"[get_trial_balance] TB not available and cannot derive (missing GL/COA) for company: {company_id}")
             raise HTTPException(status_code=404, detail="Trial Balance not available")
     
-    logger.info(f"[get_trial_balance] Returning TB with {len(tb.rows)} rows, balanced={tb.is_balanced}")
-    return tb
+    logger.opt(lazy=True).debug("[get_trial_balance] Returning TB with {} rows, balanced={}", lambda: len(tb.rows), lambda: tb.is_balanced)
+    return _json_response(company_id, "tb", tb)
+
+
+@router.get("/{company_id}/upload-audit")
+async def get_upload_audit(company: dict = Depends(require_company)):
+    """Get the audit trail recorded while the company's files were parsed."""
+    from core.audit_trail import audit_trail
+    
+    # Finalized records are stored with the company; companies saved before
+    # that only have the id, which the in-memory trail may since have evicted
+    record = company.get("upload_audit")
+    if record is None and company.get("upload_audit_id"):
+        record = audit_trail.get_record(company["upload_audit_id"])
+    if record is None:
+        raise HTTPException(status_code=404, detail="Upload audit trail not available")
+    
+    # Serialized on request rather than stored as a dict
+    return record.to_dict()
 
 
 @router.post("/example", response_model=CompanyMetadata)
@@ -296,13 +382,14 @@ async def load_example_company(scenario_id: Optional[str] = None):
         from generators.example_data import get_example_company, EXAMPLE_COMPANY_ID
         
         # Check if already loaded
-        if EXAMPLE_COMPANY_ID in companies:
+        existing = await companies.load(EXAMPLE_COMPANY_ID)
+        if existing is not None:
             logger.info(f"[load_example_company] Example company already loaded")
-            return companies[EXAMPLE_COMPANY_ID]["metadata"]
+            return existing["metadata"]
         
-        # Load example data
-        company_data = get_example_company()
-        companies[EXAMPLE_COMPANY_ID] = company_data
+        # Load example data (built once per process and stored by reference)
+        company_data = await asyncio.to_thread(get_example_company)
+        await companies.save(EXAMPLE_COMPANY_ID, company_data)
         
         logger.info(f"[load_example_company] Example company loaded: {company_data['metadata'].name}")
         logger.info(f"[load_example_company] Injected issues: {len(company_data.get('injected_issues', []))}")
@@ -315,113 +402,229 @@ async def load_example_company(scenario_id: Optional[str] = None):
         raise HTTPException(status_code=500, detail=f"Error loading example: {str(e)}")
 
 
-async def load_scenario(scenario_id: str) -> CompanyMetadata:
-    """Load a specific scenario by ID from pre-written files."""
-    import json
-    import csv
-    from pathlib import Path
-    from datetime import datetime
-    
-    logger.info(f"[load_scenario] Loading scenario: {scenario_id}")
-    
-    scenarios_dir = Path(__file__).parent.parent.parent / "example_data" / "scenarios"
-    index_path = scenarios_dir / "index.json"
-    
-    with open(index_path, 'r') as f:
-        scenarios = json.load(f)["scenarios"]
-    
-    scenario = next((s for s in scenarios if s["id"] == scenario_id), None)
-    if not scenario:
-        raise HTTPException(status_code=404, detail=f"Scenario '{scenario_id}' not found")
-    
-    def resolve_path(file_ref: str) -> Path:
-        """Resolve file path relative to scenarios dir."""
-        if file_ref.startswith("../"):
-            return scenarios_dir.parent / file_ref[3:]
-        return scenarios_dir / file_ref
+def _read_scenario_csv(path: Path, numeric_columns: tuple[str, ...] = ()) -> pd.DataFrame:
+    """
+    Read a bundled scenario CSV in one vectorized pass.
+    Text columns keep blanks as empty strings; numeric columns treat blanks as 0.
+    """
+    df = pd.read_csv(path, dtype=str, keep_default_na=False, encoding="utf-8")
+    for col in numeric_columns:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col].replace("", "0")).astype(float)
+    return df
+
+
+def _scenarios_index() -> tuple[float, list[dict], dict[str, dict]]:
+    """Read the scenario index, reusing the parsed copy while index.json is unchanged."""
+    global _scenarios_index_cache
+    mtime = SCENARIOS_INDEX_PATH.stat().st_mtime
+    if _scenarios_index_cache is None or _scenarios_index_cache[0] != mtime:
+        scenarios = orjson.loads(SCENARIOS_INDEX_PATH.read_bytes())["scenarios"]
+        _scenarios_index_cache = (mtime, scenarios, {s["id"]: s for s in scenarios})
+    return _scenarios_index_cache
+
+
+def _load_scenarios_index() -> list[dict]:
+    """All scenarios, in index order."""
+    return _scenarios_index()[1]
+
+
+def _get_scenario(scenario_id: str) -> Optional[dict]:
+    """Look up a scenario by ID."""
+    return _scenarios_index()[2].get(scenario_id)
+
+
+def _resolve_scenario_path(file_ref: str) -> Path:
+    """Resolve file path relative to scenarios dir."""
+    if file_ref.startswith("../"):
+        return SCENARIOS_DIR.parent / file_ref[3:]
+    return SCENARIOS_DIR / file_ref
+
+
+def _parse_scenario_files(scenario: dict) -> dict:
+    """Parse a scenario's GL, COA and TB files into models (company_id is filled in per load)."""
+    from core.schemas import JournalEntry, Account, TrialBalanceRow
     
     # Load GL file
-    gl_file = scenario.get("gl_file", "")
-    gl_path = resolve_path(gl_file)
-    
-    from core.schemas import JournalEntry, GeneralLedger, ChartOfAccounts, Account, TrialBalance, TrialBalanceRow
-    
-    gl_entries = []
-    with open(gl_path, 'r', newline='', encoding='utf-8') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            gl_entries.append(JournalEntry(
-                entry_id=row['entry_id'],
-                date=row['date'],
-                account_code=row['account_code'],
-                account_name=row['account_name'],
-                description=row['description'],
-                debit=float(row['debit']) if row['debit'] else 0.0,
-                credit=float(row['credit']) if row['credit'] else 0.0,
-                vendor_or_customer=row.get('vendor_or_customer')
-            ))
-    logger.info(f"[load_scenario] Loaded GL with {len(gl_entries)} entries")
+    gl_path = _resolve_scenario_path(scenario.get("gl_file", ""))
+    
+    # Bundled scenario files are trusted, so models are built without re-validation
+    gl_df = _read_scenario_csv(gl_path, numeric_columns=("debit", "credit"))
+    gl_cols = {col: gl_df[col].tolist() for col in gl_df.columns}
+    # Entries share one string per distinct account code/name
+    shared_strings = {}
+    for col in ("account_code", "account_name"):
+        gl_cols[col] = [shared_strings.setdefault(value, value) for value in gl_cols[col]]
+    vendors = gl_cols.get("vendor_or_customer") or [None] * len(gl_df)
+    gl_entries = [
+        JournalEntry.model_construct(
+            entry_id=entry_id,
+            date=date,
+            account_code=account_code,
+            account_name=account_name,
+            description=description,
+            debit=debit,
+            credit=credit,
+            vendor_or_customer=vendor
+        )
+        for entry_id, date, account_code, account_name, description, debit, credit, vendor in zip(
+            gl_cols["entry_id"], gl_cols["date"], gl_cols["account_code"], gl_cols["account_name"],
+            gl_cols["description"], gl_cols["debit"], gl_cols["credit"], vendors
+        )
+    ]
+    logger.info(f"[_parse_scenario_files] Loaded GL with {len(gl_entries)} entries")
+    
+    # Period bounds come straight off the date column (ISO dates sort as strings)
+    if gl_entries:
+        dates = gl_df["date"]
+        period_start, period_end = dates.min(), dates.max()
+    else:
+        period_start = period_end = str(datetime.now().date())
+    gl = GeneralLedger(
+        company_id="",
+        period_start=period_start,
+        period_end=period_end,
+        entries=gl_entries
+    )
     
     # Load COA file
     coa_file = scenario.get("coa_file", "")
     coa = None
     if coa_file:
-        coa_path = resolve_path(coa_file)
+        coa_path = _resolve_scenario_path(coa_file)
         if coa_path.exists():
-            accounts = []
-            with open(coa_path, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    accounts.append(Account(
-                        code=row['code'],
-                        name=row['name'],
-                        type=row['type'],
-                        normal_balance=row.get('normal_balance', 'debit'),
-                        subtype=row.get('subtype'),
-                        description=row.get('description', '')
-                    ))
+            coa_rows = _read_scenario_csv(coa_path).to_dict("records")
+            accounts = [
+                Account.model_construct(
+                    code=row['code'],
+                    name=row['name'],
+                    type=row['type'],
+                    normal_balance=row.get('normal_balance', 'debit'),
+                    subtype=row.get('subtype'),
+                    description=row.get('description', '')
+                )
+                for row in coa_rows
+            ]
             coa = ChartOfAccounts(company_id="", accounts=accounts)
-            logger.info(f"[load_scenario] Loaded COA with {len(accounts)} accounts")
+            logger.info(f"[_parse_scenario_files] Loaded COA with {len(accounts)} accounts")
     
     # Load TB file
     tb_file = scenario.get("tb_file", "")
     tb = None
     if tb_file:
-        tb_path = resolve_path(tb_file)
+        tb_path = _resolve_scenario_path(tb_file)
         if tb_path.exists():
-            tb_rows = []
-            total_debit = 0.0
-            total_credit = 0.0
-            with open(tb_path, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    debit = float(row['debit']) if row['debit'] else 0.0
-                    credit = float(row['credit']) if row['credit'] else 0.0
-                    total_debit += debit
-                    total_credit += credit
-                    
-                    beginning_balance = 0.0
-                    # Formula: Beginning Balance + Debit - Credit
-                    ending_balance = beginning_balance + debit - credit
-                    
-                    tb_rows.append(TrialBalanceRow(
-                        account_code=row['account_code'],
-                        account_name=row['account_name'],
-                        beginning_balance=beginning_balance,
-                        debit=debit,
-                        credit=credit,
-                        ending_balance=ending_balance
-                    ))
-            period_end_date = max(e.date for e in gl_entries) if gl_entries else str(datetime.now().date())
+            tb_df = _read_scenario_csv(
+                tb_path,
+                numeric_columns=("debit", "credit", "period_debits", "period_credits", "beginning_balance")
+            ).rename(columns={"period_debits": "debit", "period_credits": "credit"})
+            if "beginning_balance" not in tb_df.columns:
+                tb_df["beginning_balance"] = 0.0
+            total_debit = float(tb_df["debit"].sum())
+            total_credit = float(tb_df["credit"].sum())
+            # Formula: Beginning Balance + Debit - Credit
+            tb_df["ending_balance"] = tb_df["beginning_balance"] + tb_df["debit"] - tb_df["credit"]
+            
+            tb_rows = [
+                TrialBalanceRow.model_construct(
+                    account_code=account_code,
+                    account_name=account_name,
+                    beginning_balance=beginning_balance,
+                    debit=debit,
+                    credit=credit,
+                    ending_balance=ending_balance
+                )
+                for account_code, account_name, beginning_balance, debit, credit, ending_balance in zip(
+                    tb_df["account_code"].tolist(), tb_df["account_name"].tolist(),
+                    tb_df["beginning_balance"].tolist(), tb_df["debit"].tolist(),
+                    tb_df["credit"].tolist(), tb_df["ending_balance"].tolist()
+                )
+            ]
             tb = TrialBalance(
                 company_id="",
-                period_end=period_end_date,
+                period_end=gl.period_end,
                 rows=tb_rows,
                 total_debits=round(total_debit, 2),
                 total_credits=round(total_credit, 2),
                 is_balanced=abs(total_debit - total_credit) < 0.01
             )
-            logger.info(f"[load_scenario] Loaded TB with {len(tb_rows)} rows, balanced={tb.is_balanced}")
+            logger.info(f"[_parse_scenario_files] Loaded TB with {len(tb_rows)} rows, balanced={tb.is_balanced}")
+    
+    return {"gl": gl, "coa": coa, "tb": tb}
+
+
+def _get_parsed_scenario(scenario: dict) -> dict:
+    """Return parsed scenario models, re-reading files only when one has changed on disk."""
+    paths = [
+        _resolve_scenario_path(scenario[key])
+        for key in ("gl_file", "coa_file", "tb_file")
+        if scenario.get(key)
+    ]
+    signature = tuple(
+        (path.stat().st_mtime, path.stat().st_size) if path.exists() else None
+        for path in paths
+    )
+    
+    cached = _scenario_cache.get(scenario["id"])
+    if cached and cached[0] == signature:
+        return cached[1]
+    
+    parsed = _read_scenario_disk_cache(scenario["id"], signature)
+    if parsed is None:
+        parsed = _parse_scenario_files(scenario)
+        _write_scenario_disk_cache(scenario["id"], signature, parsed)
+    _scenario_cache[scenario["id"]] = (signature, parsed)
+    return parsed
+
+
+def _scenario_disk_cache_path(scenario_id: str) -> Optional[Path]:
+    if not settings.SCENARIO_CACHE_DIR:
+        return None
+    return Path(settings.SCENARIO_CACHE_DIR) / f"{scenario_id}.pickle"
+
+
+def _read_scenario_disk_cache(scenario_id: str, signature: tuple) -> Optional[dict]:
+    """Load parsed models pickled by an earlier process, if the source files are unchanged."""
+    path = _scenario_disk_cache_path(scenario_id)
+    if path is None or not path.exists():
+        return None
+    try:
+        with open(path, "rb") as f:
+            cached_signature, parsed = pickle.load(f)
+    except Exception as e:
+        logger.warning(f"[_read_scenario_disk_cache] Ignoring unreadable cache {path}: {e}")
+        return None
+    if cached_signature != signature:
+        return None
+    logger.debug("[_read_scenario_disk_cache] Loaded parsed scenario from {}", path)
+    return parsed
+
+
+def _write_scenario_disk_cache(scenario_id: str, signature: tuple, parsed: dict):
+    path = _scenario_disk_cache_path(scenario_id)
+    if path is None:
+        return
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: concurrent loads may write the same scenario from worker threads
+        tmp_path = path.with_name(f"{path.name}.{uuid.uuid4().hex}.tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump((signature, parsed), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(path)
+    except OSError as e:
+        logger.warning(f"[_write_scenario_disk_cache] Could not write {path}: {e}")
+
+
+async def load_scenario(scenario_id: str) -> CompanyMetadata:
+    """Load a specific scenario by ID from pre-written files."""
+    logger.info(f"[load_scenario] Loading scenario: {scenario_id}")
+    
+    scenario = _get_scenario(scenario_id)
+    if not scenario:
+        raise HTTPException(status_code=404, detail=f"Scenario '{scenario_id}' not found")
+    
+    # File reads and model construction run off the event loop
+    parsed = await asyncio.to_thread(_get_parsed_scenario, scenario)
     
     # Create company
     company_id = f"scenario-{scenario_id}-{uuid.uuid4().hex[:6]}"
@@ -445,28 +648,20 @@ async def load_scenario(scenario_id: str) -> CompanyMetadata:
         is_synthetic=True
     )
     
-    gl = GeneralLedger(
-        company_id=company_id,
-        period_start=min(e.date for e in gl_entries) if gl_entries else datetime.now().date(),
-        period_end=max(e.date for e in gl_entries) if gl_entries else datetime.now().date(),
-        entries=gl_entries
-    )
-    
-    # Update company_id in COA and TB
-    if coa:
-        coa.company_id = company_id
-    if tb:
-        tb.company_id = company_id
+    # Shallow copies: rows are shared read-only with the cached scenario
+    gl = parsed["gl"].model_copy(update={"company_id": company_id})
+    coa = parsed["coa"].model_copy(update={"company_id": company_id}) if parsed["coa"] else None
+    tb = parsed["tb"].model_copy(update={"company_id": company_id}) if parsed["tb"] else None
     
-    companies[company_id] = {
+    await companies.save(company_id, {
         "metadata": metadata,
         "gl": gl,
         "coa": coa,
         "tb": tb,
         "scenario": scenario
-    }
+    })
     
-    logger.info(f"[load_scenario] Loaded scenario '{scenario['name']}' with GL={len(gl_entries)}, COA={len(coa.accounts) if coa else 0}, TB={len(tb.rows) if tb else 0}")
+    logger.info(f"[load_scenario] Loaded scenario '{scenario['name']}' with GL={len(gl.entries)}, COA={len(coa.accounts) if coa else 0}, TB={len(tb.rows) if tb else 0}")
     return metadata
 
 
@@ -482,53 +677,53 @@ async def upload_company_smart(
     Gemini analyzes and normalizes uploaded files automatically.
     All AI decisions are logged in the audit trail.
     """
-    from core.gemini_client import GeminiClient
-    from core.audit_trail import audit_trail
-    import json
+    from core.gemini_client import get_gemini_client
+    from core.audit_trail import AuditRecord
     
-    async def extract_text_from_file(file: UploadFile) -> str:
-        content = await file.read()
+    async def extract_text_preview(file: UploadFile, limit: int) -> str:
+        """Extract only the leading text of an upload; the prompt never uses more than `limit` chars."""
         filename = file.filename.lower()
+        await file.seek(0)
         
         if filename.endswith(('.xlsx', '.xls')):
             try:
                 # Use pandas to read Excel and convert to CSV string for the LLM
-                df = pd.read_excel(io.BytesIO(content))
-                return df.to_csv(index=False)
+                # (the workbook is read in place and only leading rows are converted)
+                df = pd.read_excel(file.file, nrows=UPLOAD_PREVIEW_EXCEL_ROWS)
+                return df.to_csv(index=False)[:limit]
             except Exception as e:
                 logger.error(f"Error parsing Excel file {filename}: {e}")
                 return "Error: Could not parse Excel file."
         else:
             # Assume text-based (CSV, JSON, TXT)
+            content = await file.read(limit)
             return content.decode('utf-8', errors='ignore')
 
     logger.info(f"[upload_company_smart] Smart upload for: {company_name}")
     
-    company_id = str(uuid.uuid4())
-    audit_record = audit_trail.create_record(
+    company_id = uuid.uuid4().hex
+    audit_record = AuditRecord(
         audit_id=f"upload-{company_id}",
         company_id=company_id,
-        created_by="file_upload"
+        created_by="file_upload",
+        input_type="uploaded"
     )
-    audit_record.input_type = "uploaded"
     
     try:
-        gemini = GeminiClient()
+        gemini = get_gemini_client()
         
         # Read files correctly (handling binary Excel vs raw text)
-        gl_text_full = await extract_text_from_file(gl_file)
-        gl_text = gl_text_full[:10000]
+        gl_text = await extract_text_preview(gl_file, UPLOAD_PREVIEW_GL_CHARS)
         
         tb_text = ""
         if tb_file:
-            tb_text_full = await extract_text_from_file(tb_file)
-            tb_text = tb_text_full[:5000]
+            tb_text = await extract_text_preview(tb_file, UPLOAD_PREVIEW_TB_CHARS)
         
         audit_record.add_reasoning_step("Starting smart multi-file upload", {
             "gl_file": gl_file.filename,
-            "gl_size": len(gl_text_full),
+            "gl_size": gl_file.size if gl_file.size is not None else len(gl_text),
             "tb_file": tb_file.filename if tb_file else None,
-            "tb_size": len(tb_text_full) if tb_file else 0
+            "tb_size": (tb_file.size if tb_file.size is not None else len(tb_text)) if tb_file else 0
         })
         
         # Build prompt with both files if available
@@ -569,7 +764,8 @@ Return a JSON object with:
 
 If you cannot parse the data, return {{"error": "description of the problem"}}
 """,
-            purpose="file_normalization"
+            purpose="file_normalization",
+            response_schema=SMART_UPLOAD_RESPONSE_SCHEMA
         )
         
         if result.get("audit"):
@@ -594,13 +790,17 @@ If you cannot parse the data, return {{"error": "description of the problem"}}
         from core.schemas import JournalEntry, GeneralLedger
         
         gl_entries = []
+        # Entries share one string per distinct account code/name
+        shared_strings = {}
         for entry in parsed.get("entries", []):
             try:
+                account_code = str(entry.get("account_code", "0000"))
+                account_name = entry.get("account_name", "Unknown")
                 gl_entries.append(JournalEntry(
-                    entry_id=entry.get("entry_id", f"UP-{uuid.uuid4().hex[:6]}"),
+                    entry_id=entry.get("entry_id") or f"UP-{next(_upload_entry_ids):06x}",
                     date=entry.get("date", "2024-01-01"),
-                    account_code=str(entry.get("account_code", "0000")),
-                    account_name=entry.get("account_name", "Unknown"),
+                    account_code=shared_strings.setdefault(account_code, account_code),
+                    account_name=shared_strings.setdefault(account_name, account_name),
                     description=entry.get("description", ""),
                     debit=float(entry.get("debit", 0)),
                     credit=float(entry.get("credit", 0)),
@@ -650,15 +850,16 @@ If you cannot parse the data, return {{"error": "description of the problem"}}
             entries=gl_entries
         )
         
-        companies[company_id] = {
+        audit_record.compute_integrity_hash()
+        
+        await companies.save(company_id, {
             "metadata": metadata,
             "gl": gl,
             "coa": None,
             "tb": None,
-            "upload_audit": audit_record.to_dict()
-        }
-        
-        audit_trail.finalize_record(audit_record.audit_id)
+            "upload_audit_id": audit_record.audit_id,
+            "upload_audit": audit_record
+        })
         
         logger.info(f"[upload_company_smart] Company uploaded: {company_id} with {len(gl_entries)} entries")
         return metadata
@@ -2,16 +2,147 @@
 Export API Routes
 Handles PDF and CSV exports.
 """
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import StreamingResponse
-from typing import Optional
-import io
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import Response, StreamingResponse
+from typing import Annotated, BinaryIO, Iterator, Optional
+import hashlib
+import zlib
+from itertools import chain
+import asyncio
+import zipfile
+from io import SEEK_END
+from tempfile import SpooledTemporaryFile
 from loguru import logger
 
+from config import settings
+from core.cache import LRUCache
+from core.http import accepts_gzip
 from core.schemas import ExportRequest
+from api.routes.company import require_company
+from api.routes.audit import resolve_audit
+from exports.csv_export import iter_findings_csv, iter_ajes_csv
+from exports.excel_export import generate_ajes_xlsx, aje_account_strings
+
+# WeasyPrint needs native libraries (pango, gdk-pixbuf); import it at startup,
+# but keep CSV/XLSX exports working when they are missing
+try:
+    from exports.pdf_report import generate_pdf_report, generate_pdf_report_batch
+    PDF_IMPORT_ERROR: Optional[Exception] = None
+except (ImportError, OSError) as e:
+    logger.warning(f"PDF export unavailable: {e}")
+    generate_pdf_report = generate_pdf_report_batch = None
+    PDF_IMPORT_ERROR = e
 
 router = APIRouter()
 
+# Chunk size when streaming a spooled export file
+EXPORT_STREAM_CHUNK_BYTES = 64 * 1024
+
+# XLSX exports stay in memory up to this size, then spill to a temp file
+XLSX_SPOOL_MAX_BYTES = 1 << 20
+
+# Most audits a single batch PDF may render
+MAX_BATCH_AUDITS = 20
+
+# Rendered exports keyed by (audit_id, kind, options), bounded by total bytes.
+# Each value is (audit result, bytes); a resumed audit stores a new result
+# object, which invalidates its exports.
+def _export_weight(entry: tuple) -> int:
+    """Size of a cached export: its bytes, or the text of cached account cells."""
+    payload = entry[1]
+    if isinstance(payload, bytes):
+        return len(payload)
+    return sum(len(debits) + len(credits) for debits, credits in payload)
+
+
+_export_cache: LRUCache = LRUCache(
+    maxsize=settings.EXPORT_CACHE_MAX_ENTRIES,
+    maxweight=settings.EXPORT_CACHE_MAX_BYTES,
+    weigher=_export_weight
+)
+
+
+def _cached_export(key: tuple, result: dict) -> Optional[bytes]:
+    """Return a previously rendered export if the audit result is unchanged."""
+    cached = _export_cache.get(key)
+    if cached is None or cached[0] is not result:
+        return None
+    logger.debug("[_cached_export] Serving cached export {}", key)
+    return cached[1]
+
+
+def _aje_account_cells(audit_id: str, result: dict) -> list[tuple[str, str]]:
+    """Debit/credit account cells of an audit's AJEs, built on first spreadsheet export."""
+    key = (audit_id, "aje_accounts")
+    cells = _cached_export(key, result)
+    if cells is None:
+        cells = [aje_account_strings(aje) for aje in result.get("ajes", [])]
+        _export_cache[key] = (result, cells)
+    return cells
+
+
+def _iter_file(f: BinaryIO) -> Iterator[bytes]:
+    """Stream a file in fixed-size chunks, closing it once exhausted."""
+    try:
+        while chunk := f.read(EXPORT_STREAM_CHUNK_BYTES):
+            yield chunk
+    finally:
+        f.close()
+
+
+def _export_etag(*parts) -> str:
+    """
+    Strong ETag for an export. Callers pass the audit ID, the audit's
+    completed_at stamp (a resumed audit gets a new one) and the export options.
+    """
+    return f'"{hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()}"'
+
+
+def _not_modified(if_none_match: Optional[str], etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already holds this export."""
+    if not if_none_match:
+        return None
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    if "*" in tags or etag in tags:
+        return Response(status_code=304, headers={"ETag": etag})
+    return None
+
+
+# If-None-Match request header, for conditional export downloads
+IfNoneMatch = Annotated[Optional[str], Header()]
+
+# Accept-Encoding request header, for pre-compressed CSV downloads
+AcceptEncoding = Annotated[Optional[str], Header()]
+
+# CSVs compress ~8-10x even at the fastest level
+CSV_GZIP_LEVEL = 1
+
+
+def _export_headers(filename: str, etag: str, content_encoding: str = "identity") -> dict:
+    """
+    Response headers for an export download.
+    An explicit Content-Encoding makes the GZip middleware pass the body
+    through, so PDF/XLSX/zip payloads (already compressed) are not
+    deflated a second time.
+    """
+    return {
+        "Content-Disposition": f"attachment; filename={filename}",
+        "ETag": etag,
+        "Content-Encoding": content_encoding,
+        # Latest-audit URLs change meaning when a new audit completes, so always revalidate
+        "Cache-Control": "private, no-cache",
+        "Vary": "Accept-Encoding"
+    }
+
+
+def _gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Gzip a chunk stream incrementally at CSV_GZIP_LEVEL."""
+    compressor = zlib.compressobj(CSV_GZIP_LEVEL, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+    for chunk in chunks:
+        if compressed := compressor.compress(chunk):
+            yield compressed
+    yield compressor.flush()
+
 
 def _build_export_error(code: str, message: str, exc: Exception, hint: Optional[str] = None) -> dict:
     """Build a structured export error payload with true exception details."""
@@ -24,109 +155,159 @@ def _build_export_error(code: str, message: str, exc: Exception, hint: Optional[
     }
 
 
+def _pdf_export_error(message: str, exc: Exception) -> HTTPException:
+    """Build the 500 for a failed PDF export, flagging missing WeasyPrint system libraries."""
+    err_msg = str(exc).lower()
+    is_dependency_issue = any(token in err_msg for token in [
+        "libgobject",
+        "libpango",
+        "libgdk-pixbuf",
+        "weasyprint"
+    ])
+    return HTTPException(
+        status_code=500,
+        detail=_build_export_error(
+            code="pdf_dependency_error" if is_dependency_issue else "pdf_generation_error",
+            message=message,
+            exc=exc,
+            hint=(
+                "Install WeasyPrint system dependencies in the runtime image "
+                "(libglib2.0-0, libpango-1.0-0, libgdk-pixbuf-2.0-0)."
+                if is_dependency_issue else
+                "Check export logs for the failing data field/template expression."
+            )
+        )
+    )
+
+
 @router.get("/{company_id}/pdf")
 async def export_pdf(
     company_id: str,
     audit_id: Optional[str] = None,
     include_findings: bool = True,
     include_ajes: bool = True,
-    include_audit_trail: bool = False
+    include_audit_trail: bool = False,
+    if_none_match: IfNoneMatch = None
 ):
     """
     Export audit report as PDF.
     Includes executive summary, findings, AJEs, and optionally the audit trail.
     """
-    from api.routes.company import companies
-    from api.routes.audit import audit_results
-    
-    if company_id not in companies:
-        raise HTTPException(status_code=404, detail="Company not found")
+    company_data = await require_company(company_id)
     
     # Find audit results
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="No audit found for this company")
-    
-    # Generate PDF
+    audit_id, result = resolve_audit(company_id, audit_id)
+    
+    cache_key = (audit_id, "pdf", include_findings, include_ajes, include_audit_trail)
+    etag = _export_etag(*cache_key, result.get("completed_at"))
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    pdf_bytes = _cached_export(cache_key, result)
+    
+    # Generate PDF on a cache miss
+    if pdf_bytes is None:
+        try:
+            if PDF_IMPORT_ERROR is not None:
+                raise PDF_IMPORT_ERROR
+            pdf_bytes = await generate_pdf_report(
+                company_data=company_data,
+                audit_data=result,
+                include_findings=include_findings,
+                include_ajes=include_ajes,
+                include_audit_trail=include_audit_trail
+            )
+        except Exception as e:
+            logger.exception(f"PDF export failed for company_id={company_id}, audit_id={audit_id}: {e}")
+            raise _pdf_export_error("Failed to generate PDF report.", e)
+        _export_cache[cache_key] = (result, pdf_bytes)
+    
+    # WeasyPrint renders the whole document at once, so send the bytes as-is
+    return Response(
+        content=pdf_bytes,
+        media_type="application/pdf",
+        headers=_export_headers(f"audit_report_{company_id}.pdf", etag)
+    )
+
+
+@router.get("/{company_id}/pdf/batch")
+async def export_pdf_batch(
+    company_id: str,
+    audit_ids: str,
+    include_findings: bool = True,
+    include_ajes: bool = True,
+    include_audit_trail: bool = False,
+    if_none_match: IfNoneMatch = None
+):
+    """
+    Export several audits of a company as one PDF (comma-separated audit_ids).
+    Every report goes through a single WeasyPrint render. Repeated IDs are
+    rendered once, and at most MAX_BATCH_AUDITS audits are accepted.
+    """
+    company_data = await require_company(company_id)
+    
+    ids = list(dict.fromkeys(aid.strip() for aid in audit_ids.split(",") if aid.strip()))
+    if not ids:
+        raise HTTPException(status_code=400, detail="audit_ids must list at least one audit")
+    if len(ids) > MAX_BATCH_AUDITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"audit_ids may list at most {MAX_BATCH_AUDITS} audits"
+        )
+    results = [resolve_audit(company_id, aid)[1] for aid in ids]
+    # Audit IDs are global, so only render audits that belong to this company
+    for aid, result in zip(ids, results):
+        if result.get("company_id") != company_id:
+            logger.warning(f"[export_pdf_batch] Audit {aid} does not belong to company {company_id}")
+            raise HTTPException(status_code=404, detail=f"Audit {aid} not found")
+    
+    etag = _export_etag(
+        tuple(ids), tuple(r.get("completed_at") for r in results), "pdf_batch",
+        include_findings, include_ajes, include_audit_trail
+    )
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    
     try:
-        from exports.pdf_report import generate_pdf_report
-        pdf_bytes = await generate_pdf_report(
-            company_data=companies[company_id],
-            audit_data=result,
+        if PDF_IMPORT_ERROR is not None:
+            raise PDF_IMPORT_ERROR
+        pdf_bytes = await generate_pdf_report_batch(
+            company_data=company_data,
+            audit_datas=results,
             include_findings=include_findings,
             include_ajes=include_ajes,
             include_audit_trail=include_audit_trail
         )
     except Exception as e:
-        logger.exception(f"PDF export failed for company_id={company_id}, audit_id={audit_id}: {e}")
-        err_msg = str(e).lower()
-        is_dependency_issue = any(token in err_msg for token in [
-            "libgobject",
-            "libpango",
-            "libgdk-pixbuf",
-            "weasyprint"
-        ])
-        raise HTTPException(
-            status_code=500,
-            detail=_build_export_error(
-                code="pdf_dependency_error" if is_dependency_issue else "pdf_generation_error",
-                message="Failed to generate PDF report.",
-                exc=e,
-                hint=(
-                    "Install WeasyPrint system dependencies in the runtime image "
-                    "(libglib2.0-0, libpango-1.0-0, libgdk-pixbuf-2.0-0)."
-                    if is_dependency_issue else
-                    "Check export logs for the failing data field/template expression."
-                )
-            )
-        )
+        logger.exception(f"Batch PDF export failed for company_id={company_id}, audit_ids={ids}: {e}")
+        raise _pdf_export_error("Failed to generate batch PDF report.", e)
     
-    # Return as streaming response
-    return StreamingResponse(
-        io.BytesIO(pdf_bytes),
+    return Response(
+        content=pdf_bytes,
         media_type="application/pdf",
-        headers={
-            "Content-Disposition": f"attachment; filename=audit_report_{company_id}.pdf"
-        }
+        headers=_export_headers(f"audit_reports_{company_id}.pdf", etag)
     )
 
 
 @router.get("/{company_id}/csv/findings")
-async def export_findings_csv(company_id: str, audit_id: Optional[str] = None):
+async def export_findings_csv(
+    company_id: str,
+    audit_id: Optional[str] = None,
+    if_none_match: IfNoneMatch = None,
+    accept_encoding: AcceptEncoding = None
+):
     """Export audit findings as CSV."""
-    from api.routes.audit import audit_results
-    from exports.csv_export import generate_findings_csv
-    
     # Find audit results
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="No audit found for this company")
-    
-    # Generate CSV
+    audit_id, result = resolve_audit(company_id, audit_id)
+    
+    gzip_body = accepts_gzip(accept_encoding)
+    etag = _export_etag(audit_id, result.get("completed_at"), "csv_findings", gzip_body)
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    
+    # Generate CSV; the first chunk is built up front so failures still return a structured 500
     try:
-        csv_content = generate_findings_csv(result["findings"])
+        chunks = iter_findings_csv(result["findings"])
+        first_chunk = await asyncio.to_thread(next, chunks)
     except Exception as e:
         logger.exception(f"CSV findings export failed for company_id={company_id}, audit_id={audit_id}: {e}")
         raise HTTPException(
@@ -139,40 +320,34 @@ async def export_findings_csv(company_id: str, audit_id: Optional[str] = None):
             )
         )
     
+    body = chain((first_chunk,), chunks)
     return StreamingResponse(
-        io.BytesIO(csv_content.encode()),
+        _gzip_chunks(body) if gzip_body else body,
         media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=findings_{company_id}.csv"
-        }
+        headers=_export_headers(f"findings_{company_id}.csv", etag, "gzip" if gzip_body else "identity")
     )
 
 
 @router.get("/{company_id}/csv/ajes")
-async def export_ajes_csv(company_id: str, audit_id: Optional[str] = None):
+async def export_ajes_csv(
+    company_id: str,
+    audit_id: Optional[str] = None,
+    if_none_match: IfNoneMatch = None,
+    accept_encoding: AcceptEncoding = None
+):
     """Export Adjusting Journal Entries as CSV."""
-    from api.routes.audit import audit_results
-    from exports.csv_export import generate_ajes_csv
-    
     # Find audit results
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="No audit found for this company")
-    
-    # Generate CSV
+    audit_id, result = resolve_audit(company_id, audit_id)
+    
+    gzip_body = accepts_gzip(accept_encoding)
+    etag = _export_etag(audit_id, result.get("completed_at"), "csv_ajes", gzip_body)
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    
+    # Generate CSV; the first chunk is built up front so failures still return a structured 500
     try:
-        csv_content = generate_ajes_csv(result["ajes"])
+        chunks = iter_ajes_csv(result["ajes"])
+        first_chunk = await asyncio.to_thread(next, chunks)
     except Exception as e:
         logger.exception(f"CSV AJEs export failed for company_id={company_id}, audit_id={audit_id}: {e}")
         raise HTTPException(
@@ -185,42 +360,38 @@ async def export_ajes_csv(company_id: str, audit_id: Optional[str] = None):
             )
         )
     
+    body = chain((first_chunk,), chunks)
     return StreamingResponse(
-        io.BytesIO(csv_content.encode()),
+        _gzip_chunks(body) if gzip_body else body,
         media_type="text/csv",
-        headers={
-            "Content-Disposition": f"attachment; filename=ajes_{company_id}.csv"
-        }
+        headers=_export_headers(f"ajes_{company_id}.csv", etag, "gzip" if gzip_body else "identity")
     )
 
 
 @router.get("/{company_id}/xlsx/ajes")
-async def export_ajes_xlsx(company_id: str, audit_id: Optional[str] = None):
+async def export_ajes_xlsx(company_id: str, audit_id: Optional[str] = None, if_none_match: IfNoneMatch = None):
     """Export Adjusting Journal Entries as Excel."""
-    from api.routes.audit import audit_results
     
     # Find audit results
-    if audit_id:
-        if audit_id not in audit_results:
-            raise HTTPException(status_code=404, detail="Audit not found")
-        result = audit_results[audit_id]
-    else:
-        result = None
-        for aid, data in reversed(list(audit_results.items())):
-            if data["company_id"] == company_id:
-                result = data
-                audit_id = aid
-                break
-    
-    if not result:
-        raise HTTPException(status_code=404, detail="No audit found for this company")
+    audit_id, result = resolve_audit(company_id, audit_id)
+    
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    cache_key = (audit_id, "xlsx_ajes")
+    etag = _export_etag(*cache_key, result.get("completed_at"))
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    headers = _export_headers(f"ajes_{company_id}.xlsx", etag)
+    xlsx_bytes = _cached_export(cache_key, result)
+    if xlsx_bytes is not None:
+        return Response(content=xlsx_bytes, media_type=media_type, headers=headers)
     
     # Generate Excel
-    from exports.excel_export import generate_ajes_xlsx
     ajes = result.get("ajes", [])
+    output = SpooledTemporaryFile(max_size=XLSX_SPOOL_MAX_BYTES)
     try:
-        output = generate_ajes_xlsx(ajes)
+        await asyncio.to_thread(generate_ajes_xlsx, ajes, output, _aje_account_cells(audit_id, result))
     except Exception as e:
+        output.close()
         logger.exception(f"XLSX AJEs export failed for company_id={company_id}, audit_id={audit_id}: {e}")
         raise HTTPException(
             status_code=500,
@@ -228,16 +399,112 @@ async def export_ajes_xlsx(company_id: str, audit_id: Optional[str] = None):
                 code="xlsx_ajes_generation_error",
                 message="Failed to generate AJEs Excel export.",
                 exc=e,
-                hint="Check AJE payload types and openpyxl runtime availability.",
+                hint="Check AJE payload types and serialization compatibility.",
+            )
+        )
+    
+    # Workbooks that stayed in memory are cached; larger ones stream from the spool file
+    size = output.seek(0, SEEK_END)
+    output.seek(0)
+    if size <= XLSX_SPOOL_MAX_BYTES:
+        xlsx_bytes = output.read()
+        output.close()
+        _export_cache[cache_key] = (result, xlsx_bytes)
+        return Response(content=xlsx_bytes, media_type=media_type, headers=headers)
+    
+    return StreamingResponse(_iter_file(output), media_type=media_type, headers=headers)
+
+
+# Bundle archives stay in memory up to this size, then spill to a temp file
+BUNDLE_SPOOL_MAX_BYTES = 8 << 20
+
+
+@router.get("/{company_id}/bundle.zip")
+async def export_bundle(
+    company_id: str,
+    audit_id: Optional[str] = None,
+    include_pdf: bool = True,
+    if_none_match: IfNoneMatch = None
+):
+    """
+    Export the PDF report, both CSVs and the AJE workbook as one zip.
+    The formats are built concurrently: the PDF renders in the process pool
+    while the workbook is built and the CSVs are streamed into the archive
+    in worker threads.
+    """
+    company_data = await require_company(company_id)
+    
+    # Find audit results
+    audit_id, result = resolve_audit(company_id, audit_id)
+    
+    etag = _export_etag(audit_id, result.get("completed_at"), "bundle", include_pdf)
+    if (not_modified := _not_modified(if_none_match, etag)) is not None:
+        return not_modified
+    
+    pdf_key = (audit_id, "pdf", True, True, False)
+    cached_pdf = _cached_export(pdf_key, result) if include_pdf else None
+    
+    async def build_pdf() -> Optional[bytes]:
+        if not include_pdf or cached_pdf is not None:
+            return cached_pdf
+        if PDF_IMPORT_ERROR is not None:
+            raise PDF_IMPORT_ERROR
+        pdf_bytes = await generate_pdf_report(company_data=company_data, audit_data=result)
+        _export_cache[pdf_key] = (result, pdf_bytes)
+        return pdf_bytes
+    
+    output = SpooledTemporaryFile(max_size=BUNDLE_SPOOL_MAX_BYTES)
+    zf = zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED)
+    
+    def write_csvs():
+        # CSV chunks go straight into the archive, deflated, without materializing either file
+        for name, chunks in (
+            (f"findings_{company_id}.csv", iter_findings_csv(result["findings"])),
+            (f"ajes_{company_id}.csv", iter_ajes_csv(result["ajes"]))
+        ):
+            with zf.open(name, "w") as entry:
+                for chunk in chunks:
+                    entry.write(chunk)
+    
+    pdf_failed = False
+    try:
+        # Let every builder finish before touching the archive, even if one fails
+        pdf_bytes, xlsx, csvs = await asyncio.gather(
+            build_pdf(),
+            asyncio.to_thread(generate_ajes_xlsx, result["ajes"], None, _aje_account_cells(audit_id, result)),
+            asyncio.to_thread(write_csvs),
+            return_exceptions=True
+        )
+        if isinstance(pdf_bytes, Exception):
+            pdf_failed = True
+            raise pdf_bytes
+        for outcome in (xlsx, csvs):
+            if isinstance(outcome, Exception):
+                raise outcome
+        # PDF and XLSX are already compressed, so store them as-is
+        if pdf_bytes is not None:
+            zf.writestr(f"audit_report_{company_id}.pdf", pdf_bytes, compress_type=zipfile.ZIP_STORED)
+        zf.writestr(f"ajes_{company_id}.xlsx", xlsx.getvalue(), compress_type=zipfile.ZIP_STORED)
+        zf.close()
+    except Exception as e:
+        zf.close()
+        output.close()
+        logger.exception(f"Bundle export failed for company_id={company_id}, audit_id={audit_id}: {e}")
+        if pdf_failed:
+            raise _pdf_export_error("Failed to generate export bundle.", e)
+        raise HTTPException(
+            status_code=500,
+            detail=_build_export_error(
+                code="bundle_generation_error",
+                message="Failed to generate export bundle.",
+                exc=e,
+                hint="Check findings/AJE payload types and serialization compatibility.",
             )
         )
-        
     output.seek(0)
     
     return StreamingResponse(
-        output,
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-        headers={
-            "Content-Disposition": f"attachment; filename=ajes_{company_id}.xlsx"
-        }
+        _iter_file(output),
+        media_type="application/zip",
+        headers=_export_headers(f"audit_bundle_{company_id}.zip", etag)
     )
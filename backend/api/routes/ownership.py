@@ -4,24 +4,46 @@ Handles beneficial ownership discovery and graph analysis.
 
 ARCHITECTURE: Uses REAL public registry APIs, Gemini only for parsing/classification.
 """
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import StreamingResponse
 from typing import Optional
 import asyncio
-import json
+import uuid
 from loguru import logger
 
-from core.schemas import OwnershipGraph, OwnershipDiscoveryRequest, DataSourceSummary
-from core.progress import progress_tracker
+from config import settings
+from core.cache import LRUCache
+from core.schemas import OwnershipGraph, OwnershipDiscoveryRequest, OwnershipDiscoveryResponse, DataSourceSummary
+from core.progress import progress_tracker, format_sse, encode_step, sse_stream, heartbeat_loop, drain_queue, HEARTBEAT_FRAME
+from core.tasks import spawn_background
+from ownership.discovery import BeneficialOwnershipDiscovery
 
 router = APIRouter()
 
-# In-memory storage for ownership graphs
-ownership_graphs: dict[str, dict] = {}
+# Discovery results by (sorted seed entities, depth). Registry lookups are
+# slow, and the same request returns the same network within the TTL. Only
+# results backed by real registry data are cached, so a run that fell back
+# to mock data (failed lookups, exhausted quota) is retried next time.
+_discovery_cache: LRUCache = LRUCache(
+    maxsize=settings.OWNERSHIP_DISCOVERY_CACHE_MAX_ENTRIES,
+    ttl=settings.OWNERSHIP_DISCOVERY_CACHE_TTL_SECONDS
+)
 
+# Vendors seeded into a single discovery run
+MAX_SEED_VENDORS = 20
 
-@router.post("/discover")
-async def discover_ownership(request: OwnershipDiscoveryRequest):
+# Constant SSE frame sent when a discovery stream finishes
+DISCOVERY_END_FRAME = format_sse({"type": "end", "message": "Discovery complete"})
+
+# Ownership graphs by graph ID (bounded, stale graphs expire)
+ownership_graphs: LRUCache = LRUCache(
+    maxsize=settings.OWNERSHIP_GRAPHS_MAX_ENTRIES,
+    ttl=settings.OWNERSHIP_GRAPH_TTL_SECONDS
+)
+
+
+@router.post("/discover", response_model=OwnershipDiscoveryResponse)
+async def discover_ownership(request: OwnershipDiscoveryRequest) -> OwnershipDiscoveryResponse:
     """
     Discover beneficial ownership network for given entities.
     
@@ -35,79 +57,89 @@ async def discover_ownership(request: OwnershipDiscoveryRequest):
         Discovery results including data source transparency info
     """
     logger.info(f"[discover_ownership] Request to discover ownership for {len(request.seed_entities)} entities")
-    from ownership.discovery import BeneficialOwnershipDiscovery
     
-    discovery = BeneficialOwnershipDiscovery()
+    cache_key = (tuple(sorted(set(request.seed_entities))), request.depth)
+    result = _discovery_cache.get(cache_key)
+    if result is not None:
+        logger.info("[discover_ownership] Reusing cached discovery result")
+    else:
+        discovery = BeneficialOwnershipDiscovery()
+        
+        result = await discovery.discover_ownership_network(
+            seed_entities=request.seed_entities,
+            depth=request.depth
+        )
+        if result.get("data_sources", {}).get("total_from_real_apis", 0) > 0:
+            _discovery_cache[cache_key] = result
     
-    result = await discovery.discover_ownership_network(
-        seed_entities=request.seed_entities,
-        depth=request.depth
-    )
+    graph_obj = result["graph"]
+    findings = result.get("findings", [])
+    data_sources = result.get("data_sources", {})
     
-    # Store the graph
-    graph_id = f"graph_{len(ownership_graphs)}"
+    # Store the graph (random ID: a count-based one would repeat once old graphs are evicted)
+    graph_id = f"graph_{uuid.uuid4().hex[:12]}"
     ownership_graphs[graph_id] = {
         "seed_entities": request.seed_entities,
-        "graph": result["graph"],
-        "findings": result.get("findings", []),
-        "data_sources": result.get("data_sources", {}),
+        "graph": graph_obj,
+        "findings": findings,
+        "data_sources": data_sources,
         "entities": result.get("entities", {})
     }
     
-    graph_obj = result["graph"]
-    data_sources = result.get("data_sources", {})
-    
     # Calculate real data percentage
     total_entities = result["entities_discovered"]
     real_count = data_sources.get("total_from_real_apis", 0)
     real_percentage = (real_count / total_entities * 100) if total_entities > 0 else 0
     
-    logger.info(f"[discover_ownership] Complete. Graph ID: {graph_id}, Entities: {total_entities}, Real API: {real_count}, Findings: {len(result.get('findings', []))}")
-    
-    return {
-        "graph_id": graph_id,
-        "entities_discovered": total_entities,
-        "node_count": graph_obj.statistics.get("total_entities", len(graph_obj.nodes)) if isinstance(graph_obj.statistics, dict) else len(graph_obj.nodes),
-        "edge_count": graph_obj.statistics.get("total_relationships", len(graph_obj.edges)) if isinstance(graph_obj.statistics, dict) else len(graph_obj.edges),
-        "findings_count": len(result.get("findings", [])),
-        "data_sources": {
-            "sources_used": data_sources.get("sources_used", []),
-            "entities_by_source": data_sources.get("entities_by_source", {}),
-            "total_from_real_apis": real_count,
-            "total_mock": data_sources.get("total_mock", 0)
-        },
-        "real_data_percentage": round(real_percentage, 1)
-    }
+    stats = graph_obj.statistics if isinstance(graph_obj.statistics, dict) else {}
+    
+    logger.info(f"[discover_ownership] Complete. Graph ID: {graph_id}, Entities: {total_entities}, Real API: {real_count}, Findings: {len(findings)}")
+    
+    return OwnershipDiscoveryResponse(
+        graph_id=graph_id,
+        entities_discovered=total_entities,
+        node_count=stats.get("total_entities", len(graph_obj.nodes)),
+        edge_count=stats.get("total_relationships", len(graph_obj.edges)),
+        findings_count=len(findings),
+        data_sources=DataSourceSummary(
+            sources_used=data_sources.get("sources_used", []),
+            entities_by_source=data_sources.get("entities_by_source", {}),
+            total_from_real_apis=real_count,
+            total_mock=data_sources.get("total_mock", 0)
+        ),
+        real_data_percentage=round(real_percentage, 1)
+    )
 
 
 @router.get("/graph/{graph_id}", response_model=OwnershipGraph)
 async def get_ownership_graph(graph_id: str):
     """Get an ownership graph by ID."""
-    if graph_id not in ownership_graphs:
+    stored = ownership_graphs.get(graph_id)
+    if stored is None:
         raise HTTPException(status_code=404, detail="Graph not found")
     
-    return ownership_graphs[graph_id]["graph"]
+    return stored["graph"]
 
 
 @router.get("/graph/{graph_id}/findings")
 async def get_ownership_findings(graph_id: str):
     """Get fraud-related findings from ownership analysis."""
-    if graph_id not in ownership_graphs:
+    stored = ownership_graphs.get(graph_id)
+    if stored is None:
         raise HTTPException(status_code=404, detail="Graph not found")
     
     return {
         "graph_id": graph_id,
-        "findings": ownership_graphs[graph_id]["findings"]
+        "findings": stored["findings"]
     }
 
 
 async def _run_ownership_discovery_task(company_id: str, company_name: str, vendors: list, graph_id: str):
     """Background task to run ownership discovery."""
-    from ownership.discovery import BeneficialOwnershipDiscovery
-    
+    seed_vendors = vendors[:MAX_SEED_VENDORS]
     try:
         # Set total steps
-        progress_tracker.set_total_steps(graph_id, len(vendors[:20]) + 3)  # vendors + init + analyze + complete
+        progress_tracker.set_total_steps(graph_id, len(seed_vendors) + 3)  # vendors + init + analyze + complete
         
         discovery = BeneficialOwnershipDiscovery()
         
@@ -131,6 +163,7 @@ async def _run_ownership_discovery_task(company_id: str, company_name: str, vend
             """Save checkpoint for resume."""
             progress_tracker.save_checkpoint(graph_id, {
                 "company_id": company_id,
+                "company_name": company_name,
                 "processed_vendors": processed,
                 "remaining_vendors": remaining
             })
@@ -150,17 +183,15 @@ async def _run_ownership_discovery_task(company_id: str, company_name: str, vend
         data_callback("node", root_node)
         
         # Stream vendor relationship edges from audited company to each vendor
-        # This shows the payment/service relationships
-        for vendor in vendors[:20]:
-            vendor_edge = {
-                "source": company_id,
-                "target": vendor,
-                "relationship": "vendor",
-            }
-            data_callback("edge", vendor_edge)
+        # This shows the payment/service relationships; sent as one batch
+        # so the client gets a single frame and a single graph update
+        data_callback("edge_batch", {"edges": [
+            {"source": company_id, "target": vendor, "relationship": "vendor"}
+            for vendor in seed_vendors
+        ]})
         
         result = await discovery.discover_ownership_network(
-            seed_entities=vendors[:20],  # Limit to first 20 vendors
+            seed_entities=seed_vendors,
             depth=2,
             progress_callback=ownership_progress,
             data_callback=data_callback,
@@ -169,20 +200,22 @@ async def _run_ownership_discovery_task(company_id: str, company_name: str, vend
             on_quota_exceeded=on_quota_exceeded
         )
         
+        findings = result.get("findings", [])
+        
         # Store the graph
         ownership_graphs[graph_id] = {
             "company_id": company_id,
-            "seed_entities": vendors[:20],
+            "seed_entities": seed_vendors,
             "graph": result["graph"],
-            "findings": result.get("findings", [])
+            "findings": findings
         }
         
         response = {
             "company_id": company_id,
             "graph_id": graph_id,
-            "vendors_analyzed": len(vendors[:20]),
+            "vendors_analyzed": len(seed_vendors),
             "entities_discovered": result["entities_discovered"],
-            "findings_count": len(result.get("findings", []))
+            "findings_count": len(findings)
         }
         
         progress_tracker.complete_operation(graph_id, response)
@@ -201,19 +234,17 @@ async def analyze_vendors(company_id: str):
     Returns immediately with graph_id so frontend can connect to SSE stream.
     Actual discovery runs in background.
     """
-    from api.routes.company import companies
-    
-    if company_id not in companies:
-        raise HTTPException(status_code=404, detail="Company not found")
+    from api.routes.company import require_company
     
-    company_data = companies[company_id]
+    company_data = await require_company(company_id)
     gl = company_data.get("gl")
     
     if not gl:
         raise HTTPException(status_code=400, detail="No General Ledger available")
     
-    # Extract unique vendors from GL
-    vendors = list(set(
+    # Extract unique vendors from GL in first-seen order, so the seeded
+    # vendors are the same on every run
+    vendors = list(dict.fromkeys(
         entry.vendor_or_customer
         for entry in gl.entries
         if entry.vendor_or_customer
@@ -238,56 +269,65 @@ async def analyze_vendors(company_id: str):
     progress_tracker.add_step(graph_id, "info", f"Found {len(vendors)} unique vendors in GL")
     
     # Run discovery in background
-    asyncio.create_task(_run_ownership_discovery_task(company_id, company_name, vendors, graph_id))
+    spawn_background(
+        _run_ownership_discovery_task(company_id, company_name, vendors, graph_id),
+        name=f"ownership-{graph_id}"
+    )
     
     # Return immediately so frontend can connect to SSE
     return {
         "company_id": company_id,
         "graph_id": graph_id,
-        "vendors_analyzed": len(vendors[:20]),
+        "vendors_analyzed": min(len(vendors), MAX_SEED_VENDORS),
         "status": "running",
         "message": "Ownership discovery started. Connect to SSE stream for live updates."
     }
 
 
 @router.get("/stream/{graph_id}")
-async def stream_ownership_progress(graph_id: str):
+async def stream_ownership_progress(graph_id: str, request: Request):
     """
     Stream ownership discovery progress updates via Server-Sent Events.
     Connect to this endpoint to receive real-time updates during discovery.
     """
     async def event_generator():
         queue = progress_tracker.subscribe(graph_id)
+        heartbeat = asyncio.create_task(heartbeat_loop(queue))
         try:
-            while True:
-                try:
-                    step = await asyncio.wait_for(queue.get(), timeout=30.0)
+            finished = False
+            while not finished:
+                # Block for the next update, then drain the burst behind it
+                # so it goes out in a single write
+                steps = drain_queue(queue, await queue.get())
+                
+                frames = []
+                for step in steps:
+                    step_type = step.get("type")
                     
-                    if step.get("type") == "end":
-                        yield f"data: {json.dumps({'type': 'end', 'message': 'Discovery complete'})}\n\n"
+                    if step_type == "end":
+                        frames.append(DISCOVERY_END_FRAME)
+                        finished = True
                         break
                     
-                    yield f"data: {json.dumps(step)}\n\n"
-                    
-                except asyncio.TimeoutError:
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+                    if step_type == "heartbeat":
+                        frames.append(HEARTBEAT_FRAME)
+                        # Heartbeats double as a completion check for missed end signals
+                        if progress_tracker.is_completed(graph_id):
+                            frames.append(DISCOVERY_END_FRAME)
+                            finished = True
+                            break
+                        continue
                     
-                    if progress_tracker.is_completed(graph_id):
-                        yield f"data: {json.dumps({'type': 'end', 'message': 'Discovery complete'})}\n\n"
-                        break
+                    frames.append(encode_step(step))
+                
+                yield b"".join(frames)
                         
         finally:
+            heartbeat.cancel()
             progress_tracker.unsubscribe(graph_id, queue)
     
-    return StreamingResponse(
-        event_generator(),
-        media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no"
-        }
-    )
+    body, headers = sse_stream(event_generator(), request.headers.get("accept-encoding", ""))
+    return StreamingResponse(body, media_type="text/event-stream", headers=headers)
 
 
 @router.post("/cancel/{graph_id}")
@@ -335,10 +375,14 @@ async def resume_ownership_discovery(graph_id: str):
     progress_tracker.reset_cancellation(graph_id)
     progress_tracker.add_step(graph_id, "info", "Resuming discovery from checkpoint...")
     
-    # Get company name defensively from the company data store
-    from api.routes.company import companies
-    company_data = companies.get(company_id)
-    company_name = company_id # Default fallback
+    # The checkpoint carries the company name; only checkpoints saved without
+    # it need the (full) company record loaded from the store
+    company_name = checkpoint.get("company_name")
+    company_data = None
+    if not company_name:
+        from api.routes.company import companies
+        company_data = await companies.load(company_id)
+        company_name = company_id # Default fallback
     
     if company_data:
         # Try metadata object first (most common)
@@ -352,7 +396,10 @@ async def resume_ownership_discovery(graph_id: str):
                 company_name = company_info.name
     
     # Schedule the resumed discovery to run in background
-    asyncio.create_task(_run_ownership_discovery_task(company_id, company_name, vendors, graph_id))
+    spawn_background(
+        _run_ownership_discovery_task(company_id, company_name, vendors, graph_id),
+        name=f"ownership-{graph_id}"
+    )
     
     return {
         "graph_id": graph_id,
@@ -5,12 +5,16 @@ Handles runtime configuration updates like API keys.
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from loguru import logger
+import re
 
 from config import settings
-from core.gemini_client import GeminiClient
+from core.gemini_client import probe_api_key
 
 router = APIRouter()
 
+# Gemini keys are a single token of URL-safe characters
+API_KEY_PATTERN = re.compile(r"[A-Za-z0-9_\-]{10,}")
+
 
 class GeminiKeyUpdate(BaseModel):
     """Request model for updating Gemini API key."""
@@ -28,7 +32,8 @@ class GeminiKeyResponse(BaseModel):
 async def update_gemini_key(request: GeminiKeyUpdate):
     """
     Update the Gemini API key at runtime.
-    Validates the key by attempting to initialize a client.
+    Validates the key with a lightweight call to the Gemini API and only
+    switches to it once the key has been accepted.
     
     Args:
         request: Contains the new API key
@@ -38,38 +43,25 @@ async def update_gemini_key(request: GeminiKeyUpdate):
     """
     logger.info("[update_gemini_key] Received request to update Gemini API key")
     
-    if not request.api_key or len(request.api_key) < 10:
+    # Reject obviously malformed keys without a network round trip
+    if not request.api_key or not API_KEY_PATTERN.fullmatch(request.api_key):
         raise HTTPException(status_code=400, detail="Invalid API key format")
     
-    try:
-        # Validate the key by creating a test client
-        test_client = GeminiClient(api_key=request.api_key)
-        
-        if test_client.model is None and test_client.client is None:
-            return GeminiKeyResponse(
-                success=False,
-                message="API key could not be validated. The key may be invalid.",
-                validated=False
-            )
-        
-        # Update the global settings
-        settings.GEMINI_API_KEY = request.api_key
-        
-        logger.info("[update_gemini_key] Gemini API key updated successfully")
-        
-        return GeminiKeyResponse(
-            success=True,
-            message="API key updated successfully",
-            validated=True
-        )
-        
-    except Exception as e:
-        logger.error(f"[update_gemini_key] Error validating API key: {str(e)}")
-        return GeminiKeyResponse(
-            success=False,
-            message=f"Error validating API key: {str(e)}",
-            validated=False
-        )
+    valid, message = await probe_api_key(request.api_key)
+    if not valid:
+        logger.warning(f"[update_gemini_key] API key not validated: {message}")
+        return GeminiKeyResponse(success=False, message=message, validated=False)
+    
+    # Update the global settings (the shared client is rebuilt on next use)
+    settings.GEMINI_API_KEY = request.api_key
+    
+    logger.info("[update_gemini_key] Gemini API key updated successfully")
+    
+    return GeminiKeyResponse(
+        success=True,
+        message="API key updated successfully",
+        validated=True
+    )
 
 
 @router.get("/gemini-status")
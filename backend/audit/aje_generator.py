@@ -2,23 +2,346 @@
 AJE Generator
 Generates Adjusting Journal Entries for audit findings.
 """
+import asyncio
+import inspect
+import re
 import uuid
+import orjson
 from loguru import logger
 
-from core.gemini_client import GeminiClient
+from config import settings
+from core.gemini_client import GeminiClient, get_gemini_client
 from core.audit_trail import AuditRecord
 from core.schemas import ChartOfAccounts, FindingCategory, AccountingStandard
 
+# Finding categories that can be corrected with an AJE
+CORRECTABLE_CATEGORIES = frozenset({
+    FindingCategory.CLASSIFICATION.value,
+    FindingCategory.TIMING.value,
+    FindingCategory.STRUCTURAL.value,
+    FindingCategory.FRAUD.value,
+})
+
+# Upper bound on concurrent Gemini calls while generating AJEs
+MAX_CONCURRENT_AJE_REQUESTS = 10
+
+# Structured output for AI-generated AJEs. Entries come first so an
+# unbalanced entry can be detected, and the response abandoned, before
+# the model writes the rationale.
+AJE_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "entries": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {
+                    "account_code": {"type": "STRING"},
+                    "account_name": {"type": "STRING"},
+                    "debit": {"type": "NUMBER"},
+                    "credit": {"type": "NUMBER"}
+                },
+                "required": ["account_code", "debit", "credit"]
+            }
+        },
+        "description": {"type": "STRING"},
+        "rationale": {"type": "STRING"},
+        "standard_reference": {"type": "STRING"}
+    },
+    "required": ["entries", "description", "rationale"],
+    "propertyOrdering": ["entries", "description", "rationale", "standard_reference"]
+}
+
+
+# Findings sent to Gemini in one prompt; each batch costs one round trip
+AJE_BATCH_SIZE = 8
+
+# Structured output for a batch: one AJE per finding, keyed by the
+# finding's 1-based position in the prompt
+AJE_BATCH_RESPONSE_SCHEMA = {
+    "type": "OBJECT",
+    "properties": {
+        "ajes": {
+            "type": "ARRAY",
+            "items": {
+                "type": "OBJECT",
+                "properties": {"finding_index": {"type": "INTEGER"}, **AJE_RESPONSE_SCHEMA["properties"]},
+                "required": ["finding_index", *AJE_RESPONSE_SCHEMA["required"]],
+                "propertyOrdering": ["finding_index", *AJE_RESPONSE_SCHEMA["propertyOrdering"]]
+            }
+        }
+    },
+    "required": ["ajes"]
+}
+
+
+def _entry_totals(entries: list[dict]) -> tuple[float, float]:
+    """Total debits and credits of journal entry lines in one pass; missing or null amounts count as 0."""
+    debits = credits = 0.0
+    for e in entries:
+        debits += e.get("debit") or 0
+        credits += e.get("credit") or 0
+    return debits, credits
+
+
+def _entries_unbalanced(text: str) -> bool:
+    """
+    Check a partially streamed AJE response: True once its "entries" array
+    is complete and the debits and credits differ by a cent or more.
+    """
+    start = text.find('"entries"')
+    start = text.find('[', start) if start >= 0 else -1
+    if start < 0:
+        return False
+    
+    # Find the array's closing bracket, skipping over string contents
+    depth = 0
+    in_string = escaped = False
+    for i in range(start, len(text)):
+        ch = text[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif ch == '\\':
+                escaped = True
+            elif ch == '"':
+                in_string = False
+        elif ch == '"':
+            in_string = True
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+            if depth == 0:
+                try:
+                    debits, credits = _entry_totals(orjson.loads(text[start:i + 1]))
+                except (orjson.JSONDecodeError, AttributeError, TypeError):
+                    return False
+                return abs(debits - credits) >= 0.01
+    return False
+
+
+# AJE prompts. The instructions and chart of accounts come first and the
+# findings last, so every prompt in a run shares a byte-identical prefix
+# that Gemini's implicit prompt caching can reuse.
+AJE_PROMPT_TEMPLATE = """
+Generate an Adjusting Journal Entry to correct an audit finding under {standard_name}.
+
+ACCOUNTING STANDARD: {standard_name}
+
+CHART OF ACCOUNTS:
+{coa_summary}
+
+Generate a balanced journal entry with proper debits and credits following {standard_name} principles.
+For fraud findings, consider: provision for losses (ASC 450/IAS 37), reclassification to suspense accounts, or reversal of fictitious entries.
+Return ONLY valid JSON in this format:
+{{
+    "entries": [
+        {{"account_code": "XXXX", "account_name": "Account Name", "debit": 0.00, "credit": 0.00}}
+    ],
+    "description": "Brief description of the adjustment",
+    "rationale": "Why this entry corrects the issue under {standard_name}",
+    "standard_reference": "The specific {standard_name} standard (e.g., {example_references})"
+}}
+
+CRITICAL: Debits must equal credits. Use realistic amounts based on the finding.
+Ensure the rationale references the appropriate {standard_name} standard.
+
+FINDING:
+{finding}
+"""
+
+AJE_BATCH_PROMPT_TEMPLATE = """
+Generate one Adjusting Journal Entry for each of the audit findings below under {standard_name}.
+
+ACCOUNTING STANDARD: {standard_name}
+
+CHART OF ACCOUNTS:
+{coa_summary}
+
+Generate a balanced journal entry per finding with proper debits and credits following {standard_name} principles.
+For fraud findings, consider: provision for losses (ASC 450/IAS 37), reclassification to suspense accounts, or reversal of fictitious entries.
+Return ONLY valid JSON in this format:
+{{
+    "ajes": [
+        {{
+            "finding_index": 1,
+            "entries": [
+                {{"account_code": "XXXX", "account_name": "Account Name", "debit": 0.00, "credit": 0.00}}
+            ],
+            "description": "Brief description of the adjustment",
+            "rationale": "Why this entry corrects the issue under {standard_name}",
+            "standard_reference": "The specific {standard_name} standard (e.g., {example_references})"
+        }}
+    ]
+}}
+
+CRITICAL: finding_index is the number of the FINDING the entry corrects. Debits must equal credits in every entry.
+Use realistic amounts based on each finding. Ensure each rationale references the appropriate {standard_name} standard.
+
+{findings}
+"""
+
+
+def _example_references(is_ifrs: bool) -> str:
+    return "IFRS 15, IAS 16" if is_ifrs else "ASC 606, ASC 842"
+
+
+async def _emit_aje(callback, aje: dict) -> None:
+    """Pass an AJE to a sync or async streaming callback; callback errors never stop generation."""
+    if callback is None:
+        return
+    try:
+        result = callback(aje)
+        if inspect.isawaitable(result):
+            await result
+    except Exception as e:
+        logger.warning(f"[_emit_aje] AJE callback failed for {aje.get('aje_id')}: {e}")
+
+
+# First dollar amount in a finding's details
+_AMOUNT_RE = re.compile(r'\$?([\d,]+(?:\.\d{2})?)')
+
+# Every issue keyword the deterministic rules look for. The lookahead lets
+# one scan report overlapping keywords, so rules test set membership instead
+# of rescanning the issue text once per keyword.
+_ISSUE_KEYWORD_RE = re.compile(
+    r"(?=(misclass|revenue|timing|recognition|accrual|accrue|prepaid|amortiz|deprec"
+    r"|lease|impair|duplicate|structuring|suspicious|round-trip|round number|vendor))"
+)
+
+# Deterministic AJE rules as (matches(keywords, category), rule), tried in
+# order. keywords are the _ISSUE_KEYWORD_RE hits in the lowercased issue and
+# category is lowercased; the first match wins.
+AJE_RULES = [
+    # Rule 1: Expense Misclassification
+    (lambda keywords, category: "misclass" in keywords or "classification" in category, {
+        "entries": (("6900", "Miscellaneous Expense", "credit"), ("6200", "Marketing Expense", "debit")),
+        "description": "Reclassify expense per {standard} audit finding {finding_id}",
+        "ifrs_rationale": "IAS 1 requires proper expense classification for fair presentation",
+        "gaap_rationale": "GAAP requires proper expense classification for accurate financial reporting",
+        "rule": "RULE_EXPENSE_RECLASSIFICATION",
+        "ifrs_reference": "IAS 1 - Presentation of Financial Statements",
+        "gaap_reference": "ASC 220 - Income Statement",
+    }),
+    # Rule 2: Revenue Recognition Timing
+    (lambda keywords, category: "revenue" in keywords and ("timing" in keywords or "recognition" in keywords), {
+        "entries": (("4000", "Service Revenue", "debit"), ("2200", "Deferred Revenue", "credit")),
+        "description": "Defer unearned revenue per {standard} finding {finding_id}",
+        "ifrs_rationale": "IFRS 15 requires revenue recognition when performance obligations are satisfied",
+        "gaap_rationale": "ASC 606 requires revenue recognition only when performance obligations are satisfied",
+        "rule": "RULE_REVENUE_DEFERRAL",
+        "ifrs_reference": "IFRS 15 - Revenue from Contracts with Customers",
+        "gaap_reference": "ASC 606 - Revenue Recognition",
+    }),
+    # Rule 3: Accrual Missing
+    (lambda keywords, category: "accrual" in keywords or "accrue" in keywords, {
+        "entries": (("6000", "Operating Expense", "debit"), ("2100", "Accrued Expenses", "credit")),
+        "description": "Accrue unrecorded expense per {standard} finding {finding_id}",
+        "ifrs_rationale": "IAS 1 accrual basis requires expenses to be recorded when incurred",
+        "gaap_rationale": "Matching principle requires expenses to be recorded in the period incurred",
+        "rule": "RULE_EXPENSE_ACCRUAL",
+        "ifrs_reference": "IAS 1.27-28 - Accrual Basis",
+        "gaap_reference": "ASC 450 - Contingencies",
+    }),
+    # Rule 4: Prepaid Expense Amortization
+    (lambda keywords, category: "prepaid" in keywords or "amortiz" in keywords, {
+        "entries": (("6000", "Operating Expense", "debit"), ("1200", "Prepaid Expenses", "credit")),
+        "description": "Amortize prepaid expense per {standard} finding {finding_id}",
+        "ifrs_rationale": "IFRS Framework requires systematic allocation of prepaid expenses",
+        "gaap_rationale": "Prepaid expenses must be amortized over the benefit period per GAAP",
+        "rule": "RULE_PREPAID_AMORTIZATION",
+        "ifrs_reference": "IAS 1 - Presentation of Financial Statements",
+        "gaap_reference": "ASC 340 - Other Assets and Deferred Costs",
+    }),
+    # Rule 5: Depreciation
+    (lambda keywords, category: "deprec" in keywords, {
+        "entries": (("6700", "Depreciation Expense", "debit"), ("1600", "Accumulated Depreciation", "credit")),
+        "description": "Record depreciation per {standard} finding {finding_id}",
+        "ifrs_rationale": "IAS 16 requires systematic depreciation over the asset's useful life",
+        "gaap_rationale": "Fixed assets must be depreciated over their useful life per GAAP",
+        "rule": "RULE_DEPRECIATION",
+        "ifrs_reference": "IAS 16 - Property, Plant and Equipment",
+        "gaap_reference": "ASC 360 - Property, Plant, and Equipment",
+    }),
+    # Rule 6: Lease Accounting (IFRS 16 / ASC 842)
+    (lambda keywords, category: "lease" in keywords, {
+        "entries": (("1700", "Right-of-Use Asset", "debit"), ("2300", "Lease Liability", "credit")),
+        "description": "Recognize lease per {standard} finding {finding_id}",
+        "ifrs_rationale": "IFRS 16 requires recognition of right-of-use asset and lease liability",
+        "gaap_rationale": "ASC 842 requires recognition of right-of-use asset and lease liability",
+        "rule": "RULE_LEASE_RECOGNITION",
+        "ifrs_reference": "IFRS 16 - Leases",
+        "gaap_reference": "ASC 842 - Leases",
+    }),
+    # Rule 7: Impairment
+    (lambda keywords, category: "impair" in keywords, {
+        "entries": (("6800", "Impairment Loss", "debit"), ("1600", "Accumulated Impairment", "credit")),
+        "description": "Record impairment per {standard} finding {finding_id}",
+        "ifrs_rationale": "IAS 36 requires impairment when carrying amount exceeds recoverable amount",
+        "gaap_rationale": "ASC 360 requires impairment testing when triggering events occur",
+        "rule": "RULE_IMPAIRMENT",
+        "ifrs_reference": "IAS 36 - Impairment of Assets",
+        "gaap_reference": "ASC 360-10 - Impairment",
+    }),
+    # Rule 8: Fraud - Duplicate/Suspicious Payments (provision for loss)
+    (lambda keywords, category: category == "fraud" and ("duplicate" in keywords or "structuring" in keywords or "suspicious" in keywords), {
+        "entries": (("6850", "Fraud Loss Expense", "debit"), ("2150", "Provision for Fraud Losses", "credit")),
+        "description": "Provision for suspected fraud per {standard} finding {finding_id}",
+        "ifrs_rationale": "Provision for probable loss from suspected fraudulent transactions per IAS 37",
+        "gaap_rationale": "Provision for probable loss from suspected fraudulent transactions per ASC 450",
+        "rule": "RULE_FRAUD_PROVISION",
+        "ifrs_reference": "IAS 37 - Provisions, Contingent Liabilities",
+        "gaap_reference": "ASC 450 - Contingencies",
+    }),
+    # Rule 9: Fraud - Round-tripping / Vendor anomalies (reclassify revenue)
+    (lambda keywords, category: category == "fraud" and ("round-trip" in keywords or "vendor" in keywords or "round number" in keywords), {
+        "entries": (("4000", "Revenue", "debit"), ("2200", "Deferred Revenue / Suspense", "credit")),
+        "description": "Reclassify suspect revenue per {standard} finding {finding_id}",
+        "ifrs_rationale": "Reclassify potentially fictitious revenue per IAS 18 / IFRS 15",
+        "gaap_rationale": "Reclassify potentially fictitious revenue per ASC 606",
+        "rule": "RULE_FRAUD_REVENUE_RECLASSIFICATION",
+        "ifrs_reference": "IFRS 15 - Revenue from Contracts with Customers",
+        "gaap_reference": "ASC 606 - Revenue Recognition",
+    }),
+    # Rule 10: Fraud - Generic (Benford's, timing, weekend, shared address)
+    (lambda keywords, category: category == "fraud", {
+        "entries": (("1950", "Suspense - Under Investigation", "debit"), ("6900", "Miscellaneous Expense", "credit")),
+        "description": "Reclassify to suspense pending fraud investigation per {standard} finding {finding_id}",
+        "ifrs_rationale": "Segregate flagged transactions pending investigation per {standard} audit procedures",
+        "gaap_rationale": "Segregate flagged transactions pending investigation per {standard} audit procedures",
+        "rule": "RULE_FRAUD_SUSPENSE",
+        "ifrs_reference": "ISA 240 - Auditor's Responsibilities Relating to Fraud",
+        "gaap_reference": "AU-C 240 - Consideration of Fraud",
+    }),
+    # Default: Generic reclassification
+    (lambda keywords, category: category in ("classification", "structural", "timing"), {
+        "entries": (("6900", "Miscellaneous Expense", "credit"), ("6000", "Operating Expense", "debit")),
+        "description": "Correcting entry per {standard} finding {finding_id}",
+        "ifrs_rationale": "Correction required per {standard} audit finding",
+        "gaap_rationale": "Correction required per audit finding",
+        "rule": "RULE_GENERIC_CORRECTION",
+        "ifrs_reference": "IAS 8 - Accounting Policies, Changes in Accounting Estimates and Errors",
+        "gaap_reference": "ASC 250 - Accounting Changes and Error Corrections",
+    }),
+]
+
 
 class AJEGenerator:
     """Generates Adjusting Journal Entries."""
     
     def __init__(self):
         logger.info("[AJEGenerator.__init__] Initializing AJE generator")
-        self.gemini = GeminiClient()
         self.quota_exceeded = False
+        # Client that reported the exhausted quota; a new API key gets a fresh client
+        self._quota_client: GeminiClient | None = None
         self.accounting_standard = AccountingStandard.GAAP
     
+    @property
+    def gemini(self) -> GeminiClient:
+        """Shared Gemini client."""
+        return get_gemini_client()
+    
     async def generate_ajes(
         self,
         findings: list[dict],
@@ -33,6 +356,8 @@ class AJEGenerator:
             on_aje_callback: Optional callable(aje_dict) invoked immediately
                 after each AJE is generated so it can be streamed to the
                 frontend in real-time instead of waiting for the full batch.
+                May be a coroutine function; it is awaited within the batch
+                that produced the AJE, so other batches keep running.
         """
         logger.info(f"[generate_ajes] Processing {len(findings)} findings for AJE generation using {accounting_standard.value.upper()}")
         
@@ -42,33 +367,82 @@ class AJEGenerator:
         ajes = []
         
         # Only generate AJEs for certain categories
-        correctable_categories = [
-            FindingCategory.CLASSIFICATION.value,
-            FindingCategory.TIMING.value,
-            FindingCategory.STRUCTURAL.value,
-            FindingCategory.FRAUD.value,
-        ]
-        
-        correctable = [f for f in findings if f.get("category") in correctable_categories]
+        correctable = [f for f in findings if f.get("category") in CORRECTABLE_CATEGORIES]
         logger.info(f"[generate_ajes] Found {len(correctable)} correctable findings")
         
-        for i, finding in enumerate(correctable):
-            if self.quota_exceeded:
-                logger.warning("[generate_ajes] Skipping remaining AJEs due to quota exhaustion")
-                audit_record.add_reasoning_step("Skipping remaining AJE generation - Gemini quota exceeded")
-                break
-                
-            logger.debug(f"[generate_ajes] Generating AJE {i+1}/{len(correctable)} for finding: {finding.get('finding_id')}")
-            aje = await self._generate_aje_for_finding(finding, coa, audit_record)
-            if aje:
-                ajes.append(aje)
-                logger.info(f"[generate_ajes] Generated AJE {aje['aje_id']} for finding {finding.get('finding_id')}")
-                # Stream this AJE to the client immediately
-                if on_aje_callback:
-                    try:
-                        on_aje_callback(aje)
-                    except Exception:
-                        pass
+        if self.quota_exceeded and self._quota_client is not self.gemini:
+            logger.info("[generate_ajes] Gemini client changed since quota was exhausted, retrying AI generation")
+            self.quota_exceeded = False
+        
+        if self.quota_exceeded:
+            # Quota already known to be gone: no Gemini calls at all
+            logger.warning("[generate_ajes] Gemini quota exhausted, skipping AI AJE generation")
+            audit_record.add_reasoning_step("Skipping AI AJE generation - Gemini quota exceeded")
+            correctable_for_ai = []
+        else:
+            correctable_for_ai = correctable
+        
+        # Same chart of accounts for every prompt, so summarize it once
+        coa_summary = "\n".join(
+            f"{a.code}: {a.name} ({a.type}, {a.normal_balance})"
+            for a in coa.accounts[:30]  # Limit for prompt size
+        )
+        
+        # Gemini round-trips dominate, so findings go out several per prompt and
+        # the batches run concurrently (bounded by the client's rate budget);
+        # results keep finding order
+        sem = asyncio.Semaphore(max(1, min(MAX_CONCURRENT_AJE_REQUESTS, settings.GEMINI_REQUESTS_PER_MINUTE)))
+        
+        async def generate_one(finding: dict) -> dict | None:
+            async with sem:
+                if self.quota_exceeded:
+                    return None
+                logger.debug(f"[generate_ajes] Generating AJE for finding: {finding.get('finding_id')}")
+                return await self._generate_aje_for_finding(finding, coa_summary, audit_record)
+        
+        async def generate_batch(batch: list[dict]) -> list[dict | None]:
+            results = None
+            if len(batch) > 1:
+                async with sem:
+                    if self.quota_exceeded:
+                        return [None] * len(batch)
+                    results = await self._generate_ajes_batch(batch, coa_summary, audit_record)
+            if results is None:
+                # Single finding, or the batch call failed
+                results = [None] * len(batch)
+            
+            # One call per finding the batch did not answer usably (omitted or
+            # unbalanced); after a quota error generate_one skips Gemini
+            retry = [i for i, aje in enumerate(results) if aje is None]
+            if retry:
+                retried = await asyncio.gather(*(generate_one(batch[i]) for i in retry), return_exceptions=True)
+                for i, aje in zip(retry, retried):
+                    if isinstance(aje, Exception):
+                        logger.error(f"[generate_ajes] AJE generation failed for {batch[i].get('finding_id')}: {aje}")
+                    else:
+                        results[i] = aje
+            
+            for finding, aje in zip(batch, results):
+                if aje:
+                    logger.info(f"[generate_ajes] Generated AJE {aje['aje_id']} for finding {finding.get('finding_id')}")
+                    # Stream this AJE to the client immediately
+                    await _emit_aje(on_aje_callback, aje)
+            return results
+        
+        batches = [
+            correctable_for_ai[i:i + AJE_BATCH_SIZE]
+            for i in range(0, len(correctable_for_ai), AJE_BATCH_SIZE)
+        ]
+        batch_results = await asyncio.gather(*(generate_batch(b) for b in batches), return_exceptions=True)
+        for batch, results in zip(batches, batch_results):
+            if isinstance(results, Exception):
+                logger.error(f"[generate_ajes] AJE generation failed for {len(batch)} findings: {results}")
+            else:
+                ajes.extend(aje for aje in results if aje)
+        
+        if self.quota_exceeded and correctable_for_ai:
+            logger.warning("[generate_ajes] Skipped remaining AJEs due to quota exhaustion")
+            audit_record.add_reasoning_step("Skipping remaining AJE generation - Gemini quota exceeded")
         
         # If no AJEs generated due to quota, use deterministic fallback
         if len(ajes) == 0 and len(correctable) > 0:
@@ -77,12 +451,8 @@ class AJEGenerator:
             ajes = self._generate_deterministic_ajes(correctable, coa)
             logger.info(f"[generate_ajes] Generated {len(ajes)} deterministic AJEs")
             # Stream deterministic AJEs too
-            if on_aje_callback:
-                for aje in ajes:
-                    try:
-                        on_aje_callback(aje)
-                    except Exception:
-                        pass
+            for aje in ajes:
+                await _emit_aje(on_aje_callback, aje)
         
         logger.info(f"[generate_ajes] Successfully generated {len(ajes)} total AJEs")
         return ajes
@@ -97,363 +467,221 @@ class AJEGenerator:
         
         ajes = []
         
-        # Build account lookup
-        accounts = {a.code: a for a in coa.accounts}
-        
         for finding in findings:
-            aje = self._apply_aje_rule(finding, accounts)
+            aje = self._apply_aje_rule(finding)
             if aje:
                 ajes.append(aje)
         
         return ajes
     
-    def _apply_aje_rule(self, finding: dict, accounts: dict) -> dict | None:
+    def _apply_aje_rule(self, finding: dict) -> dict | None:
         """Apply deterministic rules to generate an AJE based on GAAP or IFRS."""
-        category = finding.get("category", "")
-        issue = finding.get("issue", "").lower()
-        details = finding.get("details", "")
-        affected_transactions = finding.get("affected_transactions", [])
-        transaction_details = finding.get("transaction_details", [])
+        keywords = set(_ISSUE_KEYWORD_RE.findall(finding.get("issue", "").lower()))
+        category = finding.get("category", "").lower()
+        
+        rule = next((r for matches, r in AJE_RULES if matches(keywords, category)), None)
+        if rule is None:
+            return None
         
         # Determine if IFRS or GAAP
         is_ifrs = self.accounting_standard == AccountingStandard.IFRS
         standard_prefix = "IFRS" if is_ifrs else "GAAP"
         
         # Extract amount from details if present (look for $ amounts)
-        import re
-        amount_match = re.search(r'\$?([\d,]+(?:\.\d{2})?)', details)
+        amount_match = _AMOUNT_RE.search(finding.get("details", ""))
         amount = float(amount_match.group(1).replace(',', '')) if amount_match else 1000.00
         
-        # Common AJE fields
-        base_aje = {
+        finding_id = finding.get("finding_id")
+        rationale = rule["ifrs_rationale"] if is_ifrs else rule["gaap_rationale"]
+        return {
             "aje_id": f"AJE-DET-{uuid.uuid4().hex[:6]}",
             "date": "Period End",
             "accounting_standard": self.accounting_standard.value,
-            "affected_transactions": affected_transactions,
-            "transaction_details": transaction_details,
+            "affected_transactions": finding.get("affected_transactions", []),
+            "transaction_details": finding.get("transaction_details", []),
+            "entries": [
+                {
+                    "account_code": code,
+                    "account_name": name,
+                    "debit": amount if side == "debit" else 0,
+                    "credit": amount if side == "credit" else 0,
+                }
+                for code, name, side in rule["entries"]
+            ],
+            "total_debits": amount,
+            "total_credits": amount,
+            "description": rule["description"].format(standard=standard_prefix, finding_id=finding_id),
+            "finding_reference": finding_id,
+            "rationale": rationale.format(standard=standard_prefix),
+            "rule_applied": f"{rule['rule']}_{standard_prefix}",
+            "standard_reference": rule["ifrs_reference"] if is_ifrs else rule["gaap_reference"],
+            "is_balanced": True
         }
+    
+    def _standard_names(self) -> tuple[bool, str]:
+        """Whether the audit uses IFRS, and the standard's name for prompts."""
+        is_ifrs = self.accounting_standard == AccountingStandard.IFRS
+        return is_ifrs, "IFRS" if is_ifrs else "US GAAP"
+    
+    def _describe_finding(self, finding: dict, is_ifrs: bool, standard_name: str) -> str:
+        """Prompt block describing one finding."""
+        standard_principle = finding.get('ifrs_standard') if is_ifrs else finding.get('gaap_principle')
+        return f"""Issue: {finding.get('issue')}
+Details: {finding.get('details')}
+Category: {finding.get('category')}
+{standard_name} Reference: {standard_principle or 'N/A'}"""
+    
+    def _check_quota(self, result: dict, audit_record: AuditRecord) -> bool:
+        """Record an exhausted Gemini quota reported by a result; True if it was."""
+        if not result.get("quota_exceeded"):
+            return False
+        logger.error("=" * 60)
+        logger.error("[AJE GENERATION] GEMINI QUOTA EXCEEDED!")
+        logger.error("Cannot generate AJEs - API limit reached")
+        logger.error("=" * 60)
+        self.quota_exceeded = True
+        self._quota_client = self.gemini
+        audit_record.add_reasoning_step("AJE generation skipped - Gemini API quota exceeded")
+        return True
+    
+    def _aje_from_response(self, finding: dict, parsed: dict, standard_name: str) -> dict | None:
+        """Build an AJE from Gemini's entry for a finding, or None if it does not balance."""
+        # Downstream consumers (exports, the audit result) expect numeric amounts
+        entries = [
+            {**e, "debit": e.get("debit") or 0, "credit": e.get("credit") or 0}
+            for e in parsed.get("entries", [])
+        ]
         
-        # Rule 1: Expense Misclassification
-        if "misclass" in issue or "classification" in category.lower():
-            rationale = ("IAS 1 requires proper expense classification for fair presentation" if is_ifrs 
-                        else "GAAP requires proper expense classification for accurate financial reporting")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6900", "account_name": "Miscellaneous Expense", "debit": 0, "credit": amount},
-                    {"account_code": "6200", "account_name": "Marketing Expense", "debit": amount, "credit": 0}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Reclassify expense per {standard_prefix} audit finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_EXPENSE_RECLASSIFICATION_{standard_prefix}",
-                "standard_reference": "IAS 1 - Presentation of Financial Statements" if is_ifrs else "ASC 220 - Income Statement",
-                "is_balanced": True
-            }
-        
-        # Rule 2: Revenue Recognition Timing
-        if "revenue" in issue and ("timing" in issue or "recognition" in issue):
-            rationale = ("IFRS 15 requires revenue recognition when performance obligations are satisfied" if is_ifrs
-                        else "ASC 606 requires revenue recognition only when performance obligations are satisfied")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "4000", "account_name": "Service Revenue", "debit": amount, "credit": 0},
-                    {"account_code": "2200", "account_name": "Deferred Revenue", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Defer unearned revenue per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_REVENUE_DEFERRAL_{standard_prefix}",
-                "standard_reference": "IFRS 15 - Revenue from Contracts with Customers" if is_ifrs else "ASC 606 - Revenue Recognition",
-                "is_balanced": True
-            }
-        
-        # Rule 3: Accrual Missing
-        if "accrual" in issue or "accrue" in issue:
-            rationale = ("IAS 1 accrual basis requires expenses to be recorded when incurred" if is_ifrs
-                        else "Matching principle requires expenses to be recorded in the period incurred")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6000", "account_name": "Operating Expense", "debit": amount, "credit": 0},
-                    {"account_code": "2100", "account_name": "Accrued Expenses", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Accrue unrecorded expense per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_EXPENSE_ACCRUAL_{standard_prefix}",
-                "standard_reference": "IAS 1.27-28 - Accrual Basis" if is_ifrs else "ASC 450 - Contingencies",
-                "is_balanced": True
-            }
-        
-        # Rule 4: Prepaid Expense Amortization
-        if "prepaid" in issue or "amortiz" in issue:
-            rationale = ("IFRS Framework requires systematic allocation of prepaid expenses" if is_ifrs
-                        else "Prepaid expenses must be amortized over the benefit period per GAAP")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6000", "account_name": "Operating Expense", "debit": amount, "credit": 0},
-                    {"account_code": "1200", "account_name": "Prepaid Expenses", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Amortize prepaid expense per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_PREPAID_AMORTIZATION_{standard_prefix}",
-                "standard_reference": "IAS 1 - Presentation of Financial Statements" if is_ifrs else "ASC 340 - Other Assets and Deferred Costs",
-                "is_balanced": True
-            }
-        
-        # Rule 5: Depreciation
-        if "deprec" in issue:
-            rationale = ("IAS 16 requires systematic depreciation over the asset's useful life" if is_ifrs
-                        else "Fixed assets must be depreciated over their useful life per GAAP")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6700", "account_name": "Depreciation Expense", "debit": amount, "credit": 0},
-                    {"account_code": "1600", "account_name": "Accumulated Depreciation", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Record depreciation per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_DEPRECIATION_{standard_prefix}",
-                "standard_reference": "IAS 16 - Property, Plant and Equipment" if is_ifrs else "ASC 360 - Property, Plant, and Equipment",
-                "is_balanced": True
-            }
-        
-        # Rule 6: Lease Accounting (IFRS 16 / ASC 842)
-        if "lease" in issue:
-            rationale = ("IFRS 16 requires recognition of right-of-use asset and lease liability" if is_ifrs
-                        else "ASC 842 requires recognition of right-of-use asset and lease liability")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "1700", "account_name": "Right-of-Use Asset", "debit": amount, "credit": 0},
-                    {"account_code": "2300", "account_name": "Lease Liability", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Recognize lease per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_LEASE_RECOGNITION_{standard_prefix}",
-                "standard_reference": "IFRS 16 - Leases" if is_ifrs else "ASC 842 - Leases",
-                "is_balanced": True
-            }
-        
-        # Rule 7: Impairment
-        if "impair" in issue:
-            rationale = ("IAS 36 requires impairment when carrying amount exceeds recoverable amount" if is_ifrs
-                        else "ASC 360 requires impairment testing when triggering events occur")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6800", "account_name": "Impairment Loss", "debit": amount, "credit": 0},
-                    {"account_code": "1600", "account_name": "Accumulated Impairment", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Record impairment per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_IMPAIRMENT_{standard_prefix}",
-                "standard_reference": "IAS 36 - Impairment of Assets" if is_ifrs else "ASC 360-10 - Impairment",
-                "is_balanced": True
-            }
-        
-        # Rule 8: Fraud - Duplicate/Suspicious Payments (provision for loss)
-        if category == "fraud" and ("duplicate" in issue or "structuring" in issue or "suspicious" in issue):
-            rationale = ("Provision for probable loss from suspected fraudulent transactions per IAS 37" if is_ifrs
-                        else "Provision for probable loss from suspected fraudulent transactions per ASC 450")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6850", "account_name": "Fraud Loss Expense", "debit": amount, "credit": 0},
-                    {"account_code": "2150", "account_name": "Provision for Fraud Losses", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Provision for suspected fraud per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_FRAUD_PROVISION_{standard_prefix}",
-                "standard_reference": "IAS 37 - Provisions, Contingent Liabilities" if is_ifrs else "ASC 450 - Contingencies",
-                "is_balanced": True
-            }
+        # Validate balance
+        total_debits, total_credits = _entry_totals(entries)
         
-        # Rule 9: Fraud - Round-tripping / Vendor anomalies (reclassify revenue)
-        if category == "fraud" and ("round-trip" in issue or "vendor" in issue or "round number" in issue):
-            rationale = ("Reclassify potentially fictitious revenue per IAS 18 / IFRS 15" if is_ifrs
-                        else "Reclassify potentially fictitious revenue per ASC 606")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "4000", "account_name": "Revenue", "debit": amount, "credit": 0},
-                    {"account_code": "2200", "account_name": "Deferred Revenue / Suspense", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Reclassify suspect revenue per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_FRAUD_REVENUE_RECLASSIFICATION_{standard_prefix}",
-                "standard_reference": "IFRS 15 - Revenue from Contracts with Customers" if is_ifrs else "ASC 606 - Revenue Recognition",
-                "is_balanced": True
-            }
+        if abs(total_debits - total_credits) >= 0.01:
+            logger.warning(f"[_aje_from_response] AJE not balanced for {finding.get('finding_id')}: debits={total_debits}, credits={total_credits}")
+            return None
         
-        # Rule 10: Fraud - Generic (Benford's, timing, weekend, shared address)
-        if category == "fraud":
-            rationale = (f"Segregate flagged transactions pending investigation per {standard_prefix} audit procedures" if is_ifrs
-                        else f"Segregate flagged transactions pending investigation per {standard_prefix} audit procedures")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "1950", "account_name": "Suspense - Under Investigation", "debit": amount, "credit": 0},
-                    {"account_code": "6900", "account_name": "Miscellaneous Expense", "debit": 0, "credit": amount}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Reclassify to suspense pending fraud investigation per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_FRAUD_SUSPENSE_{standard_prefix}",
-                "standard_reference": "ISA 240 - Auditor's Responsibilities Relating to Fraud" if is_ifrs else "AU-C 240 - Consideration of Fraud",
-                "is_balanced": True
-            }
+        logger.info(f"[_aje_from_response] Generated balanced {standard_name} AJE: ${total_debits:,.2f}")
+        return {
+            "aje_id": f"AJE-{uuid.uuid4().hex[:8]}",
+            "date": "Period End",
+            "entries": entries,
+            "total_debits": total_debits,
+            "total_credits": total_credits,
+            "description": parsed.get("description", "Adjusting entry"),
+            "finding_reference": finding.get("finding_id"),
+            "rationale": parsed.get("rationale", ""),
+            "standard_reference": parsed.get("standard_reference", f"{standard_name} Standard"),
+            "accounting_standard": self.accounting_standard.value,
+            "affected_transactions": finding.get("affected_transactions", []),
+            "transaction_details": finding.get("transaction_details", []),
+            "is_balanced": True
+        }
+    
+    async def _generate_ajes_batch(
+        self,
+        findings: list[dict],
+        coa_summary: str,
+        audit_record: AuditRecord
+    ) -> list[dict | None] | None:
+        """
+        Generate AJEs for several findings with a single Gemini call.
         
-        # Default: Generic reclassification
-        if category in ["classification", "structural", "timing"]:
-            rationale = (f"Correction required per {standard_prefix} audit finding" if is_ifrs
-                        else "Correction required per audit finding")
-            return {
-                **base_aje,
-                "entries": [
-                    {"account_code": "6900", "account_name": "Miscellaneous Expense", "debit": 0, "credit": amount},
-                    {"account_code": "6000", "account_name": "Operating Expense", "debit": amount, "credit": 0}
-                ],
-                "total_debits": amount,
-                "total_credits": amount,
-                "description": f"Correcting entry per {standard_prefix} finding {finding.get('finding_id')}",
-                "finding_reference": finding.get("finding_id"),
-                "rationale": rationale,
-                "rule_applied": f"RULE_GENERIC_CORRECTION_{standard_prefix}",
-                "standard_reference": "IAS 8 - Accounting Policies, Changes in Accounting Estimates and Errors" if is_ifrs else "ASC 250 - Accounting Changes and Error Corrections",
-                "is_balanced": True
-            }
+        Returns:
+            One AJE (or None, for the caller to retry alone) per finding, in
+            order; None if the call itself failed
+        """
+        logger.debug(f"[_generate_ajes_batch] Generating AJEs for {len(findings)} findings using {self.accounting_standard.value.upper()}")
         
-        return None
+        try:
+            is_ifrs, standard_name = self._standard_names()
+            findings_text = "\n\n".join(
+                f"FINDING {i}:\n{self._describe_finding(f, is_ifrs, standard_name)}"
+                for i, f in enumerate(findings, 1)
+            )
+            
+            prompt = AJE_BATCH_PROMPT_TEMPLATE.format(
+                standard_name=standard_name,
+                example_references=_example_references(is_ifrs),
+                coa_summary=coa_summary,
+                findings=findings_text
+            )
+            
+            result = await self.gemini.generate_json(
+                prompt=prompt,
+                purpose="aje_generation",
+                response_schema=AJE_BATCH_RESPONSE_SCHEMA
+            )
+            
+            if self._check_quota(result, audit_record):
+                return [None] * len(findings)
+            
+            if result.get("audit"):
+                audit_record.add_gemini_interaction(result["audit"])
+            
+            parsed = result.get("parsed")
+            if result.get("error") or not isinstance(parsed, dict):
+                logger.warning(f"[_generate_ajes_batch] Gemini error: {result.get('error')}")
+                return None
+            
+            # Map entries back by position; unknown or repeated indexes are ignored
+            ajes: list[dict | None] = [None] * len(findings)
+            for item in parsed.get("ajes", []):
+                index = item.get("finding_index") if isinstance(item, dict) else None
+                if isinstance(index, int) and 1 <= index <= len(findings) and ajes[index - 1] is None:
+                    ajes[index - 1] = self._aje_from_response(findings[index - 1], item, standard_name)
+            
+            missing = sum(aje is None for aje in ajes)
+            if missing:
+                logger.warning(f"[_generate_ajes_batch] No usable AJE for {missing}/{len(findings)} findings, retrying them individually")
+            return ajes
+            
+        except Exception as e:
+            logger.error(f"[_generate_ajes_batch] Exception during AJE generation: {e}")
+            return None
     
     async def _generate_aje_for_finding(
         self,
         finding: dict,
-        coa: ChartOfAccounts,
+        coa_summary: str,
         audit_record: AuditRecord
     ) -> dict | None:
-        """Generate a single AJE for a finding."""
+        """Generate a single AJE for a finding, given the prompt's chart of accounts summary."""
         logger.debug(f"[_generate_aje_for_finding] Generating AJE for: {finding.get('issue')} using {self.accounting_standard.value.upper()}")
         
         try:
-            # Build COA summary for prompt
-            coa_summary = "\n".join([
-                f"{a.code}: {a.name} ({a.type}, {a.normal_balance})"
-                for a in coa.accounts[:30]  # Limit for prompt size
-            ])
-            
             # Determine standard-specific context
-            is_ifrs = self.accounting_standard == AccountingStandard.IFRS
-            standard_name = "IFRS" if is_ifrs else "US GAAP"
-            standard_principle = finding.get('ifrs_standard') if is_ifrs else finding.get('gaap_principle')
+            is_ifrs, standard_name = self._standard_names()
             
-            prompt = f"""
-Generate an Adjusting Journal Entry to correct this audit finding under {standard_name}:
-
-ACCOUNTING STANDARD: {standard_name}
-
-FINDING:
-Issue: {finding.get('issue')}
-Details: {finding.get('details')}
-Category: {finding.get('category')}
-{standard_name} Reference: {standard_principle or 'N/A'}
-
-CHART OF ACCOUNTS:
-{coa_summary}
-
-Generate a balanced journal entry with proper debits and credits following {standard_name} principles.
-For fraud findings, consider: provision for losses (ASC 450/IAS 37), reclassification to suspense accounts, or reversal of fictitious entries.
-Return ONLY valid JSON in this format:
-{{
-    "description": "Brief description of the adjustment",
-    "entries": [
-        {{"account_code": "XXXX", "account_name": "Account Name", "debit": 0.00, "credit": 0.00}}
-    ],
-    "rationale": "Why this entry corrects the issue under {standard_name}",
-    "standard_reference": "The specific {standard_name} standard (e.g., {'IFRS 15, IAS 16' if is_ifrs else 'ASC 606, ASC 842'})"
-}}
-
-CRITICAL: Debits must equal credits. Use realistic amounts based on the finding.
-Ensure the rationale references the appropriate {standard_name} standard.
-"""
+            prompt = AJE_PROMPT_TEMPLATE.format(
+                standard_name=standard_name,
+                example_references=_example_references(is_ifrs),
+                coa_summary=coa_summary,
+                finding=self._describe_finding(finding, is_ifrs, standard_name)
+            )
             
             result = await self.gemini.generate_json(
                 prompt=prompt,
-                purpose="aje_generation"
+                purpose="aje_generation",
+                response_schema=AJE_RESPONSE_SCHEMA,
+                stop_when=_entries_unbalanced
             )
             
             # Check for quota exceeded
-            if result.get("quota_exceeded"):
-                logger.error("=" * 60)
-                logger.error("[AJE GENERATION] GEMINI QUOTA EXCEEDED!")
-                logger.error("Cannot generate AJEs - API limit reached")
-                logger.error("=" * 60)
-                self.quota_exceeded = True
-                audit_record.add_reasoning_step("AJE generation skipped - Gemini API quota exceeded")
+            if self._check_quota(result, audit_record):
                 return None
             
             if result.get("audit"):
                 audit_record.add_gemini_interaction(result["audit"])
             
+            if result.get("stopped"):
+                logger.warning("[_generate_aje_for_finding] AJE entries not balanced, stopped generation early")
+                return None
+            
             if result.get("error"):
                 logger.warning(f"[_generate_aje_for_finding] Gemini error: {result.get('error')}")
                 return None
             
             if result.get("parsed"):
-                parsed = result["parsed"]
-                
-                # Validate balance
-                total_debits = sum(e.get("debit", 0) for e in parsed.get("entries", []))
-                total_credits = sum(e.get("credit", 0) for e in parsed.get("entries", []))
-                
-                if abs(total_debits - total_credits) < 0.01:
-                    logger.info(f"[_generate_aje_for_finding] Generated balanced {standard_name} AJE: ${total_debits:,.2f}")
-                    return {
-                        "aje_id": f"AJE-{uuid.uuid4().hex[:8]}",
-                        "date": "Period End",
-                        "entries": parsed.get("entries", []),
-                        "total_debits": total_debits,
-                        "total_credits": total_credits,
-                        "description": parsed.get("description", "Adjusting entry"),
-                        "finding_reference": finding.get("finding_id"),
-                        "rationale": parsed.get("rationale", ""),
-                        "standard_reference": parsed.get("standard_reference", f"{standard_name} Standard"),
-                        "accounting_standard": self.accounting_standard.value,
-                        "affected_transactions": finding.get("affected_transactions", []),
-                        "transaction_details": finding.get("transaction_details", []),
-                        "is_balanced": True
-                    }
-                else:
-                    logger.warning(f"[_generate_aje_for_finding] AJE not balanced: debits={total_debits}, credits={total_credits}")
+                return self._aje_from_response(finding, result["parsed"], standard_name)
             
             return None
             
@@ -4,7 +4,7 @@ import uuid
 from datetime import datetime
 from loguru import logger
 
-from core.gemini_client import GeminiClient
+from core.gemini_client import GeminiClient, get_gemini_client
 from core.audit_trail import AuditRecord
 from core.schemas import AuditFinding, Severity, FindingCategory, AccountingBasis
 from .gaap_rules import GAAPRulesEngine
@@ -34,7 +34,6 @@ class AuditEngine:
     
     def __init__(self):
         logger.info("[AuditEngine.__init__] Initializing audit engine components")
-        self.gemini = GeminiClient()
         self.gaap_engine = GAAPRulesEngine()
         self.ifrs_engine = IFRSRulesEngine()
         self.anomaly_detector = AnomalyDetector()
@@ -43,6 +42,11 @@ class AuditEngine:
         self.risk_scorer = RiskScorer()
         logger.info("[AuditEngine.__init__] All components initialized")
     
+    @property
+    def gemini(self) -> GeminiClient:
+        """Shared Gemini client, resolved per use so runtime API key updates apply."""
+        return get_gemini_client()
+    
     async def run_full_audit(
         self,
         company_data: dict,
@@ -4,7 +4,7 @@ AI chatbot for explaining audit findings and answering questions.
 """
 from loguru import logger
 
-from core.gemini_client import GeminiClient
+from core.gemini_client import GeminiClient, get_gemini_client
 
 
 class AuditorAssistant:
@@ -12,7 +12,11 @@ class AuditorAssistant:
     
     def __init__(self):
         logger.info("[AuditorAssistant.__init__] Initializing auditor assistant")
-        self.gemini = GeminiClient()
+    
+    @property
+    def gemini(self) -> GeminiClient:
+        """Shared Gemini client."""
+        return get_gemini_client()
     
     async def respond(
         self,
@@ -82,6 +82,32 @@ class Settings(BaseSettings):
     # Audit Trail
     AUDIT_TRAIL_ENABLED: bool = True
     
+    # In-memory store limits (least recently used entries are evicted)
+    AUDIT_RESULTS_MAX_ENTRIES: int = 512
+    AUDIT_TRAIL_MAX_RECORDS: int = 1024  # Backstop only; trails are dropped with their audit results
+    CHAT_SESSIONS_MAX_ENTRIES: int = 10000
+    CHAT_SESSION_TTL_SECONDS: int = 3600
+    OWNERSHIP_GRAPHS_MAX_ENTRIES: int = 64
+    OWNERSHIP_GRAPH_TTL_SECONDS: int = 3600
+    OWNERSHIP_DISCOVERY_CACHE_MAX_ENTRIES: int = 32  # Registry lookups reused by /discover
+    OWNERSHIP_DISCOVERY_CACHE_TTL_SECONDS: int = 3600
+    
+    # Company data store (SQLite). The file persists companies and is shared
+    # across workers; hydrated companies are cached per process. ":memory:"
+    # keeps everything in this process.
+    COMPANY_STORE_PATH: str = "./.cache/companies.db"
+    COMPANY_CACHE_MAX_ENTRIES: int = 32
+    RENDERED_RESPONSE_CACHE_MAX_ENTRIES: int = 32  # Pre-rendered GL/COA/TB JSON bodies
+    EXPORT_CACHE_MAX_ENTRIES: int = 64  # Rendered PDF/XLSX exports
+    EXPORT_CACHE_MAX_BYTES: int = 128 * 1024 * 1024
+    
+    # Worker processes for CPU-bound rendering (PDF exports); 0 runs it in a thread
+    PROCESS_POOL_WORKERS: int = min(4, os.cpu_count() or 1)
+    
+    # Parsed demo scenarios are pickled here so restarts skip CSV parsing
+    # (empty disables the on-disk cache)
+    SCENARIO_CACHE_DIR: str = "./.cache/scenarios"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
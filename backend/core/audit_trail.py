@@ -9,6 +9,9 @@ import hashlib
 import json
 from loguru import logger
 
+from config import settings
+from core.cache import LRUCache
+
 
 @dataclass
 class AuditRecord:
@@ -160,8 +163,10 @@ class AuditRecord:
 class AuditTrail:
     """Manager for audit trail records."""
     
-    def __init__(self):
-        self.records: dict[str, AuditRecord] = {}
+    def __init__(self, max_records: int = None):
+        # Trails are dropped together with their audit results; this bound
+        # only catches records whose audit never produced a result
+        self.records: LRUCache = LRUCache(maxsize=max_records or settings.AUDIT_TRAIL_MAX_RECORDS)
     
     def create_record(self, audit_id: str, company_id: str, created_by: str = "system") -> AuditRecord:
         """Create a new audit record."""
@@ -0,0 +1,96 @@
+"""
+Bounded in-memory caches for process-local state.
+Keeps long-lived stores (audit results, chat sessions) from growing without limit.
+"""
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Callable, Iterator, Optional
+import time
+
+
+class LRUCache(MutableMapping):
+    """
+    Dict-like store with least-recently-used eviction and optional TTL.
+
+    Reads and writes refresh an entry's recency. When the store exceeds
+    maxsize, the least recently used entry is evicted. If ttl is set, entries
+    older than ttl seconds (since last write) are treated as missing. If
+    maxweight is set, entries are also evicted until the summed weigher(value)
+    fits within it (e.g. byte sizes of cached payloads).
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        on_evict: Optional[Callable[[Any, Any], None]] = None,
+        maxweight: Optional[int] = None,
+        weigher: Optional[Callable[[Any], int]] = None
+    ):
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        if (maxweight is None) != (weigher is None):
+            raise ValueError("maxweight and weigher must be given together")
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self._data: OrderedDict = OrderedDict()
+        self._expires: dict = {}
+        self._weights: dict = {}
+        self.total_weight = 0
+
+    def _is_expired(self, key) -> bool:
+        return self.ttl is not None and self._expires.get(key, 0) <= time.monotonic()
+
+    def _evict(self, key):
+        value = self._data.pop(key)
+        self._expires.pop(key, None)
+        self.total_weight -= self._weights.pop(key, 0)
+        if self.on_evict:
+            self.on_evict(key, value)
+
+    def __getitem__(self, key):
+        if key not in self._data or self._is_expired(key):
+            if key in self._data:
+                self._evict(key)
+            raise KeyError(key)
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = value
+        if self.ttl is not None:
+            self._expires[key] = time.monotonic() + self.ttl
+        if self.weigher is not None:
+            weight = self.weigher(value)
+            self.total_weight += weight - self._weights.get(key, 0)
+            self._weights[key] = weight
+        while len(self._data) > self.maxsize or (
+            self.maxweight is not None and self.total_weight > self.maxweight and self._data
+        ):
+            oldest = next(iter(self._data))
+            self._evict(oldest)
+
+    def __delitem__(self, key):
+        del self._data[key]
+        self._expires.pop(key, None)
+        self.total_weight -= self._weights.pop(key, 0)
+
+    def __contains__(self, key) -> bool:
+        # Membership checks do not refresh recency
+        return key in self._data and not self._is_expired(key)
+
+    def __iter__(self) -> Iterator:
+        return iter([k for k in self._data if not self._is_expired(k)])
+
+    def __len__(self) -> int:
+        if self.ttl is None:
+            return len(self._data)
+        return sum(1 for k in self._data if not self._is_expired(k))
+
+    def __repr__(self) -> str:
+        return f"LRUCache(maxsize={self.maxsize}, ttl={self.ttl}, size={len(self._data)})"
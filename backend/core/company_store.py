@@ -0,0 +1,161 @@
+"""
+Company data store.
+Keeps a bounded set of hydrated companies in memory, backed by SQLite so
+evicted companies (or ones written by another worker) load back on demand.
+"""
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Iterator
+import asyncio
+import pickle
+import sqlite3
+import threading
+import time
+from loguru import logger
+
+from core.cache import LRUCache
+from core.schemas import CompanyMetadata
+
+
+class CompanyStore(MutableMapping):
+    """
+    Dict-like store of company data (metadata, COA, GL, TB, ...) keyed by company_id.
+
+    Each company is persisted as one pickled blob, with its metadata kept as
+    JSON in a separate column so listings never unpickle ledgers. Reads are
+    served from an in-process LRU of hydrated companies; with a file-backed
+    store, a cached company is reloaded when its row's updated_at shows that
+    another worker has rewritten it. Values are written through on
+    assignment; mutate a company dict in place only if you assign it back
+    afterwards.
+
+    Request handlers should use load() and save(), which pickle and touch
+    SQLite in a worker thread; the mapping methods do that work inline.
+    """
+
+    def __init__(self, path: str = ":memory:", cache_size: int = 32):
+        self.path = path
+        # Only a file can be written by other processes
+        self._shared = path != ":memory:"
+        if self._shared:
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        if self._shared:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS companies ("
+            "company_id TEXT PRIMARY KEY, metadata TEXT NOT NULL, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+        # company_id -> (updated_at, data)
+        self._cache = LRUCache(maxsize=cache_size)
+
+    def _fetch(self, company_id: str, cached_version: float | None) -> tuple[float, dict | None] | None:
+        """
+        Read a company's row. Returns None if it does not exist, and
+        (updated_at, None) without unpickling if cached_version is current.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT updated_at, CASE WHEN updated_at > ? THEN data END FROM companies WHERE company_id = ?",
+                (-1.0 if cached_version is None else cached_version, company_id)
+            ).fetchone()
+        if row is None:
+            return None
+        if row[1] is None:
+            return row[0], None
+        logger.debug(f"[CompanyStore] Hydrating company from store: {company_id}")
+        return row[0], pickle.loads(row[1])
+
+    def _write(self, company_id: str, data: dict, version: float):
+        blob = pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL)
+        metadata_json = data["metadata"].model_dump_json()
+        with self._lock:
+            # A slower, older write never replaces a newer one
+            self._conn.execute(
+                "INSERT INTO companies (company_id, metadata, data, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(company_id) DO UPDATE SET "
+                "metadata = excluded.metadata, data = excluded.data, updated_at = excluded.updated_at "
+                "WHERE excluded.updated_at >= companies.updated_at",
+                (company_id, metadata_json, blob, version)
+            )
+            self._conn.commit()
+
+    def _remember(self, company_id: str, version: float, data: dict):
+        cached = self._cache.get(company_id)
+        if cached is None or cached[0] <= version:
+            self._cache[company_id] = (version, data)
+
+    def _resolve(self, company_id: str, cached: tuple | None, fetched: tuple | None) -> dict | None:
+        if fetched is None:
+            self._cache.pop(company_id, None)
+            return None
+        version, data = fetched
+        if data is None:
+            return cached[1]
+        self._remember(company_id, version, data)
+        return data
+
+    async def load(self, company_id: str) -> dict | None:
+        """The stored company, or None; hydration runs off the event loop."""
+        cached = self._cache.get(company_id)
+        if cached is not None and not self._shared:
+            return cached[1]
+        fetched = await asyncio.to_thread(self._fetch, company_id, cached[0] if cached else None)
+        return self._resolve(company_id, cached, fetched)
+
+    async def save(self, company_id: str, data: dict):
+        """Store a company; serialization and the write run off the event loop."""
+        version = time.time()
+        await asyncio.to_thread(self._write, company_id, data, version)
+        self._remember(company_id, version, data)
+
+    def __getitem__(self, company_id: str) -> dict:
+        cached = self._cache.get(company_id)
+        if cached is not None and not self._shared:
+            return cached[1]
+        data = self._resolve(company_id, cached, self._fetch(company_id, cached[0] if cached else None))
+        if data is None:
+            raise KeyError(company_id)
+        return data
+
+    def __setitem__(self, company_id: str, data: dict):
+        version = time.time()
+        self._write(company_id, data, version)
+        self._remember(company_id, version, data)
+
+    def __delitem__(self, company_id: str):
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM companies WHERE company_id = ?", (company_id,))
+            self._conn.commit()
+        self._cache.pop(company_id, None)
+        if cursor.rowcount == 0:
+            raise KeyError(company_id)
+
+    def __contains__(self, company_id) -> bool:
+        if not self._shared and company_id in self._cache:
+            return True
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM companies WHERE company_id = ?", (company_id,)
+            ).fetchone()
+        return row is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT company_id FROM companies ORDER BY rowid").fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
+
+    def list_metadata(self) -> list[CompanyMetadata]:
+        """Metadata for every stored company, without hydrating ledgers."""
+        with self._lock:
+            rows = self._conn.execute("SELECT metadata FROM companies ORDER BY rowid").fetchall()
+        return [CompanyMetadata.model_validate_json(row[0]) for row in rows]
+
+    def __repr__(self) -> str:
+        return f"CompanyStore(path={self.path!r}, cached={len(self._cache)})"
@@ -6,14 +6,29 @@ Includes rate limiting and retry logic
 """
 import asyncio
 import time
-from typing import Optional, Any
+from collections import deque
+from typing import Callable, Optional, Any
 from datetime import datetime
 import hashlib
-import json
+import orjson
 from loguru import logger
 
 from config import settings
 
+# Cap on retained interactions per client (long-lived shared clients would otherwise grow forever)
+INTERACTION_LOG_MAX_ENTRIES = 1000
+
+# Time allowed for the API key probe before giving up
+KEY_PROBE_TIMEOUT_SECONDS = 5.0
+
+
+class GenerationStopped(Exception):
+    """Raised when a stop_when check ends a streamed generation early."""
+    
+    def __init__(self, partial_text: str):
+        super().__init__("Generation stopped early by caller check")
+        self.partial_text = partial_text
+
 
 class RateLimiter:
     """Simple rate limiter with exponential backoff."""
@@ -88,7 +103,7 @@ class GeminiClient:
         else:
             self._initialize_client()
         
-        self.interaction_log: list[dict] = []
+        self.interaction_log: deque[dict] = deque(maxlen=INTERACTION_LOG_MAX_ENTRIES)
     
     def _initialize_client(self):
         """Initialize the Gemini client using the new google-genai package."""
@@ -144,7 +159,9 @@ class GeminiClient:
         context: Optional[str] = None,
         temperature: float = 0.7,
         max_tokens: int = 8192,
-        purpose: str = "general"
+        purpose: str = "general",
+        response_schema: Optional[dict] = None,
+        stop_when: Optional[Callable[[str], bool]] = None
     ) -> dict:
         """
         Generate content with full audit trail and rate limiting.
@@ -155,6 +172,11 @@ class GeminiClient:
             temperature: Creativity level (0-1)
             max_tokens: Maximum response tokens
             purpose: Description of why this call is being made
+            response_schema: Optional JSON schema the response must follow
+                (enforced by the google-genai client; ignored by the legacy one)
+            stop_when: Optional check on the text received so far; the response
+                is streamed and abandoned once it returns True, and the result
+                carries stopped=True (google-genai client only)
             
         Returns:
             Dict with response text, metadata, and audit info
@@ -201,7 +223,9 @@ class GeminiClient:
                                 self._generate_with_new_client,
                                 full_prompt,
                                 temperature,
-                                max_tokens
+                                max_tokens,
+                                response_schema,
+                                stop_when
                             ),
                             timeout=call_timeout
                         )
@@ -254,6 +278,27 @@ class GeminiClient:
                     "error": None,
                     "audit": audit_entry
                 }
+            
+            except GenerationStopped as e:
+                # Caller rejected the partial output: not an API failure, no retry
+                logger.info(f"[generate] Generation stopped early after {len(e.partial_text)} chars")
+                self.rate_limiter.record_success()
+                audit_entry = self._create_audit_entry(
+                    prompt=full_prompt,
+                    response=e.partial_text,
+                    purpose=purpose,
+                    prompt_hash=prompt_hash,
+                    response_hash=hashlib.sha256(e.partial_text.encode()).hexdigest(),
+                    timestamp=timestamp,
+                    error=str(e)
+                )
+                self.interaction_log.append(audit_entry)
+                return {
+                    "text": e.partial_text,
+                    "error": str(e),
+                    "stopped": True,
+                    "audit": audit_entry
+                }
                 
             except Exception as e:
                 error_str = str(e)
@@ -322,15 +367,31 @@ class GeminiClient:
             "audit": audit_entry
         }
     
-    def _generate_with_new_client(self, prompt: str, temperature: float, max_tokens: int) -> str:
+    def _generate_with_new_client(
+        self,
+        prompt: str,
+        temperature: float,
+        max_tokens: int,
+        response_schema: Optional[dict] = None,
+        stop_when: Optional[Callable[[str], bool]] = None
+    ) -> str:
         """Generate using the new google-genai client."""
+        structured_output = {}
+        if response_schema:
+            structured_output = {"response_mime_type": "application/json", "response_schema": response_schema}
+        config = self.genai_types.GenerateContentConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+            **structured_output
+        )
+        
+        if stop_when is not None:
+            return self._stream_with_new_client(prompt, config, stop_when)
+        
         response = self.client.models.generate_content(
             model=self.model,
             contents=prompt,
-            config=self.genai_types.GenerateContentConfig(
-                temperature=temperature,
-                max_output_tokens=max_tokens,
-            )
+            config=config
         )
         
         # Handle blocked or empty responses
@@ -355,6 +416,26 @@ class GeminiClient:
         
         return response.text
     
+    def _stream_with_new_client(self, prompt: str, config, stop_when: Callable[[str], bool]) -> str:
+        """Stream a response, abandoning it (and its remaining tokens) once stop_when matches."""
+        stream = self.client.models.generate_content_stream(model=self.model, contents=prompt, config=config)
+        text = ""
+        try:
+            for chunk in stream:
+                if chunk.text:
+                    text += chunk.text
+                    if stop_when(text):
+                        raise GenerationStopped(text)
+        finally:
+            # Closing the stream drops the HTTP response, ending generation server-side
+            close = getattr(stream, "close", None)
+            if close:
+                close()
+        
+        if not text:
+            raise ValueError("Response text is None - content may be blocked or model overloaded")
+        return text
+    
     async def _generate_with_legacy_client(self, prompt: str, temperature: float, max_tokens: int) -> str:
         """Generate using the legacy google-generativeai client."""
         generation_config = self.genai.GenerationConfig(
@@ -372,11 +453,15 @@ class GeminiClient:
         self,
         prompt: str,
         context: Optional[str] = None,
-        purpose: str = "json_generation"
+        purpose: str = "json_generation",
+        response_schema: Optional[dict] = None,
+        stop_when: Optional[Callable[[str], bool]] = None
     ) -> dict:
         """
         Generate JSON response from Gemini.
-        Automatically parses the response as JSON.
+        Automatically parses the response as JSON. Pass response_schema to have
+        the API constrain the output to that shape, and stop_when to abandon a
+        response whose partial text is already unusable (see generate()).
         """
         # Add JSON instruction to prompt
         json_prompt = f"""{prompt}
@@ -387,7 +472,9 @@ IMPORTANT: Return ONLY valid JSON. No markdown, no explanation, just the JSON ob
             prompt=json_prompt,
             context=context,
             temperature=0.3,  # Lower temperature for structured output
-            purpose=purpose
+            purpose=purpose,
+            response_schema=response_schema,
+            stop_when=stop_when
         )
         
         if result["error"]:
@@ -403,7 +490,7 @@ IMPORTANT: Return ONLY valid JSON. No markdown, no explanation, just the JSON ob
             elif "```" in text:
                 text = text.split("```")[1].split("```")[0]
             
-            parsed = json.loads(text.strip())
+            parsed = orjson.loads(text.strip())
             
             # CRITICAL FIX: Ensure parsed result is a dictionary (or list)
             # Gemini sometimes returns a string literal if it fails to generate an object
@@ -417,7 +504,7 @@ IMPORTANT: Return ONLY valid JSON. No markdown, no explanation, just the JSON ob
             else:
                 result["parsed"] = parsed
             
-        except json.JSONDecodeError as e:
+        except orjson.JSONDecodeError as e:
             result["error"] = f"JSON parse error: {e}"
             result["parsed"] = None
         
@@ -492,12 +579,12 @@ Return ONLY the code, no explanation."""
         }
     
     def get_interaction_log(self) -> list[dict]:
-        """Get the full interaction log for audit trail."""
-        return self.interaction_log
+        """Get the retained interaction log for audit trail."""
+        return list(self.interaction_log)
     
     def clear_interaction_log(self):
         """Clear the interaction log (use with caution)."""
-        self.interaction_log = []
+        self.interaction_log.clear()
 
     async def search(
         self,
@@ -583,3 +670,49 @@ Return ONLY the code, no explanation."""
         except Exception as e:
             logger.error(f"[search] Error: {e}")
             return {"text": None, "error": str(e)}
+
+
+# Shared client instance (rebuilt if the Gemini API key changes at runtime)
+_shared_client: Optional[GeminiClient] = None
+
+
+def get_gemini_client() -> GeminiClient:
+    """
+    Return (and lazily create) the shared GeminiClient.
+    Sharing one client keeps a single connection pool and rate limiter across
+    components, so the configured requests-per-minute applies process-wide.
+    """
+    global _shared_client
+    if _shared_client is None or _shared_client.api_key != settings.GEMINI_API_KEY:
+        logger.info("[get_gemini_client] Creating shared GeminiClient instance")
+        _shared_client = GeminiClient()
+    return _shared_client
+
+
+async def probe_api_key(api_key: str, timeout: float = KEY_PROBE_TIMEOUT_SECONDS) -> tuple[bool, str]:
+    """
+    Check an API key with a single one-item model listing.
+    Nothing global is touched, so a rejected key leaves the current client in place.
+    
+    Returns:
+        (valid, message) - valid is False if the key was rejected or could not be checked
+    """
+    try:
+        from google import genai
+        from google.genai import errors
+    except ImportError:
+        return False, "google-genai is not installed"
+    
+    try:
+        client = genai.Client(api_key=api_key)
+        await asyncio.wait_for(client.aio.models.list(config={"page_size": 1}), timeout=timeout)
+    except asyncio.TimeoutError:
+        return False, "Timed out contacting the Gemini API"
+    except errors.ClientError as e:
+        logger.warning(f"[probe_api_key] Key rejected: {e.code} {e.message}")
+        return False, "API key was rejected by the Gemini API"
+    except Exception as e:
+        logger.warning(f"[probe_api_key] Probe failed: {e}")
+        return False, f"Could not reach the Gemini API: {e}"
+    
+    return True, "API key validated"
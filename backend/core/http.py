@@ -0,0 +1,16 @@
+"""
+HTTP helpers shared by the API routes.
+"""
+from typing import Optional
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """Whether the client accepts a gzip-encoded body (an explicit q=0 refuses it)."""
+    for coding in (accept_encoding or "").split(","):
+        name, _, params = coding.partition(";")
+        if name.strip().lower() == "gzip":
+            try:
+                return float(params.strip().removeprefix("q=") or 1) > 0
+            except ValueError:
+                return True
+    return False
@@ -3,11 +3,260 @@ Progress tracking for streaming updates to frontend.
 Uses in-memory storage for real-time progress updates.
 Supports checkpoints for resume functionality and cancellation tokens.
 """
-from typing import Optional, Any
+from typing import Optional, Any, AsyncIterator, Iterator
+from collections import deque
 from datetime import datetime
+from itertools import islice
 import asyncio
+import zlib
+import orjson
 from loguru import logger
 
+from core.http import accepts_gzip
+
+# orjson options for SSE payloads (findings may carry numpy scalars or non-string keys)
+# Frames stay compact JSON: EventSource delivers text and the frontend JSON.parses
+# every message, so a binary encoding would need base64 (+33%) and a client decoder.
+SSE_JSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+# Interval between keep-alive heartbeats on idle SSE streams
+HEARTBEAT_INTERVAL_SECONDS = 30.0
+
+
+# Frames larger than this are sent with long strings cut down to previews
+MAX_SSE_FRAME_BYTES = 8192
+SSE_PREVIEW_CHARS = 500
+
+
+def _truncate_strings(value: Any, limit: int) -> Any:
+    """Recursively cut long strings in a payload, copying only what changes."""
+    if isinstance(value, str):
+        return value if len(value) <= limit else f"{value[:limit]}..."
+    if isinstance(value, dict):
+        return {k: _truncate_strings(v, limit) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_truncate_strings(v, limit) for v in value]
+    return value
+
+
+def preview_strings(value: Any, limit: int = SSE_PREVIEW_CHARS) -> Any:
+    """Copy of a payload with long strings cut to previews, for steps kept in replay history."""
+    return _truncate_strings(value, limit)
+
+
+def format_sse(payload: Any) -> bytes:
+    """
+    Encode a payload as a single Server-Sent Events data frame.
+    Oversized payloads keep their shape but have long strings truncated and
+    are flagged with truncated=True; the stored step is left untouched.
+    """
+    raw = orjson.dumps(payload, option=SSE_JSON_OPTIONS)
+    if len(raw) > MAX_SSE_FRAME_BYTES and isinstance(payload, dict):
+        shrunk = _truncate_strings(payload, SSE_PREVIEW_CHARS)
+        shrunk["truncated"] = True
+        raw = orjson.dumps(shrunk, option=SSE_JSON_OPTIONS)
+    return b"data: " + raw + b"\n\n"
+
+
+# Constant keep-alive frame, encoded once
+HEARTBEAT_FRAME = format_sse({"type": "heartbeat"})
+
+
+# Response headers for SSE streams (no proxy buffering, no caching)
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no"
+}
+SSE_GZIP_LEVEL = 6
+
+
+async def gzip_stream(chunks: AsyncIterator) -> AsyncIterator[bytes]:
+    """
+    Gzip an SSE stream incrementally.
+    Each chunk is sync-flushed so events reach the browser immediately;
+    GZipMiddleware skips text/event-stream because it would buffer them.
+    """
+    compressor = zlib.compressobj(SSE_GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    try:
+        async for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode()
+            yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        yield compressor.flush()
+    finally:
+        await chunks.aclose()
+
+
+def sse_stream(chunks: AsyncIterator, accept_encoding: str = "") -> tuple[AsyncIterator, dict]:
+    """Pick the SSE body and headers, compressing when the client accepts gzip."""
+    if accepts_gzip(accept_encoding):
+        return gzip_stream(chunks), {**SSE_HEADERS, "Content-Encoding": "gzip", "Vary": "Accept-Encoding"}
+    return chunks, SSE_HEADERS
+
+
+class ProgressStep(dict):
+    """
+    A recorded progress update.
+    Its SSE frame is encoded on first use and shared by every subscriber and
+    replay, so fanout to several dashboards does not re-serialize the step.
+    """
+    __slots__ = ("_frame",)
+    
+    @property
+    def frame(self) -> bytes:
+        try:
+            return self._frame
+        except AttributeError:
+            self._frame = format_sse(self)
+            return self._frame
+
+
+def encode_step(step: dict) -> bytes:
+    """Get the SSE frame for a queued step, reusing the cached encoding when present."""
+    if isinstance(step, ProgressStep):
+        return step.frame
+    return format_sse(step)
+
+
+# Queue slots per SSE subscriber before streamed data steps are merged into batches
+SUBSCRIBER_QUEUE_MAX_ITEMS = 1024
+
+
+class StepBatch:
+    """
+    A run of consecutive "data" steps of one data_type held in one queue slot.
+    Stored as a range over the operation's step history, so a batch stays the
+    same size however many steps it covers.
+    """
+    __slots__ = ("history", "start", "stop")
+    
+    def __init__(self, history: list, start: int, stop: int):
+        self.history = history
+        self.start = start
+        self.stop = stop
+    
+    def __iter__(self) -> Iterator[dict]:
+        return islice(self.history, self.start, self.stop)
+    
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+
+def _data_type(step: Any) -> Optional[str]:
+    """data_type of a streamed "data" step, or None for any other item."""
+    if isinstance(step, dict) and step.get("type") == "data":
+        return (step.get("data") or {}).get("data_type")
+    return None
+
+
+class SubscriberQueue(asyncio.Queue):
+    """
+    Per-subscriber step queue that never drops a step.
+    Once a slow client falls maxsize slots behind, a "data" step that directly
+    follows one of the same data_type in the history extends that slot's
+    StepBatch instead of taking a new slot. Every other item, including the
+    error step and end marker, is queued on its own. Batches are history
+    ranges, so a node/edge burst costs one fixed-size slot however long it
+    runs. drain_queue flattens batches back in order.
+    """
+    
+    def __init__(self, history: list, maxsize: int = SUBSCRIBER_QUEUE_MAX_ITEMS):
+        self.history = history
+        self.limit = maxsize
+        # Index in history of the next step this queue expects to receive
+        self._position = 0
+        # The bound is applied in _put, so asyncio itself never refuses an item
+        super().__init__()
+    
+    def _init(self, maxsize):
+        self._queue = deque()
+    
+    def _get(self):
+        return self._queue.popleft()
+    
+    def _put(self, item):
+        index = self._history_index(item)
+        if index is not None and self.backlogged and self._merge_tail(item, index):
+            return
+        self._queue.append(item)
+    
+    @property
+    def backlogged(self) -> bool:
+        """Whether the subscriber has fallen maxsize slots behind."""
+        return self.qsize() >= self.limit
+    
+    def _history_index(self, item) -> Optional[int]:
+        """Position of item in the history, or None for markers such as end and heartbeat."""
+        history = self.history
+        for index in (self._position, len(history) - 1):
+            if 0 <= index < len(history) and history[index] is item:
+                self._position = index + 1
+                return index
+        return None
+    
+    def _merge_tail(self, item: dict, index: int) -> bool:
+        """Extend the last slot with item if both are consecutive data steps of one data_type."""
+        data_type = _data_type(item)
+        if data_type is None:
+            return False
+        tail = self._queue[-1]
+        if isinstance(tail, StepBatch):
+            if tail.stop == index and _data_type(self.history[tail.start]) == data_type:
+                tail.stop = index + 1
+                return True
+            return False
+        if index > 0 and self.history[index - 1] is tail and _data_type(tail) == data_type:
+            self._queue[-1] = StepBatch(self.history, index - 1, index + 1)
+            return True
+        return False
+
+
+async def heartbeat_loop(queue: asyncio.Queue, interval: float = HEARTBEAT_INTERVAL_SECONDS):
+    """
+    Periodically push a heartbeat marker into a subscriber queue.
+    Runs as a companion task to an SSE generator so the generator can block
+    on queue.get() without arming a timeout for every event.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        # A full queue means the stream is busy, so a keep-alive is not needed
+        busy = queue.backlogged if isinstance(queue, SubscriberQueue) else queue.full()
+        if not busy:
+            queue.put_nowait({"type": "heartbeat"})
+
+
+def drain_queue(queue: asyncio.Queue, first: dict) -> list[dict]:
+    """Collect an already-received step plus everything queued behind it, unpacking batches."""
+    steps = []
+    item = first
+    while True:
+        if isinstance(item, StepBatch):
+            steps.extend(item)
+        else:
+            steps.append(item)
+        if queue.empty():
+            return steps
+        item = queue.get_nowait()
+
+
+def _same_checkpoint(old: dict, new: dict) -> bool:
+    """Cheap equality for checkpoints: nested dicts are compared by key, other values by identity or scalar equality."""
+    if old.keys() != new.keys():
+        return False
+    for key, value in new.items():
+        prev = old[key]
+        if prev is value:
+            continue
+        if isinstance(value, dict) and isinstance(prev, dict):
+            if not _same_checkpoint(prev, value):
+                return False
+        elif isinstance(value, (list, tuple, set)) or prev != value:
+            # Containers are compared by identity to avoid walking large finding lists
+            return False
+    return True
+
 
 class ProgressTracker:
     """Tracks progress of long-running operations for streaming to frontend."""
@@ -71,7 +320,7 @@ class ProgressTracker:
         
         # Build step data with step info
         step_info = self._step_info.get(operation_id, {})
-        step = {
+        step = ProgressStep({
             "timestamp": datetime.now().isoformat(),
             "type": step_type,  # info, success, warning, error, ai, progress, data, quota_exceeded
             "message": message,
@@ -81,16 +330,13 @@ class ProgressTracker:
             "total_steps": step_info.get("total_steps"),
             "step_name": step_info.get("step_name"),
             "status": self._status.get(operation_id, "running")
-        }
+        })
         
         self._progress[operation_id].append(step)
         
         # Notify all subscribers
         for queue in self._subscribers.get(operation_id, []):
-            try:
-                queue.put_nowait(step)
-            except asyncio.QueueFull:
-                pass
+            queue.put_nowait(step)
         
         logger.debug(f"[ProgressTracker] {operation_id}: {step_type} - {message}")
     
@@ -107,10 +353,7 @@ class ProgressTracker:
         
         # Signal end to all subscribers
         for queue in self._subscribers.get(operation_id, []):
-            try:
-                queue.put_nowait({"type": "end", "message": "Stream ended"})
-            except asyncio.QueueFull:
-                pass
+            queue.put_nowait({"type": "end", "message": "Stream ended"})
         
         logger.debug(f"[ProgressTracker] Completed operation: {operation_id}")
     
@@ -120,15 +363,13 @@ class ProgressTracker:
         if operation_id not in self._subscribers:
             self._subscribers[operation_id] = []
         
-        queue = asyncio.Queue(maxsize=100)
+        # The queue batches against the same history list that add_step appends to
+        queue = SubscriberQueue(self._progress.setdefault(operation_id, []))
         self._subscribers[operation_id].append(queue)
         
         # Send any existing progress
         for step in self._progress.get(operation_id, []):
-            try:
-                queue.put_nowait(step)
-            except asyncio.QueueFull:
-                pass
+            queue.put_nowait(step)
         
         return queue
     
@@ -178,13 +419,29 @@ class ProgressTracker:
     # ========== Checkpoint System ==========
     
     def save_checkpoint(self, operation_id: str, checkpoint_data: dict):
-        """Save checkpoint data for resume functionality."""
+        """Save checkpoint data for resume functionality. Unchanged checkpoints are skipped."""
+        previous = self._checkpoints.get(operation_id)
+        if previous and _same_checkpoint(previous["data"], checkpoint_data):
+            return
         self._checkpoints[operation_id] = {
             "timestamp": datetime.now().isoformat(),
             "data": checkpoint_data
         }
         logger.info(f"[ProgressTracker] Saved checkpoint for {operation_id}")
     
+    def merge_checkpoint(self, operation_id: str, phase: str, delta: dict, **fields):
+        """
+        Save a checkpoint as a delta over the previous one.
+        Earlier phase data is carried forward by reference, so a small update
+        (e.g. a quota flag) does not drop findings saved by an earlier phase.
+        """
+        previous = self.get_checkpoint(operation_id) or {}
+        self.save_checkpoint(operation_id, {
+            **fields,
+            "phase": phase,
+            "data": {**previous.get("data", {}), **delta}
+        })
+    
     def get_checkpoint(self, operation_id: str) -> Optional[dict]:
         """Get checkpoint data for an operation."""
         checkpoint = self._checkpoints.get(operation_id)
@@ -249,10 +506,7 @@ class ProgressTracker:
         
         # Signal end to all subscribers
         for queue in self._subscribers.get(operation_id, []):
-            try:
-                queue.put_nowait({"type": "end", "message": "Stream ended"})
-            except asyncio.QueueFull:
-                pass
+            queue.put_nowait({"type": "end", "message": "Stream ended"})
 
 
 # Global progress tracker instance
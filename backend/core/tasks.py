@@ -0,0 +1,85 @@
+"""
+Background task registry for fire-and-forget work (audits, ownership discovery).
+Holds strong references so running tasks are not garbage-collected, and
+allows outstanding tasks to be cancelled on shutdown.
+
+Also owns the process pool used to run CPU-bound work (PDF rendering)
+off the event loop and outside the GIL.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Coroutine, Any, Optional
+import asyncio
+import multiprocessing
+from loguru import logger
+
+from config import settings
+
+_background_tasks: set[asyncio.Task] = set()
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def spawn_background(coro: Coroutine[Any, Any, Any], name: str = None) -> asyncio.Task:
+    """Schedule a coroutine as a tracked background task."""
+    task = asyncio.create_task(coro, name=name)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
+
+
+def pending_background_tasks() -> int:
+    """Number of background tasks still running."""
+    return len(_background_tasks)
+
+
+async def cancel_background_tasks(timeout: float = 5.0):
+    """Cancel all outstanding background tasks and wait for them to finish."""
+    tasks = [t for t in _background_tasks if not t.done()]
+    if not tasks:
+        return
+    logger.info(f"[cancel_background_tasks] Cancelling {len(tasks)} background task(s)")
+    for task in tasks:
+        task.cancel()
+    done, pending = await asyncio.wait(tasks, timeout=timeout)
+    if pending:
+        logger.warning(f"[cancel_background_tasks] {len(pending)} task(s) did not stop within {timeout}s")
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        logger.info(f"[run_cpu_bound] Starting process pool with {settings.PROCESS_POOL_WORKERS} worker(s)")
+        # Forking a multithreaded server can copy locks held by other threads
+        # into the workers, so they are spawned fresh instead
+        _process_pool = ProcessPoolExecutor(
+            max_workers=settings.PROCESS_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _process_pool
+
+
+async def run_cpu_bound(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    Run a CPU-bound function in the shared process pool.
+    func and args must be picklable. With PROCESS_POOL_WORKERS = 0 the call
+    runs in a worker thread instead. If a worker dies (e.g. killed for
+    memory), the broken pool is replaced and the call retried once.
+    """
+    if settings.PROCESS_POOL_WORKERS <= 0:
+        return await asyncio.to_thread(func, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_process_pool(), func, *args)
+    except BrokenProcessPool:
+        logger.warning("[run_cpu_bound] Process pool broke, restarting it and retrying")
+        shutdown_process_pool()
+    return await loop.run_in_executor(_get_process_pool(), func, *args)
+
+
+def shutdown_process_pool():
+    """Stop the shared process pool, if it was started."""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
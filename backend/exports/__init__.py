@@ -12,12 +12,12 @@ async def generate_pdf_report(*args: Any, **kwargs: Any) -> bytes:
     return await _generate_pdf_report(*args, **kwargs)
 
 
-def generate_findings_csv(*args: Any, **kwargs: Any) -> str:
+def generate_findings_csv(*args: Any, **kwargs: Any) -> bytes:
     from .csv_export import generate_findings_csv as _generate_findings_csv
     return _generate_findings_csv(*args, **kwargs)
 
 
-def generate_ajes_csv(*args: Any, **kwargs: Any) -> str:
+def generate_ajes_csv(*args: Any, **kwargs: Any) -> bytes:
     from .csv_export import generate_ajes_csv as _generate_ajes_csv
     return _generate_ajes_csv(*args, **kwargs)
 
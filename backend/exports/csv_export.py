@@ -1,32 +1,61 @@
 """
 CSV Export
 Exports audit data as CSV.
+
+Rows are produced by generators that yield UTF-8 encoded chunks of
+roughly CSV_CHUNK_CHARS, so responses and archives can stream them
+without ever holding the whole file as text and again as bytes.
 """
 import csv
 import io
+from typing import Iterable, Iterator
 
+# Flush the row buffer once it holds about this many characters
+CSV_CHUNK_CHARS = 64 * 1024
 
-def generate_findings_csv(findings: list[dict]) -> str:
-    """Generate CSV of audit findings."""
-    
+FINDINGS_HEADER = [
+    "Finding ID",
+    "Severity",
+    "Category",
+    "Issue",
+    "Details",
+    "GAAP Principle",
+    "Recommendation",
+    "Confidence"
+]
+
+AJES_HEADER = [
+    "AJE ID",
+    "Date",
+    "Account Code",
+    "Account Name",
+    "Debit",
+    "Credit",
+    "Description",
+    "Finding Reference"
+]
+
+
+def _iter_csv_chunks(header: list, rows: Iterable[list]) -> Iterator[bytes]:
+    """Write the header and rows through one csv.writer, yielding encoded chunks."""
     output = io.StringIO()
     writer = csv.writer(output)
+    writer.writerow(header)
     
-    # Header
-    writer.writerow([
-        "Finding ID",
-        "Severity",
-        "Category",
-        "Issue",
-        "Details",
-        "GAAP Principle",
-        "Recommendation",
-        "Confidence"
-    ])
+    for row in rows:
+        writer.writerow(row)
+        if output.tell() >= CSV_CHUNK_CHARS:
+            yield output.getvalue().encode()
+            output.seek(0)
+            output.truncate()
     
-    # Data rows
-    for finding in findings:
-        writer.writerow([
+    yield output.getvalue().encode()
+
+
+def iter_findings_csv(findings: list[dict]) -> Iterator[bytes]:
+    """Yield the audit findings CSV in chunks."""
+    return _iter_csv_chunks(FINDINGS_HEADER, (
+        [
             finding.get("finding_id", ""),
             finding.get("severity", ""),
             finding.get("category", ""),
@@ -35,41 +64,34 @@ def generate_findings_csv(findings: list[dict]) -> str:
             finding.get("gaap_principle", ""),
             finding.get("recommendation", ""),
             finding.get("confidence", "")
-        ])
-    
-    return output.getvalue()
+        ]
+        for finding in findings
+    ))
 
 
-def generate_ajes_csv(ajes: list[dict]) -> str:
-    """Generate CSV of Adjusting Journal Entries."""
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    # Header
-    writer.writerow([
-        "AJE ID",
-        "Date",
-        "Account Code",
-        "Account Name",
-        "Debit",
-        "Credit",
-        "Description",
-        "Finding Reference"
-    ])
-    
-    # Data rows
-    for idx, aje in enumerate(ajes, 1):
-        for entry in aje.get("entries", []):
-            writer.writerow([
-                f"AJE #{idx}",
-                aje.get("date", ""),
-                entry.get("account_code", ""),
-                entry.get("account_name", ""),
-                entry.get("debit", 0),
-                entry.get("credit", 0),
-                aje.get("description", ""),
-                aje.get("finding_reference", "")
-            ])
-    
-    return output.getvalue()
+def iter_ajes_csv(ajes: list[dict]) -> Iterator[bytes]:
+    """Yield the Adjusting Journal Entries CSV in chunks."""
+    return _iter_csv_chunks(AJES_HEADER, (
+        [
+            f"AJE #{idx}",
+            aje.get("date", ""),
+            entry.get("account_code", ""),
+            entry.get("account_name", ""),
+            entry.get("debit", 0),
+            entry.get("credit", 0),
+            aje.get("description", ""),
+            aje.get("finding_reference", "")
+        ]
+        for idx, aje in enumerate(ajes, 1)
+        for entry in aje.get("entries", [])
+    ))
+
+
+def generate_findings_csv(findings: list[dict]) -> bytes:
+    """Generate CSV of audit findings (UTF-8)."""
+    return b"".join(iter_findings_csv(findings))
+
+
+def generate_ajes_csv(ajes: list[dict]) -> bytes:
+    """Generate CSV of Adjusting Journal Entries (UTF-8)."""
+    return b"".join(iter_ajes_csv(ajes))
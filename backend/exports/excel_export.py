@@ -1,60 +1,147 @@
 """
 Excel Export Module
 Generates audit data in XLSX format.
+
+The AJE sheet has a fixed six-column layout, so the OOXML parts are
+written directly as strings and zipped, with no spreadsheet library or
+per-cell objects in between.
 """
 import io
-import pandas as pd
-from typing import List, Dict
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from typing import BinaryIO, List, Dict, Optional, Tuple
+
+AJE_HEADER = (
+    "AJE ID",
+    "Description",
+    "Debit Account",
+    "Credit Account",
+    "Amount",
+    "Justification"
+)
+
+# Static package parts for a single-sheet workbook
+CONTENT_TYPES_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="AJEs" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS_XML = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+SHEET_XML_HEAD = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+SHEET_XML_TAIL = '</sheetData></worksheet>'
+
+# Control characters XML 1.0 cannot represent, even escaped
+_ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+_TEXT_CELL = '<c t="inlineStr"><is><t xml:space="preserve">{}</t></is></c>'
+_AJE_ROW = '<row r="{}">{}{}{}{}{}{}</row>'
+
+
+def _text_cell(value) -> str:
+    """Render a cell as an inline string (empty cell for None)."""
+    if value is None:
+        return '<c/>'
+    text = str(value)
+    if _ILLEGAL_XML_CHARS.search(text):
+        text = _ILLEGAL_XML_CHARS.sub("", text)
+    return _TEXT_CELL.format(escape(text))
 
-def generate_ajes_xlsx(ajes: List[Dict]) -> io.BytesIO:
+
+def _number_cell(value) -> str:
+    """Render a cell as a number, falling back to text for non-numeric values."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f'<c><v>{value!r}</v></c>'
+    return _text_cell(value)
+
+
+def aje_account_strings(aje: Dict) -> Tuple[str, str]:
+    """Debited and credited account codes of an AJE, each joined into one cell string."""
+    entries = aje.get("entries", [])
+    debit_acc = ", ".join(e.get("account_code", "") for e in entries if (e.get("debit") or 0) > 0)
+    credit_acc = ", ".join(e.get("account_code", "") for e in entries if (e.get("credit") or 0) > 0)
+    return debit_acc, credit_acc
+
+
+def generate_ajes_xlsx(
+    ajes: List[Dict],
+    output: Optional[BinaryIO] = None,
+    account_strings: Optional[List[Tuple[str, str]]] = None
+) -> BinaryIO:
     """
     Generate an Excel file (XLSX) for Adjusting Journal Entries.
-    
+
     Args:
         ajes: List of Adjusted Journal Entry dictionaries.
-        
+        output: Seekable binary file to write into (defaults to a new BytesIO).
+        account_strings: Precomputed aje_account_strings() per AJE, if the
+            audit stored them; computed here otherwise.
+
     Returns:
-        BytesIO: A byte stream containing the Excel file.
+        The output stream, rewound to the start of the Excel file.
     """
-    if not ajes:
-        # Return empty excel with headers
-        df = pd.DataFrame(columns=[
-            "AJE ID", 
-            "Description", 
-            "Debit Account", 
-            "Credit Account", 
-            "Amount", 
-            "Justification"
-        ])
-    else:
-        rows = []
-        for idx, aje in enumerate(ajes, 1):
-            # Flatten entries for simpler excel view
-            entries = aje.get("entries", [])
-            debits = [e for e in entries if e.get("debit", 0) > 0]
-            credits = [e for e in entries if e.get("credit", 0) > 0]
-            
-            # Form multi-account strings if needed
-            debit_acc = ", ".join([d.get("account_code", "") for d in debits])
-            credit_acc = ", ".join([c.get("account_code", "") for c in credits])
-            
-            # Use total_debits as the primary amount
-            amount = aje.get("total_debits", 0)
-            
-            rows.append({
-                "AJE ID": aje.get("aje_id", f"AJE #{idx}"),
-                "Description": aje.get("description", "No description"),
-                "Debit Account": debit_acc,
-                "Credit Account": credit_acc,
-                "Amount": amount,
-                "Justification": aje.get("rationale", "") # Mapping rationale to Justification column
-            })
-        df = pd.DataFrame(rows)
-        
-    # Generate Excel
-    output = io.BytesIO()
-    with pd.ExcelWriter(output, engine='openpyxl') as writer:
-        df.to_excel(writer, index=False, sheet_name='AJEs')
-        
+    if output is None:
+        output = io.BytesIO()
+
+    if account_strings is None:
+        account_strings = [aje_account_strings(aje) for aje in ajes]
+
+    # Column types are fixed, so each row is one template fill with no per-cell type dispatch
+    rows = [_AJE_ROW.format(1, *(_text_cell(h) for h in AJE_HEADER))]
+    for idx, (aje, (debit_acc, credit_acc)) in enumerate(zip(ajes, account_strings), 1):
+        rows.append(_AJE_ROW.format(
+            idx + 1,
+            _text_cell(aje.get("aje_id", f"AJE #{idx}")),
+            _text_cell(aje.get("description", "No description")),
+            _text_cell(debit_acc),
+            _text_cell(credit_acc),
+            _number_cell(aje.get("total_debits", 0)),  # Use total_debits as the primary amount
+            _text_cell(aje.get("rationale", ""))  # Mapping rationale to Justification column
+        ))
+
+    # Level 1 compression is nearly free and still shrinks the repetitive XML well
+    with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as zf:
+        zf.writestr("[Content_Types].xml", CONTENT_TYPES_XML)
+        zf.writestr("_rels/.rels", ROOT_RELS_XML)
+        zf.writestr("xl/workbook.xml", WORKBOOK_XML)
+        zf.writestr("xl/_rels/workbook.xml.rels", WORKBOOK_RELS_XML)
+        zf.writestr("xl/worksheets/sheet1.xml", SHEET_XML_HEAD + "".join(rows) + SHEET_XML_TAIL)
+
     output.seek(0)
     return output
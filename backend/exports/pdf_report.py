@@ -3,49 +3,17 @@ PDF Report Generator
 Generates audit reports in PDF format using WeasyPrint and Tailwind CSS.
 """
 from datetime import datetime
-from weasyprint import HTML
-from io import BytesIO
+from functools import lru_cache
+from weasyprint import CSS, HTML
 import base64
 import os
+import asyncio
 from pydantic import BaseModel
 
-async def generate_pdf_report(
-    company_data: dict,
-    audit_data: dict,
-    include_findings: bool = True,
-    include_ajes: bool = True,
-    include_audit_trail: bool = False
-) -> bytes:
-    """
-    Generate a high-quality PDF audit report using WeasyPrint.
-    """
-    
-    metadata = company_data.get("metadata", {})
-    if isinstance(metadata, BaseModel):
-        metadata = metadata.model_dump()
-        
-    findings = audit_data.get("findings", [])
-    findings = [f.model_dump() if isinstance(f, BaseModel) else f for f in findings]
-    
-    ajes = audit_data.get("ajes", [])
-    ajes = [a.model_dump() if isinstance(a, BaseModel) else a for a in ajes]
-    
-    risk_score = audit_data.get("risk_score", {})
-    if isinstance(risk_score, BaseModel):
-        risk_score = risk_score.model_dump()
-    
-    # Load banner image and encode as base64
-    banner_base64 = ""
-    banner_path = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "public", "aurea_insight_banner.webp")
-    try:
-        if os.path.exists(banner_path):
-            with open(banner_path, "rb") as image_file:
-                banner_base64 = base64.b64encode(image_file.read()).decode('utf-8')
-    except Exception as e:
-        print(f"Error loading banner: {e}")
-    
-    # Brand colors and styles based on globals.css
-    brand_styles = """
+from core.tasks import run_cpu_bound
+
+# Brand colors and styles based on globals.css
+BRAND_STYLES = """
     :root {
         --background: #fafafa; /* Use light background for better PDF printing */
         --foreground: #0a0a0a;
@@ -92,7 +60,52 @@ async def generate_pdf_report(
         font-family: monospace;
         font-variant-numeric: tabular-nums;
     }
-    """
+    
+    /* Batch exports: start each report on a new page */
+    .report + .report {
+        page-break-before: always;
+    }
+"""
+
+BANNER_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "frontend", "public", "aurea_insight_banner.webp")
+
+
+@lru_cache(maxsize=1)
+def _load_banner_base64() -> str:
+    """Load the banner image once and encode it as base64 ("" if unavailable)."""
+    try:
+        if os.path.exists(BANNER_PATH):
+            with open(BANNER_PATH, "rb") as image_file:
+                return base64.b64encode(image_file.read()).decode('utf-8')
+    except Exception as e:
+        print(f"Error loading banner: {e}")
+    return ""
+
+
+def _render_report_body(
+    company_data: dict,
+    audit_data: dict,
+    include_findings: bool = True,
+    include_ajes: bool = True,
+    include_audit_trail: bool = False
+) -> str:
+    """Render the HTML body of one audit report."""
+    
+    metadata = company_data.get("metadata", {})
+    if isinstance(metadata, BaseModel):
+        metadata = metadata.model_dump()
+        
+    findings = audit_data.get("findings", [])
+    findings = [f.model_dump() if isinstance(f, BaseModel) else f for f in findings]
+    
+    ajes = audit_data.get("ajes", [])
+    ajes = [a.model_dump() if isinstance(a, BaseModel) else a for a in ajes]
+    
+    risk_score = audit_data.get("risk_score", {})
+    if isinstance(risk_score, BaseModel):
+        risk_score = risk_score.model_dump()
+    
+    banner_base64 = _load_banner_base64()
     
     # Build findings rows
     findings_html = ""
@@ -125,17 +138,8 @@ async def generate_pdf_report(
     # Construct complete HTML
     banner_html = f'<img src="data:image/webp;base64,{banner_base64}" class="w-full h-auto mb-4">' if banner_base64 else '<h2 class="text-xs uppercase tracking-[0.2em] font-bold text-cyan-500 mb-1">Aurea Insight</h2>'
     
-    html_content = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <style>
-        {brand_styles}
-    </style>
-</head>
-<body class="p-0 m-0 text-gray-900 bg-white">
+    return f"""
+    <div class="report">
     <!-- Header -->
     <div class="mb-8 p-0">
         {banner_html}
@@ -243,13 +247,71 @@ async def generate_pdf_report(
     <div class="mt-8 pt-6 border-t border-gray-100 text-center">
         <p class="text-[10px] font-bold text-gray-300 uppercase tracking-[0.5em]">Aurea Insight | Powered by Gemini 3</p>
     </div>
+    </div>
+"""
+
+
+@lru_cache(maxsize=1)
+def _brand_stylesheet() -> CSS:
+    """BRAND_STYLES parsed once per (pool worker) process instead of on every render."""
+    return CSS(string=BRAND_STYLES)
+
+
+def _write_pdf(html_content: str) -> bytes:
+    """Render an HTML document to PDF bytes (runs in the process pool)."""
+    # write_pdf returns the bytes directly when given no target
+    return HTML(string=html_content).write_pdf(stylesheets=[_brand_stylesheet()])
+
+
+async def _render_document(bodies: list[str]) -> bytes:
+    """Wrap report bodies in one HTML document and render it to PDF in a single pass."""
+    html_content = f"""
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+</head>
+<body class="p-0 m-0 text-gray-900 bg-white">
+{"".join(bodies)}
 </body>
 </html>
 """
     
-    # Render PDF
-    buffer = BytesIO()
-    # WeasyPrint handles HTML objects or strings
-    HTML(string=html_content).write_pdf(buffer)
-    
-    return buffer.getvalue()
+    # WeasyPrint layout is CPU-bound and holds the GIL, so render in another process
+    return await run_cpu_bound(_write_pdf, html_content)
+
+
+async def generate_pdf_report(
+    company_data: dict,
+    audit_data: dict,
+    include_findings: bool = True,
+    include_ajes: bool = True,
+    include_audit_trail: bool = False
+) -> bytes:
+    """
+    Generate a high-quality PDF audit report using WeasyPrint.
+    """
+    body = await asyncio.to_thread(
+        _render_report_body, company_data, audit_data, include_findings, include_ajes, include_audit_trail
+    )
+    return await _render_document([body])
+
+
+async def generate_pdf_report_batch(
+    company_data: dict,
+    audit_datas: list[dict],
+    include_findings: bool = True,
+    include_ajes: bool = True,
+    include_audit_trail: bool = False
+) -> bytes:
+    """
+    Generate one PDF containing a report per audit, each starting on a new page.
+    All reports share a single WeasyPrint render, so stylesheet parsing and
+    font loading happen once instead of once per audit.
+    """
+    bodies = await asyncio.to_thread(lambda: [
+        _render_report_body(company_data, audit_data, include_findings, include_ajes, include_audit_trail)
+        for audit_data in audit_datas
+    ])
+    return await _render_document(bodies)
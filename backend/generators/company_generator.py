@@ -12,7 +12,7 @@ from core.schemas import (
     CompanyMetadata, Industry, AccountingBasis,
     ChartOfAccounts, GeneralLedger, TrialBalance
 )
-from core.gemini_client import GeminiClient
+from core.gemini_client import get_gemini_client
 from .coa_generator import COAGenerator
 from .gl_generator import GLGenerator
 from .tb_generator import TBGenerator
@@ -40,7 +40,7 @@ class CompanyGenerator:
     
     def __init__(self):
         logger.info("[CompanyGenerator.__init__] Initializing company generator")
-        self.gemini = GeminiClient()
+        self.gemini = get_gemini_client()
         self.coa_generator = COAGenerator()
         self.gl_generator = GLGenerator()
         self.tb_generator = TBGenerator()
@@ -75,7 +75,7 @@ class CompanyGenerator:
             logger.info(f"[generate] Randomly selected accounting basis: {accounting_basis}")
         
         # Generate company ID and name
-        company_id = str(uuid.uuid4())
+        company_id = uuid.uuid4().hex
         company_name = self._generate_company_name(industry)
         logger.info(f"[generate] Generated company: id={company_id}, name={company_name}")
         
@@ -2,9 +2,13 @@
 Example Data - Pre-generated fixed data for testing.
 This data is deterministic and doesn't require AI calls.
 Loads from CSV files in the example_data folder.
+
+The CSVs ship with the repo, so rows are built with ``model_construct``
+and skip per-row Pydantic validation.
 """
 import csv
 import json
+from functools import lru_cache
 from pathlib import Path
 from loguru import logger
 
@@ -32,7 +36,7 @@ def load_general_ledger_from_csv() -> list[JournalEntry]:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                entry = JournalEntry(
+                entry = JournalEntry.model_construct(
                     entry_id=row['entry_id'],
                     date=row['date'],  # Keep as string YYYY-MM-DD
                     account_code=row['account_code'],
@@ -61,7 +65,7 @@ def load_chart_of_accounts_from_csv() -> list[Account]:
         reader = csv.DictReader(f)
         for row in reader:
             try:
-                account = Account(
+                account = Account.model_construct(
                     code=row['code'],
                     name=row['name'],
                     type=row['type'],
@@ -90,10 +94,12 @@ def load_known_issues() -> list[dict]:
     return data.get('known_issues', [])
 
 
+@lru_cache(maxsize=1)
 def get_example_company() -> dict:
     """
     Returns pre-generated example company data loaded from CSV files.
     This data is fixed and reproducible - ideal for testing and demos.
+    Built once per process; every caller shares the same (read-only) objects.
     """
     logger.info("[get_example_company] Loading example company data from files")
     
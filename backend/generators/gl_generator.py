@@ -11,7 +11,7 @@ from core.schemas import (
     GeneralLedger, JournalEntry, ChartOfAccounts, 
     Industry, AccountingBasis
 )
-from core.gemini_client import GeminiClient
+from core.gemini_client import get_gemini_client
 
 
 # Vendor names by category
@@ -39,7 +39,7 @@ class GLGenerator:
     """Generates General Ledger entries."""
     
     def __init__(self):
-        self.gemini = GeminiClient()
+        self.gemini = get_gemini_client()
     
     async def generate(
         self,
@@ -125,7 +125,7 @@ class GLGenerator:
             revenue_account = "4030"
         
         for _ in range(num):
-            entry_id = str(uuid.uuid4())[:8]
+            entry_id = uuid.uuid4().hex[:8]
             date = self._random_date(start, end)
             customer = random.choice(CUSTOMERS)
             amount = round(random.uniform(1000, 50000), 2)
@@ -217,7 +217,7 @@ class GLGenerator:
             if account_code not in account_map:
                 continue
             
-            entry_id = str(uuid.uuid4())[:8]
+            entry_id = uuid.uuid4().hex[:8]
             date = self._random_date(start, end)
             vendor = random.choice(VENDORS.get(vendor_type, ["General Vendor"]))
             amount = round(random.uniform(min_amt, max_amt), 2)
@@ -285,7 +285,7 @@ class GLGenerator:
         # Calculate months in period
         current = start
         while current <= end:
-            entry_id = str(uuid.uuid4())[:8]
+            entry_id = uuid.uuid4().hex[:8]
             payroll_date = current.replace(day=15) if current.day < 15 else current.replace(day=28)
             
             if payroll_date > end:
@@ -355,7 +355,7 @@ class GLGenerator:
             if account_code not in account_map:
                 continue
             
-            entry_id = str(uuid.uuid4())[:8]
+            entry_id = uuid.uuid4().hex[:8]
             date = self._random_date(start, end)
             amount = round(random.uniform(min_amt, max_amt), 2)
             
@@ -388,7 +388,7 @@ class GLGenerator:
     ) -> list[JournalEntry]:
         """Generate accrual adjusting entries at period end."""
         entries = []
-        entry_id = str(uuid.uuid4())[:8]
+        entry_id = uuid.uuid4().hex[:8]
         date = period_end.strftime("%Y-%m-%d")
         
         # Accrue wages
@@ -28,12 +28,14 @@ class TBGenerator:
         # Build account lookup
         account_map = {a.code: a for a in coa.accounts}
         
-        # Aggregate debits and credits by account
-        account_totals = defaultdict(lambda: {"debit": 0.0, "credit": 0.0})
+        # Aggregate debits and credits by account (flat float maps, one code lookup per entry)
+        debit_totals = defaultdict(float)
+        credit_totals = defaultdict(float)
         
         for entry in gl.entries:
-            account_totals[entry.account_code]["debit"] += entry.debit
-            account_totals[entry.account_code]["credit"] += entry.credit
+            code = entry.account_code
+            debit_totals[code] += entry.debit
+            credit_totals[code] += entry.credit
         
         # Create TB rows
         rows = []
@@ -42,11 +44,9 @@ class TBGenerator:
         
         # Iterate over ALL accounts in COA to ensure completeness
         for account in sorted(coa.accounts, key=lambda x: x.code):
-            totals = account_totals.get(account.code, {"debit": 0.0, "credit": 0.0})
-            
             beginning_balance = 0.0 # Standard for synthetic/demo unless we add seed support
-            debit = totals["debit"]
-            credit = totals["credit"]
+            debit = debit_totals.get(account.code, 0.0)
+            credit = credit_totals.get(account.code, 0.0)
             
             # Formula: Beginning Balance + Debit - Credit
             ending_balance = beginning_balance + debit - credit
@@ -65,13 +65,12 @@ class TBGenerator:
             
         # Also catch any accounts in GL that weren't in COA (orphans)
         coa_codes = {a.code for a in coa.accounts}
-        orphan_codes = set(account_totals.keys()) - coa_codes
+        orphan_codes = set(debit_totals) - coa_codes
         
-        for code in sorted(list(orphan_codes)):
-            totals = account_totals[code]
+        for code in sorted(orphan_codes):
             beginning_balance = 0.0
-            debit = totals["debit"]
-            credit = totals["credit"]
+            debit = debit_totals[code]
+            credit = credit_totals[code]
             ending_balance = beginning_balance + debit - credit
             
             rows.append(TrialBalanceRow(
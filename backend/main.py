@@ -2,14 +2,19 @@
 Aurea Insight - Main FastAPI Application
 AI-Powered Financial Audit Platform
 """
-from fastapi import FastAPI
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.utils import is_body_allowed_for_status_code
+from starlette.exceptions import HTTPException as StarletteHTTPException
 from contextlib import asynccontextmanager
 from loguru import logger
+import orjson
 import sys
 
 from config import settings
 from api.routes import company, audit, ownership, chat, export, settings as settings_router
+from core.tasks import spawn_background, cancel_background_tasks, shutdown_process_pool
 
 
 # Configure logging
@@ -24,7 +29,6 @@ logger.add(
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan events."""
-    import asyncio
     logger.info(f"Starting {settings.APP_NAME} v{settings.APP_VERSION}")
     logger.info(f"Debug mode: {settings.DEBUG}")
     
@@ -56,6 +60,13 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"Audit engine warm-up failed (non-critical): {e}")
         
+        # Build the example company so the first "Use Example" click is instant
+        try:
+            from generators.example_data import get_example_company
+            get_example_company()
+        except Exception as e:
+            logger.warning(f"Example company warm-up failed (non-critical): {e}")
+        
         # Pre-load SEC EDGAR tickers cache
         try:
             from ownership.registries.sec_edgar import SECEdgarAPI
@@ -67,13 +78,15 @@ async def lifespan(app: FastAPI):
             logger.warning(f"SEC EDGAR cache warm-up failed (non-critical): {e}")
     
     # Run warm-up in background (don't block startup)
-    asyncio.create_task(warm_up())
+    spawn_background(warm_up(), name="warm-up")
     
     # Startup
     yield
     
     # Shutdown
     logger.info("Shutting down...")
+    await cancel_background_tasks()
+    shutdown_process_pool()
 
 
 # Create FastAPI app
@@ -95,6 +108,25 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON responses (findings, trails). SSE streams are skipped by
+# the middleware and gzip themselves per burst when the client accepts it.
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+
+@app.exception_handler(StarletteHTTPException)
+async def http_exception_handler(request: Request, exc: StarletteHTTPException) -> Response:
+    """Same responses as FastAPI's default handler, serialized with orjson (structured export errors included)."""
+    headers = getattr(exc, "headers", None)
+    if not is_body_allowed_for_status_code(exc.status_code):
+        return Response(status_code=exc.status_code, headers=headers)
+    return Response(
+        content=orjson.dumps({"detail": exc.detail}),
+        status_code=exc.status_code,
+        headers=headers,
+        media_type="application/json"
+    )
+
+
 # Include routers
 app.include_router(company.router, prefix=f"{settings.API_PREFIX}/companies", tags=["Companies"])
 app.include_router(audit.router, prefix=f"{settings.API_PREFIX}/audit", tags=["Audit"])
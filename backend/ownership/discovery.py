@@ -18,7 +18,7 @@ import asyncio
 from datetime import datetime
 from loguru import logger
 
-from core.gemini_client import GeminiClient
+from core.gemini_client import get_gemini_client
 from core.schemas import OwnershipGraph, EntityNode, OwnershipEdge
 from ownership.registries import (
 
@@ -115,7 +115,7 @@ class BeneficialOwnershipDiscovery:
         self.gleif = GLEIFAPI()
         
         # Gemini for parsing only
-        self.gemini = GeminiClient()
+        self.gemini = get_gemini_client()
         
         # NetworkX graph for analysis
         self.graph = nx.DiGraph()
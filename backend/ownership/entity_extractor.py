@@ -11,7 +11,7 @@ This feeds into the ownership discovery to build a comprehensive graph.
 """
 import re
 from typing import Optional
-from collections import defaultdict
+from collections import Counter, defaultdict
 from loguru import logger
 
 from core.schemas import GeneralLedger, ChartOfAccounts, TrialBalance
@@ -257,9 +257,7 @@ def extract_entities_from_gl(
             )
     
     # Log summary
-    by_type = defaultdict(int)
-    for entity in entities.values():
-        by_type[entity.entity_type] += 1
+    by_type = Counter(entity.entity_type for entity in entities.values())
     
     logger.info(f"[extract_entities_from_gl] Extracted {len(entities)} entities: {dict(by_type)}")
     
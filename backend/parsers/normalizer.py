@@ -6,11 +6,11 @@ All AI decisions are logged in the audit trail for regulatory compliance.
 import pandas as pd
 import io
 import json
-from typing import Optional
+from typing import Optional, Union, BinaryIO
 from datetime import datetime
 from loguru import logger
 
-from core.gemini_client import GeminiClient
+from core.gemini_client import get_gemini_client
 from core.audit_trail import AuditRecord
 from core.schemas import (
     GeneralLedger, JournalEntry, ChartOfAccounts, Account, 
@@ -26,11 +26,11 @@ class DataNormalizer:
     """
     
     def __init__(self):
-        self.gemini = GeminiClient()
+        self.gemini = get_gemini_client()
     
     async def parse_file(
         self,
-        content: bytes,
+        content: Union[bytes, BinaryIO],
         filename: str,
         file_type: str,
         audit_record: Optional[AuditRecord] = None
@@ -39,7 +39,7 @@ class DataNormalizer:
         Parse uploaded file using AI-powered normalization.
         
         Args:
-            content: File content as bytes
+            content: File content as bytes, or a binary file object read in place
             filename: Original filename
             file_type: Type of file (general_ledger, trial_balance, chart_of_accounts)
             audit_record: Optional audit record for logging AI decisions
@@ -51,11 +51,12 @@ class DataNormalizer:
         
         extension = filename.lower().split(".")[-1]
         
-        # Read file into DataFrame
+        # Read file into DataFrame (file objects are parsed without buffering a copy)
+        source = io.BytesIO(content) if isinstance(content, bytes) else content
         if extension == "csv":
-            df = pd.read_csv(io.BytesIO(content))
+            df = pd.read_csv(source)
         elif extension in ["xlsx", "xls"]:
-            df = pd.read_excel(io.BytesIO(content))
+            df = pd.read_excel(source)
         else:
             raise ValueError(f"Unsupported file format: {extension}")
         
@@ -184,6 +185,10 @@ RETURN JSON ONLY:
         
         # Parse entries using AI-detected mapping
         entries = []
+        # GL dates repeat heavily, so each distinct value is only parsed once
+        normalized_dates = {}
+        # Account codes/names repeat on every line; entries share one string per distinct value
+        shared_strings = {}
         for row_num, (idx, row) in enumerate(df.iterrows()):
             try:
                 # Get values using detected mapping
@@ -197,13 +202,18 @@ RETURN JSON ONLY:
                 vendor = self._safe_get(row, column_mapping.get("vendor_or_customer"), None)
                 
                 # Normalize date
-                date_str = self._normalize_date(date_val, parsed.get("date_format"))
+                date_str = normalized_dates.get(date_val)
+                if date_str is None:
+                    date_str = self._normalize_date(date_val, parsed.get("date_format"))
+                    normalized_dates[date_val] = date_str
                 
+                account_code = str(account_code)
+                account_name = str(account_name)
                 entry = JournalEntry(
                     entry_id=str(entry_id),
                     date=date_str,
-                    account_code=str(account_code),
-                    account_name=str(account_name),
+                    account_code=shared_strings.setdefault(account_code, account_code),
+                    account_name=shared_strings.setdefault(account_name, account_name),
                     debit=debit,
                     credit=credit,
                     description=str(description),
@@ -520,12 +530,15 @@ RETURN JSON:
         column_mapping = await self._heuristic_detect_columns(df, "general_ledger")
         
         entries = []
+        shared_strings = {}
         for row_num, (idx, row) in enumerate(df.iterrows()):
+            account_code = str(self._safe_get(row, column_mapping.get("account_code"), ""))
+            account_name = str(self._safe_get(row, column_mapping.get("account_name"), ""))
             entry = JournalEntry(
                 entry_id=str(self._safe_get(row, column_mapping.get("entry_id"), f"GL-{row_num:04d}")),
                 date=str(self._safe_get(row, column_mapping.get("date"), "")),
-                account_code=str(self._safe_get(row, column_mapping.get("account_code"), "")),
-                account_name=str(self._safe_get(row, column_mapping.get("account_name"), "")),
+                account_code=shared_strings.setdefault(account_code, account_code),
+                account_name=shared_strings.setdefault(account_name, account_name),
                 debit=self._parse_amount(row, column_mapping.get("debit"), {}),
                 credit=self._parse_amount(row, column_mapping.get("credit"), {}),
                 description=str(self._safe_get(row, column_mapping.get("description"), "")),
@@ -4,9 +4,13 @@ import asyncio
 import uuid
 import random
 from typing import Generator
+import os
 import sys
 from pathlib import Path
 
+# Keep the app's company store in memory rather than in ./.cache
+os.environ.setdefault("COMPANY_STORE_PATH", ":memory:")
+
 # Add backend to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
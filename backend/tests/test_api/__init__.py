@@ -0,0 +1 @@
+"""API route tests."""
@@ -0,0 +1,303 @@
+"""
+Tests for Audit API route helpers.
+"""
+import pytest
+import sys
+import zlib
+from collections import deque
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException, Request
+
+from api.routes import audit as audit_routes
+from core.audit_trail import AuditRecord, AuditTrail
+
+
+def _make_request(accept_encoding: str = "") -> Request:
+    """Minimal HTTP request carrying an Accept-Encoding header."""
+    return Request({"type": "http", "headers": [(b"accept-encoding", accept_encoding.encode())]})
+
+
+@pytest.fixture
+def audit_store(monkeypatch):
+    """Isolated audit result storage."""
+    monkeypatch.setattr(audit_routes, "audit_results", {})
+    monkeypatch.setattr(audit_routes, "company_to_audits", {})
+    return audit_routes
+
+
+class TestResolveAudit:
+    """Test audit lookup by ID and by company."""
+    
+    def test_resolve_by_audit_id(self, audit_store):
+        """Test explicit audit_id lookup."""
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001"}
+        
+        audit_id, result = audit_store.resolve_audit("COMP-001", "AUD-001")
+        
+        assert audit_id == "AUD-001"
+        assert result["company_id"] == "COMP-001"
+    
+    def test_resolve_most_recent_for_company(self, audit_store):
+        """Test that the most recently completed audit is returned."""
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001"}
+        audit_store.audit_results["AUD-002"] = {"company_id": "COMP-001"}
+        audit_store.audit_results["AUD-003"] = {"company_id": "COMP-002"}
+        audit_store.company_to_audits["COMP-001"] = deque(["AUD-001", "AUD-002"])
+        audit_store.company_to_audits["COMP-002"] = deque(["AUD-003"])
+        
+        audit_id, _ = audit_store.resolve_audit("COMP-001")
+        
+        assert audit_id == "AUD-002"
+    
+    def test_unknown_audit_id_raises_404(self, audit_store):
+        """Test missing audit_id returns 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            audit_store.resolve_audit("COMP-001", "missing")
+        
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == "Audit not found"
+    
+    def test_company_without_audits_raises_404(self, audit_store):
+        """Test company with no audits returns 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            audit_store.resolve_audit("COMP-404")
+        
+        assert exc_info.value.status_code == 404
+        assert exc_info.value.detail == "No audit found for this company"
+
+
+class TestGetFindings:
+    """Test the findings endpoint."""
+    
+    async def test_uses_precomputed_counts(self, audit_store):
+        """Test that severity/category counts come from the stored result."""
+        finding = {
+            "finding_id": "F-001",
+            "category": "fraud",
+            "severity": "high",
+            "issue": "Duplicate payment",
+            "details": "Paid twice",
+            "recommendation": "Recover funds"
+        }
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001",
+            "findings": [finding],
+            "by_severity": {"high": 1},
+            "by_category": {"fraud": 1}
+        }
+        audit_store.company_to_audits["COMP-001"] = deque(["AUD-001"])
+        
+        response = await audit_store.get_findings("COMP-001")
+        
+        assert response.audit_id == "AUD-001"
+        assert response.total_count == 1
+        assert response.by_severity == {"high": 1}
+        assert response.by_category == {"fraud": 1}
+
+
+class TestStreamAuditProgress:
+    """Test the audit SSE stream."""
+    
+    async def test_burst_is_coalesced_and_stream_ends(self):
+        """Test queued steps go out in one chunk and end closes the stream."""
+        tracker = audit_routes.progress_tracker
+        operation_id = "AUD-SSE-001"
+        tracker.start_operation(operation_id, "audit")
+        tracker.add_step(operation_id, "info", "Step 1")
+        
+        try:
+            response = await audit_routes.stream_audit_progress("COMP-001", operation_id, _make_request())
+            body = response.body_iterator
+            
+            first_chunk = await body.__anext__()
+            assert first_chunk.count(b"data: ") == 2  # started + Step 1
+            
+            tracker.complete_operation(operation_id, {"status": "completed"})
+            rest = b"".join([chunk async for chunk in body])
+            
+            assert b'"type":"completed"' in rest
+            assert rest.endswith(b'{"type":"end","message":"Audit complete"}\n\n')
+        finally:
+            tracker.cleanup(operation_id)
+    
+    async def test_gzip_chunks_decode_immediately(self):
+        """Test gzip-encoded streams flush each burst so it decodes on arrival."""
+        tracker = audit_routes.progress_tracker
+        operation_id = "AUD-SSE-002"
+        tracker.start_operation(operation_id, "audit")
+        
+        try:
+            response = await audit_routes.stream_audit_progress("COMP-001", operation_id, _make_request("gzip, br"))
+            assert response.headers["content-encoding"] == "gzip"
+            body = response.body_iterator
+            decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+            
+            first = decoder.decompress(await body.__anext__())
+            assert first.startswith(b"data: ") and first.endswith(b"\n\n")
+            
+            tracker.complete_operation(operation_id, {"status": "completed"})
+            rest = decoder.decompress(b"".join([chunk async for chunk in body]))
+            assert rest.endswith(b'{"type":"end","message":"Audit complete"}\n\n')
+            assert decoder.eof
+        finally:
+            tracker.cleanup(operation_id)
+
+
+class TestFindingReasoning:
+    """Test the per-finding reasoning lookups."""
+    
+    def _make_record(self):
+        record = AuditRecord(audit_id="AUD-001", company_id="COMP-001")
+        record.add_gemini_interaction({
+            "purpose": "finding_explanation",
+            "prompt_preview": "Explain this audit finding:\nIssue: Duplicate payment\nDetails: Paid twice",
+            "response_preview": "Duplicate payments inflate expenses.",
+            "model": "gemini"
+        })
+        record.add_gemini_interaction({
+            "purpose": "aje_generation",
+            "prompt_preview": "Issue: Duplicate payment",
+            "model": "gemini"
+        })
+        record.add_reasoning_step("Found issues", {"findings_summary": [{"id": "F-001"}]})
+        record.add_reasoning_step("Unrelated", {"findings_summary": ["Something else"]})
+        return record
+    
+    def test_build_finding_indexes(self):
+        """Test indexes map findings to their interactions and steps."""
+        findings = [
+            {"finding_id": "F-001", "issue": "Duplicate payment"},
+            {"finding_id": "F-002", "issue": "Weekend posting"},
+        ]
+        
+        indexes = audit_routes._build_finding_indexes(findings, self._make_record())
+        
+        assert set(indexes["findings_by_id"]) == {"F-001", "F-002"}
+        assert len(indexes["interactions_by_finding"]["F-001"]) == 1
+        assert indexes["interactions_by_finding"]["F-001"][0]["purpose"] == "finding_explanation"
+        assert "F-002" not in indexes["interactions_by_finding"]
+        assert [s["step"] for s in indexes["reasoning_steps_by_finding"]["F-001"]] == ["Found issues"]
+    
+    async def test_get_finding_reasoning(self, audit_store):
+        """Test the endpoint reads from the precomputed indexes."""
+        findings = [{"finding_id": "F-001", "issue": "Duplicate payment", "recommendation": "Recover"}]
+        record = self._make_record()
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001",
+            "findings": findings,
+            **audit_store._build_finding_indexes(findings, record)
+        }
+        
+        response = await audit_store.get_finding_reasoning("COMP-001", "F-001", audit_id="AUD-001")
+        
+        assert response["finding"] is findings[0]
+        assert len(response["related_ai_interactions"]) == 1
+        assert len(response["related_reasoning_steps"]) == 1
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await audit_store.get_finding_reasoning("COMP-001", "F-404", audit_id="AUD-001")
+        assert exc_info.value.status_code == 404
+
+
+class TestAuditTrailRetention:
+    """Test the trail column is retained independently of results."""
+    
+    async def test_trail_retained_separately(self, audit_store, monkeypatch):
+        """Test the trail endpoint reads the separately retained record."""
+        trail = AuditTrail(max_records=1)
+        monkeypatch.setattr(audit_routes, "audit_trail", trail)
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": []}
+        record = trail.create_record("AUD-001", "COMP-001")
+        
+        response = await audit_store.get_audit_trail("COMP-001", audit_id="AUD-001")
+        assert response["audit_trail"]["audit_id"] == record.audit_id
+        
+        # Evicting the trail leaves results readable but the trail gone
+        trail.create_record("AUD-002", "COMP-001")
+        with pytest.raises(HTTPException) as exc_info:
+            await audit_store.get_audit_trail("COMP-001", audit_id="AUD-001")
+        assert exc_info.value.status_code == 404
+    
+    async def test_trail_dropped_with_result(self, audit_store, monkeypatch):
+        """Test evicting an audit result also evicts its trail."""
+        from core.cache import LRUCache
+        trail = AuditTrail()
+        monkeypatch.setattr(audit_routes, "audit_trail", trail)
+        monkeypatch.setattr(
+            audit_routes, "audit_results", LRUCache(maxsize=1, on_evict=audit_routes._on_audit_evicted)
+        )
+        trail.create_record("AUD-001", "COMP-001")
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": []}
+        
+        trail.create_record("AUD-002", "COMP-001")
+        audit_store.audit_results["AUD-002"] = {"company_id": "COMP-001", "findings": []}
+        
+        assert trail.get_record("AUD-001") is None
+        assert trail.get_record("AUD-002") is not None
+
+
+
+class TestNullAmountAje:
+    """Test a Gemini AJE with null amounts survives audit completion and export."""
+    
+    async def test_audit_completes_and_exports(self, audit_store, monkeypatch):
+        """Test the audit result is stored and the AJE workbook renders."""
+        import io
+        from types import SimpleNamespace
+        from openpyxl import load_workbook
+        from api.routes import export as export_routes
+        from audit.aje_generator import AJEGenerator
+        from core.progress import ProgressTracker
+        
+        aje = AJEGenerator()._aje_from_response(
+            {"finding_id": "F-001"},
+            {"entries": [
+                {"account_code": "6000", "debit": 500.0, "credit": None},
+                {"account_code": "2100", "debit": None, "credit": 500.0}
+            ]},
+            "US GAAP"
+        )
+        
+        async def run_full_audit(**kwargs):
+            return {"findings": [], "ajes": [aje], "risk_score": {"risk_level": "low"}}
+        
+        monkeypatch.setattr(audit_routes, "get_audit_engine", lambda: SimpleNamespace(run_full_audit=run_full_audit))
+        monkeypatch.setattr(audit_routes, "audit_trail", AuditTrail())
+        monkeypatch.setattr(audit_routes, "progress_tracker", ProgressTracker())
+        audit_routes.progress_tracker.start_operation("AUD-NULL", "audit")
+        
+        await audit_routes._run_audit_task("COMP-001", {}, "AUD-NULL")
+        
+        assert audit_store.audit_results["AUD-NULL"]["ajes"][0]["entries"][0]["credit"] == 0
+        response = await export_routes.export_ajes_xlsx("COMP-001", "AUD-NULL")
+        row = list(load_workbook(io.BytesIO(response.body))["AJEs"].values)[1]
+        assert row[2:4] == ("6000", "2100")
+
+
+class TestGeminiCallHistory:
+    """Test Gemini call steps kept for replay stay small."""
+    
+    async def test_prompt_previewed_in_history(self, audit_store, monkeypatch):
+        """Test the replay history holds a preview of a long prompt, not the full text."""
+        from types import SimpleNamespace
+        from core.progress import ProgressTracker, SSE_PREVIEW_CHARS
+        
+        prompt = "p" * (SSE_PREVIEW_CHARS * 20)
+        
+        async def run_full_audit(gemini_callback=None, **kwargs):
+            gemini_callback("aje_generation", prompt, '{"entries": []}')
+            return {"findings": [], "ajes": [], "risk_score": {"risk_level": "low"}}
+        
+        monkeypatch.setattr(audit_routes, "get_audit_engine", lambda: SimpleNamespace(run_full_audit=run_full_audit))
+        monkeypatch.setattr(audit_routes, "audit_trail", AuditTrail())
+        monkeypatch.setattr(audit_routes, "progress_tracker", ProgressTracker())
+        audit_routes.progress_tracker.start_operation("AUD-GEM", "audit")
+        
+        await audit_routes._run_audit_task("COMP-001", {}, "AUD-GEM")
+        
+        step = next(s for s in audit_routes.progress_tracker.get_progress("AUD-GEM") if s["type"] == "gemini_call")
+        assert step["data"]["prompt"] == "p" * SSE_PREVIEW_CHARS + "..."
+        assert step["data"]["response"] == '{"entries": []}'
+        assert step["data"]["purpose"] == "aje_generation"
@@ -0,0 +1,66 @@
+"""
+Tests for Chat API routes.
+"""
+import pytest
+import sys
+from collections import deque
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from api.routes import chat as chat_routes
+from core.cache import LRUCache
+from core.schemas import ChatRequest
+
+
+class FakeAssistant:
+    """Assistant stub that records the history it receives."""
+    
+    def __init__(self):
+        self.seen_history = []
+    
+    async def respond(self, message: str, context: dict, history: list[dict]) -> dict:
+        self.seen_history.append(history)
+        return {"message": f"echo: {message}", "citations": [], "confidence": 0.9}
+
+
+@pytest.fixture
+def fake_assistant(monkeypatch):
+    """Isolated chat sessions with a stubbed assistant."""
+    assistant = FakeAssistant()
+    monkeypatch.setattr(chat_routes, "get_assistant", lambda: assistant)
+    monkeypatch.setattr(chat_routes, "chat_sessions", LRUCache(maxsize=10, ttl=60))
+    return assistant
+
+
+class TestChatHistory:
+    """Test chat session history handling."""
+    
+    async def test_history_is_bounded(self, fake_assistant):
+        """Test session history keeps only the most recent messages."""
+        for i in range(chat_routes.CHAT_HISTORY_MAX_MESSAGES):
+            await chat_routes.chat(ChatRequest(message=f"q{i}", company_id="COMP-001"))
+        
+        history = chat_routes.chat_sessions["COMP-001_none"]
+        
+        assert isinstance(history, deque)
+        assert len(history) == chat_routes.CHAT_HISTORY_MAX_MESSAGES
+        assert history[-1] == {"role": "assistant", "content": f"echo: q{chat_routes.CHAT_HISTORY_MAX_MESSAGES - 1}"}
+    
+    async def test_assistant_receives_prior_messages(self, fake_assistant):
+        """Test the assistant is given the history as a list."""
+        await chat_routes.chat(ChatRequest(message="first"))
+        await chat_routes.chat(ChatRequest(message="second"))
+        
+        assert fake_assistant.seen_history[0] == []
+        assert fake_assistant.seen_history[1] == [
+            {"role": "user", "content": "first"},
+            {"role": "assistant", "content": "echo: first"},
+        ]
+    
+    async def test_clear_session(self, fake_assistant):
+        """Test clearing a session removes its history."""
+        await chat_routes.chat(ChatRequest(message="hello", company_id="COMP-001"))
+        
+        await chat_routes.clear_session("COMP-001")
+        
+        assert "COMP-001_none" not in chat_routes.chat_sessions
@@ -0,0 +1,333 @@
+"""
+Tests for Company API routes.
+"""
+import pytest
+import asyncio
+import json
+import sys
+import io
+import os
+import shutil
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import UploadFile
+
+from config import settings
+from core import gemini_client
+from core.company_store import CompanyStore
+from core.schemas import Industry, AccountingBasis
+from api.routes import company as company_routes
+
+
+@pytest.fixture(autouse=True)
+def scenario_cache_dir(tmp_path, monkeypatch):
+    """Keep the on-disk scenario cache out of the working tree."""
+    cache_dir = tmp_path / "scenario_cache"
+    monkeypatch.setattr(settings, "SCENARIO_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+
+@pytest.fixture
+def company_store(monkeypatch):
+    """Isolated company storage."""
+    monkeypatch.setattr(company_routes, "companies", CompanyStore())
+    return company_routes.companies
+
+
+class TestLoadScenario:
+    """Test loading bundled demo scenarios."""
+    
+    @pytest.mark.parametrize("scenario_id", ["acme_saas", "startup_growth", "fraud_indicators", "clean_retail"])
+    async def test_scenario_loads(self, company_store, scenario_id):
+        """Test every bundled scenario parses into GL, COA and TB."""
+        metadata = await company_routes.load_scenario(scenario_id)
+        company = company_store[metadata.id]
+        
+        assert company["gl"].entries
+        assert company["coa"].accounts
+        assert company["tb"].rows
+        dates = [e.date for e in company["gl"].entries]
+        assert company["gl"].period_start == min(dates)
+        assert company["gl"].period_end == max(dates)
+        assert company["tb"].period_end == company["gl"].period_end
+    
+    async def test_unknown_scenario(self, company_store):
+        """Test an unknown scenario ID is a 404."""
+        from fastapi import HTTPException
+        with pytest.raises(HTTPException) as exc:
+            await company_routes.load_scenario("no_such_scenario")
+        assert exc.value.status_code == 404
+    
+    async def test_values_parsed(self, company_store):
+        """Test amounts are floats and blank cells become zero."""
+        metadata = await company_routes.load_scenario("clean_retail")
+        company = company_store[metadata.id]
+        
+        entry = company["gl"].entries[0]
+        assert isinstance(entry.debit, float) and isinstance(entry.credit, float)
+        assert entry.debit == 0.0 or entry.credit == 0.0
+        
+        tb = company["tb"]
+        assert tb.total_debits == round(sum(r.debit for r in tb.rows), 2)
+        for row in tb.rows:
+            assert row.ending_balance == pytest.approx(row.beginning_balance + row.debit - row.credit)
+
+
+class TestLoadExampleCompany:
+    """Test the bundled example company."""
+    
+    async def test_example_shared_after_eviction(self, company_store):
+        """Test reloading the example reuses the already-built company."""
+        from generators.example_data import EXAMPLE_COMPANY_ID
+        await company_routes.load_example_company()
+        first = company_store.pop(EXAMPLE_COMPANY_ID)
+        
+        await company_routes.load_example_company()
+        
+        assert company_store[EXAMPLE_COMPANY_ID]["gl"] is first["gl"]
+
+
+class TestGetTrialBalance:
+    """Test serving and deriving the Trial Balance."""
+    
+    async def test_derived_tb_stored(self, company_store):
+        """Test a TB derived from the GL is saved so later requests reuse it."""
+        metadata = await company_routes.load_scenario("clean_retail")
+        company_store[metadata.id]["tb"] = None
+        
+        response = await company_routes.get_trial_balance(metadata.id, company_store[metadata.id])
+        tb = company_store[metadata.id]["tb"]
+        
+        assert tb is not None
+        assert json.loads(response.body)["total_debits"] == tb.total_debits
+        await company_routes.get_trial_balance(metadata.id, company_store[metadata.id])
+        assert company_store[metadata.id]["tb"] is tb
+    
+    @pytest.mark.parametrize("path", ["", "/coa", "/gl", "/tb", "/upload-audit"])
+    def test_unknown_company(self, company_store, path):
+        """Test every company endpoint 404s through the shared dependency."""
+        from fastapi.testclient import TestClient
+        from main import app
+        
+        response = TestClient(app).get(f"/api/companies/missing{path}")
+        
+        assert response.status_code == 404
+        assert response.json()["detail"] == "Company not found"
+
+
+class TestRenderedResponses:
+    """Test large GET payloads are rendered once per stored model."""
+    
+    async def test_gl_rendered_once(self, company_store, monkeypatch):
+        """Test repeat GETs reuse the rendered body until the model is replaced."""
+        monkeypatch.setattr(company_routes, "_rendered_responses", {})
+        metadata = await company_routes.load_scenario("clean_retail")
+        company = company_store[metadata.id]
+        
+        first = await company_routes.get_general_ledger(metadata.id, company)
+        second = await company_routes.get_general_ledger(metadata.id, company)
+        
+        assert first.body is second.body
+        assert json.loads(first.body) == json.loads(company["gl"].model_dump_json())
+        
+        company["gl"] = company["gl"].model_copy(update={"period_end": "2099-12-31"})
+        third = await company_routes.get_general_ledger(metadata.id, company)
+        assert json.loads(third.body)["period_end"] == "2099-12-31"
+
+
+class TestScenarioCache:
+    """Test parsed scenarios are reused until files change."""
+    
+    @pytest.fixture
+    def scenarios_dir(self, tmp_path, monkeypatch):
+        """Copy of the bundled example data with empty caches."""
+        example_dir = tmp_path / "example_data"
+        shutil.copytree(company_routes.SCENARIOS_DIR.parent, example_dir)
+        monkeypatch.setattr(company_routes, "SCENARIOS_DIR", example_dir / "scenarios")
+        monkeypatch.setattr(company_routes, "SCENARIOS_INDEX_PATH", example_dir / "scenarios" / "index.json")
+        monkeypatch.setattr(company_routes, "_scenarios_index_cache", None)
+        monkeypatch.setattr(company_routes, "_scenario_cache", {})
+        return example_dir / "scenarios"
+    
+    async def test_repeat_load_shares_rows(self, company_store, scenarios_dir):
+        """Test a second load reuses parsed rows under a new company ID."""
+        first = await company_routes.load_scenario("clean_retail")
+        second = await company_routes.load_scenario("clean_retail")
+        
+        first_gl = company_store[first.id]["gl"]
+        second_gl = company_store[second.id]["gl"]
+        assert first.id != second.id
+        assert second_gl.company_id == second.id
+        assert company_store[second.id]["tb"].company_id == second.id
+        assert second_gl.entries is first_gl.entries
+    
+    async def test_modified_file_reparsed(self, company_store, scenarios_dir):
+        """Test a changed file on disk invalidates the cached scenario."""
+        first = await company_routes.load_scenario("clean_retail")
+        gl_path = scenarios_dir / "clean_retail_gl.csv"
+        stat = gl_path.stat()
+        os.utime(gl_path, (stat.st_atime, stat.st_mtime + 10))
+        
+        second = await company_routes.load_scenario("clean_retail")
+        
+        assert company_store[second.id]["gl"].entries is not company_store[first.id]["gl"].entries
+    
+    async def test_restart_loads_from_disk_cache(self, company_store, scenarios_dir, scenario_cache_dir, monkeypatch):
+        """Test a fresh process reuses the pickled scenario instead of parsing CSVs."""
+        first = await company_routes.load_scenario("clean_retail")
+        assert (scenario_cache_dir / "clean_retail.pickle").exists()
+        
+        monkeypatch.setattr(company_routes, "_scenario_cache", {})
+        monkeypatch.setattr(company_routes, "_parse_scenario_files", lambda scenario: pytest.fail("CSV reparsed"))
+        second = await company_routes.load_scenario("clean_retail")
+        
+        assert len(company_store[second.id]["gl"].entries) == len(company_store[first.id]["gl"].entries)
+        assert company_store[second.id]["tb"].total_debits == company_store[first.id]["tb"].total_debits
+    
+    async def test_stale_disk_cache_ignored(self, company_store, scenarios_dir, monkeypatch):
+        """Test the pickled scenario is not used once a source file changes."""
+        await company_routes.load_scenario("clean_retail")
+        monkeypatch.setattr(company_routes, "_scenario_cache", {})
+        gl_path = scenarios_dir / "clean_retail_gl.csv"
+        stat = gl_path.stat()
+        os.utime(gl_path, (stat.st_atime, stat.st_mtime + 10))
+        parsed = []
+        original = company_routes._parse_scenario_files
+        monkeypatch.setattr(company_routes, "_parse_scenario_files", lambda scenario: parsed.append(1) or original(scenario))
+        
+        await company_routes.load_scenario("clean_retail")
+        
+        assert parsed == [1]
+    
+    async def test_parsed_off_event_loop(self, company_store, scenarios_dir, monkeypatch):
+        """Test CSV parsing runs in a worker thread, not on the event loop."""
+        import threading
+        threads = []
+        original = company_routes._parse_scenario_files
+        monkeypatch.setattr(
+            company_routes, "_parse_scenario_files",
+            lambda scenario: threads.append(threading.current_thread()) or original(scenario)
+        )
+        
+        await company_routes.load_scenario("clean_retail")
+        
+        assert threads and threads[0] is not threading.main_thread()
+    
+    async def test_index_cached(self, scenarios_dir):
+        """Test the scenario index is parsed once while unchanged."""
+        assert await company_routes.list_scenarios() is await company_routes.list_scenarios()
+
+
+class TestUploadCompany:
+    """Test uploads are parsed from the spooled file in place."""
+    
+    async def test_upload_parses_file_object(self, company_store, monkeypatch):
+        """Test the GL upload is parsed without AI via the heuristic fallback."""
+        monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+        monkeypatch.setattr(gemini_client, "_shared_client", None)
+        gl_bytes = (company_routes.SCENARIOS_DIR.parent / "general_ledger.csv").read_bytes()
+        gl_file = UploadFile(file=io.BytesIO(gl_bytes), filename="gl.csv")
+        
+        metadata = await company_routes.upload_company(
+            company_name="Upload Co",
+            industry=Industry.SAAS,
+            accounting_basis=AccountingBasis.ACCRUAL,
+            reporting_period="FY2024",
+            gl_file=gl_file,
+            tb_file=None,
+            coa_file=None
+        )
+        
+        gl = company_store[metadata.id]["gl"]
+        assert len(gl.entries) == gl_bytes.count(b"\n") - 1
+
+    
+    async def test_files_parsed_concurrently(self, company_store, monkeypatch):
+        """Test GL, TB and COA parses overlap instead of running back to back."""
+        from parsers.normalizer import DataNormalizer
+        started = []
+        release = asyncio.Event()
+        
+        async def fake_parse(self, content, filename, file_type, audit_record=None):
+            started.append(file_type)
+            if len(started) == 3:
+                release.set()
+            await asyncio.wait_for(release.wait(), timeout=1)
+            return None
+        
+        monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+        monkeypatch.setattr(gemini_client, "_shared_client", None)
+        monkeypatch.setattr(DataNormalizer, "parse_file", fake_parse)
+        
+        await company_routes.upload_company(
+            company_name="Upload Co",
+            industry=Industry.SAAS,
+            accounting_basis=AccountingBasis.ACCRUAL,
+            reporting_period="FY2024",
+            gl_file=UploadFile(file=io.BytesIO(b"a\n1\n"), filename="gl.csv"),
+            tb_file=UploadFile(file=io.BytesIO(b"a\n1\n"), filename="tb.csv"),
+            coa_file=UploadFile(file=io.BytesIO(b"a\n1\n"), filename="coa.csv")
+        )
+        
+        assert sorted(started) == ["chart_of_accounts", "general_ledger", "trial_balance"]
+    
+    async def test_upload_audit_persisted_with_company(self, company_store, monkeypatch):
+        """Test the finalized upload trail is stored with the company, not only the trail cache."""
+        from core.audit_trail import audit_trail
+        monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+        monkeypatch.setattr(gemini_client, "_shared_client", None)
+        gl_bytes = (company_routes.SCENARIOS_DIR.parent / "general_ledger.csv").read_bytes()
+        
+        metadata = await company_routes.upload_company(
+            company_name="Upload Co",
+            industry=Industry.SAAS,
+            accounting_basis=AccountingBasis.ACCRUAL,
+            reporting_period="FY2024",
+            gl_file=UploadFile(file=io.BytesIO(gl_bytes), filename="gl.csv"),
+            tb_file=None,
+            coa_file=None
+        )
+        
+        # Upload records never occupy the shared in-memory trail
+        assert f"upload-{metadata.id}" not in audit_trail.records
+        company = await company_routes.companies.load(metadata.id)
+        
+        assert company["upload_audit_id"] == f"upload-{metadata.id}"
+        trail = await company_routes.get_upload_audit(company)
+        assert trail["audit_id"] == f"upload-{metadata.id}"
+        assert trail["reasoning_chain"]
+        assert trail["record_integrity_hash"]
+
+
+class TestUploadCompanySmart:
+    """Test the AI-normalized upload."""
+    
+    async def test_prompt_gets_preview_only(self, company_store, monkeypatch):
+        """Test a large upload contributes only its leading bytes to the prompt."""
+        monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+        monkeypatch.setattr(gemini_client, "_shared_client", None)
+        prompts = []
+        schemas = []
+        
+        async def fake_generate_json(prompt, purpose=None, context=None, response_schema=None):
+            prompts.append(prompt)
+            schemas.append(response_schema)
+            return {"error": None, "parsed": {"entries": [{
+                "entry_id": "JE-1", "date": "2024-01-05", "account_code": "1000",
+                "account_name": "Cash", "description": "Deposit", "debit": 10.0, "credit": 0.0
+            }]}}
+        monkeypatch.setattr(gemini_client.get_gemini_client(), "generate_json", fake_generate_json)
+        body = b"date,account,amount\n" + b"2024-01-05,1000,10.00\n" * 100_000
+        
+        metadata = await company_routes.upload_company_smart(
+            company_name="Smart Co",
+            gl_file=UploadFile(file=io.BytesIO(body), filename="gl.csv", size=len(body)),
+            tb_file=None,
+            coa_file=None
+        )
+        
+        assert len(prompts[0]) < company_routes.UPLOAD_PREVIEW_GL_CHARS + 5000
+        assert schemas[0] is company_routes.SMART_UPLOAD_RESPONSE_SCHEMA
+        assert len(company_store[metadata.id]["gl"].entries) == 1
+
@@ -0,0 +1,346 @@
+"""
+Tests for Export API routes.
+"""
+import pytest
+import sys
+from collections import deque
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException
+
+from api.routes import audit as audit_routes
+from api.routes import export as export_routes
+from core.company_store import CompanyStore
+from core.schemas import CompanyMetadata, Industry, AccountingBasis
+
+
+def _company_store() -> CompanyStore:
+    """In-memory company store holding COMP-001."""
+    store = CompanyStore()
+    store["COMP-001"] = {"metadata": CompanyMetadata(
+        id="COMP-001", name="Test Co", industry=Industry.SAAS,
+        accounting_basis=AccountingBasis.ACCRUAL, reporting_period="FY2024"
+    )}
+    return store
+
+
+@pytest.fixture
+def audit_store(monkeypatch):
+    """Isolated audit result storage."""
+    monkeypatch.setattr(audit_routes, "audit_results", {})
+    monkeypatch.setattr(audit_routes, "company_to_audits", {})
+    return audit_routes
+
+
+class TestExportAuditLookup:
+    """Test exports resolve audits through the company index."""
+    
+    async def test_latest_audit_exported(self, audit_store):
+        """Test the most recent audit for the company is exported."""
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        audit_store.audit_results["AUD-002"] = {
+            "company_id": "COMP-001",
+            "findings": [{"finding_id": "F-002", "issue": "Latest"}],
+            "ajes": []
+        }
+        audit_store.company_to_audits["COMP-001"] = deque(["AUD-001", "AUD-002"])
+        
+        response = await export_routes.export_findings_csv("COMP-001")
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        
+        assert b"F-002" in body
+    
+    async def test_missing_audit_raises_404(self, audit_store):
+        """Test exports for a company without audits return 404."""
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_ajes_csv("COMP-404")
+        
+        assert exc_info.value.detail == "No audit found for this company"
+
+
+class TestExportStreaming:
+    """Test exports stream their payload in chunks."""
+    
+    async def test_findings_csv_streamed_in_chunks(self, audit_store, monkeypatch):
+        """Test a large findings CSV arrives as several chunks with every row intact."""
+        from exports import csv_export
+        monkeypatch.setattr(csv_export, "CSV_CHUNK_CHARS", 1024)
+        findings = [{"finding_id": f"F-{i:04d}", "issue": "x" * 50} for i in range(200)]
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": findings, "ajes": []}
+        
+        response = await export_routes.export_findings_csv("COMP-001", "AUD-001")
+        chunks = [chunk async for chunk in response.body_iterator]
+        body = b"".join(chunks)
+        
+        assert len(chunks) > 1
+        assert body == csv_export.generate_findings_csv(findings)
+        assert body.count(b"\n") == 201
+    
+    async def test_ajes_xlsx_streamed_from_spool(self, audit_store, monkeypatch):
+        """Test an XLSX export too large to keep in memory streams a complete workbook."""
+        from openpyxl import load_workbook
+        import io
+        monkeypatch.setattr(export_routes, "XLSX_SPOOL_MAX_BYTES", 16)
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001",
+            "findings": [],
+            "ajes": [{"aje_id": "AJE-001", "entries": [], "total_debits": 10}]
+        }
+        
+        response = await export_routes.export_ajes_xlsx("COMP-001", "AUD-001")
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        
+        ws = load_workbook(io.BytesIO(body))["AJEs"]
+        assert list(ws.values)[1][0] == "AJE-001"
+
+
+class TestExportCache:
+    """Test rendered exports are reused until the audit changes."""
+    
+    @pytest.fixture(autouse=True)
+    def export_cache(self, monkeypatch):
+        """Isolated export cache."""
+        from core.cache import LRUCache
+        monkeypatch.setattr(export_routes, "_export_cache", LRUCache(maxsize=8))
+    
+    async def test_xlsx_rendered_once(self, audit_store, monkeypatch):
+        """Test a repeated XLSX download skips regeneration, and a new result regenerates."""
+        calls = []
+        real_generate = export_routes.generate_ajes_xlsx
+        
+        def counting_generate(ajes, output=None, account_strings=None):
+            calls.append(len(ajes))
+            return real_generate(ajes, output, account_strings)
+        monkeypatch.setattr(export_routes, "generate_ajes_xlsx", counting_generate)
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        
+        first = await export_routes.export_ajes_xlsx("COMP-001", "AUD-001")
+        second = await export_routes.export_ajes_xlsx("COMP-001", "AUD-001")
+        
+        assert calls == [0]
+        assert first.body == second.body
+        
+        # A resumed audit stores a new result object
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        await export_routes.export_ajes_xlsx("COMP-001", "AUD-001")
+        assert calls == [0, 0]
+
+
+    async def test_account_cells_built_on_first_export(self, audit_store):
+        """Test AJE account cells are computed by the export and shared by later ones."""
+        result = {
+            "company_id": "COMP-001", "findings": [],
+            "ajes": [{"aje_id": "AJE-001", "entries": [
+                {"account_code": "6000", "debit": 10, "credit": 0},
+                {"account_code": "2100", "debit": 0, "credit": 10}
+            ], "total_debits": 10}]
+        }
+        audit_store.audit_results["AUD-001"] = result
+        
+        await export_routes.export_ajes_xlsx("COMP-001", "AUD-001")
+        cells = export_routes._export_cache[("AUD-001", "aje_accounts")]
+        
+        assert cells == (result, [("6000", "2100")])
+        assert export_routes._aje_account_cells("AUD-001", result) is cells[1]
+
+
+class TestExportPdfBatch:
+    """Test batch PDF export request validation."""
+    
+    async def test_empty_audit_ids_rejected(self, audit_store, monkeypatch):
+        """Test a batch without audit IDs returns 400 before rendering."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_pdf_batch("COMP-001", " , ")
+        
+        assert exc_info.value.status_code == 400
+    
+    async def test_unknown_audit_id_raises_404(self, audit_store, monkeypatch):
+        """Test every listed audit must exist."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_pdf_batch("COMP-001", "AUD-001,AUD-404")
+        
+        assert exc_info.value.status_code == 404
+    
+    async def test_other_company_audit_raises_404(self, audit_store, monkeypatch):
+        """Test an audit belonging to another company is not rendered."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        audit_store.audit_results["AUD-002"] = {"company_id": "COMP-002", "findings": [], "ajes": []}
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_pdf_batch("COMP-001", "AUD-001,AUD-002")
+        
+        assert exc_info.value.status_code == 404
+    
+    async def test_too_many_audit_ids_rejected(self, audit_store, monkeypatch):
+        """Test batches over MAX_BATCH_AUDITS return 400, counting repeated IDs once."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        monkeypatch.setattr(export_routes, "MAX_BATCH_AUDITS", 2)
+        monkeypatch.setattr(export_routes, "PDF_IMPORT_ERROR", None)
+        for aid in ("AUD-001", "AUD-002", "AUD-003"):
+            audit_store.audit_results[aid] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        rendered = []
+        
+        async def fake_batch(company_data, audit_datas, **kwargs):
+            rendered.append(len(audit_datas))
+            return b"%PDF"
+        monkeypatch.setattr(export_routes, "generate_pdf_report_batch", fake_batch)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_pdf_batch("COMP-001", "AUD-001,AUD-002,AUD-003")
+        assert exc_info.value.status_code == 400
+        
+        await export_routes.export_pdf_batch("COMP-001", "AUD-001,AUD-002,AUD-001")
+        assert rendered == [2]
+    
+    async def test_missing_weasyprint_reports_dependency_error(self, audit_store, monkeypatch):
+        """Test a failed WeasyPrint import surfaces as a structured dependency error."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        monkeypatch.setattr(export_routes, "PDF_IMPORT_ERROR", OSError("cannot load library 'libpango-1.0-0'"))
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_pdf_batch("COMP-001", "AUD-001")
+        
+        assert exc_info.value.status_code == 500
+        assert exc_info.value.detail["code"] == "pdf_dependency_error"
+
+
+class TestExportBundle:
+    """Test the multi-format zip export."""
+    
+    async def test_bundle_contains_every_format(self, audit_store, monkeypatch):
+        """Test the bundle carries both CSVs and the workbook, stored or deflated by type."""
+        import io
+        import zipfile
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001",
+            "findings": [{"finding_id": "F-001", "issue": "Late entry"}],
+            "ajes": [{"aje_id": "AJE-001", "entries": [], "total_debits": 10}]
+        }
+        
+        response = await export_routes.export_bundle("COMP-001", "AUD-001", include_pdf=False)
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        
+        with zipfile.ZipFile(io.BytesIO(body)) as zf:
+            infos = {info.filename: info for info in zf.infolist()}
+            assert set(infos) == {"findings_COMP-001.csv", "ajes_COMP-001.csv", "ajes_COMP-001.xlsx"}
+            assert infos["ajes_COMP-001.xlsx"].compress_type == zipfile.ZIP_STORED
+            assert infos["findings_COMP-001.csv"].compress_type == zipfile.ZIP_DEFLATED
+            assert b"F-001" in zf.read("findings_COMP-001.csv")
+    
+    async def test_non_pdf_failure_not_reported_as_pdf(self, audit_store, monkeypatch):
+        """Test a workbook failure in the bundle gets the bundle error code."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        
+        def broken_xlsx(*args):
+            raise TypeError("unsupported cell value")
+        monkeypatch.setattr(export_routes, "generate_ajes_xlsx", broken_xlsx)
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_bundle("COMP-001", "AUD-001", include_pdf=False)
+        
+        assert exc_info.value.detail["code"] == "bundle_generation_error"
+        assert exc_info.value.detail["exception_type"] == "TypeError"
+    
+    async def test_bundle_without_weasyprint_fails_cleanly(self, audit_store, monkeypatch):
+        """Test a bundle that needs the PDF reports the missing dependency."""
+        from api.routes import company as company_routes
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        monkeypatch.setattr(export_routes, "PDF_IMPORT_ERROR", OSError("cannot load library 'libpango-1.0-0'"))
+        audit_store.audit_results["AUD-001"] = {"company_id": "COMP-001", "findings": [], "ajes": []}
+        
+        with pytest.raises(HTTPException) as exc_info:
+            await export_routes.export_bundle("COMP-001", "AUD-001")
+        
+        assert exc_info.value.detail["code"] == "pdf_dependency_error"
+
+
+class TestExportConditionalGet:
+    """Test ETag / If-None-Match handling on exports."""
+    
+    def test_repeat_download_not_modified(self, audit_store):
+        """Test a matching If-None-Match returns 304 and a new audit version does not."""
+        from fastapi.testclient import TestClient
+        from main import app
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001", "findings": [], "ajes": [], "completed_at": "2024-01-01T00:00:00"
+        }
+        client = TestClient(app)
+        url = "/api/export/COMP-001/csv/findings?audit_id=AUD-001"
+        
+        first = client.get(url)
+        etag = first.headers["etag"]
+        assert first.status_code == 200
+        
+        repeat = client.get(url, headers={"If-None-Match": f'"other", {etag}'})
+        assert repeat.status_code == 304
+        assert repeat.content == b""
+        
+        # A resumed audit is stamped with a new completion time
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001", "findings": [], "ajes": [], "completed_at": "2024-01-02T00:00:00"
+        }
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+class TestExportEncoding:
+    """Test export responses control their own Content-Encoding."""
+    
+    @pytest.fixture
+    def client(self, audit_store):
+        from fastapi.testclient import TestClient
+        from main import app
+        findings = [{"finding_id": f"F-{i:04d}", "issue": "Duplicate payment"} for i in range(500)]
+        audit_store.audit_results["AUD-001"] = {
+            "company_id": "COMP-001", "findings": findings, "ajes": [], "completed_at": "2024-01-01T00:00:00"
+        }
+        return TestClient(app)
+    
+    def test_csv_gzipped_when_accepted(self, client):
+        """Test a gzip-accepting client receives a pre-compressed CSV with its own ETag."""
+        url = "/api/export/COMP-001/csv/findings?audit_id=AUD-001"
+        
+        plain = client.get(url, headers={"Accept-Encoding": "identity"})
+        zipped = client.get(url, headers={"Accept-Encoding": "gzip"})
+        
+        assert plain.headers["content-encoding"] == "identity"
+        assert zipped.headers["content-encoding"] == "gzip"
+        assert zipped.content == plain.content  # decoded by the client
+        assert zipped.headers["etag"] != plain.headers["etag"]
+    
+    def test_xlsx_not_recompressed(self, client):
+        """Test the GZip middleware leaves the (already zipped) workbook alone."""
+        response = client.get("/api/export/COMP-001/xlsx/ajes?audit_id=AUD-001", headers={"Accept-Encoding": "gzip"})
+        
+        assert response.headers["content-encoding"] == "identity"
+        assert response.content.startswith(b"PK")
+    
+    def test_structured_error_body(self, client, monkeypatch):
+        """Test structured export errors serialize through the app's HTTPException handler."""
+        monkeypatch.setattr(export_routes, "PDF_IMPORT_ERROR", OSError("cannot load library 'libpango-1.0-0'"))
+        from api.routes import company as company_routes
+        from core.cache import LRUCache
+        monkeypatch.setattr(export_routes, "_export_cache", LRUCache(maxsize=8))
+        monkeypatch.setattr(company_routes, "companies", _company_store())
+        
+        response = client.get("/api/export/COMP-001/pdf?audit_id=AUD-001")
+        
+        assert response.status_code == 500
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["detail"]["code"] == "pdf_dependency_error"
@@ -0,0 +1,230 @@
+"""
+Tests for Ownership API routes.
+"""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException, Request
+
+from api.routes import company as company_routes
+from api.routes import ownership as ownership_routes
+from core.cache import LRUCache
+from core.company_store import CompanyStore
+from core.schemas import OwnershipDiscoveryRequest, CompanyMetadata, Industry, AccountingBasis
+
+
+def _make_request() -> Request:
+    """Minimal HTTP request without compression."""
+    return Request({"type": "http", "headers": []})
+
+
+class FakeDiscovery:
+    """Discovery stub returning an empty graph."""
+    
+    calls = []
+    real_api_results = 1
+    
+    async def discover_ownership_network(self, seed_entities, depth, **kwargs):
+        self.calls.append((seed_entities, depth))
+        graph = SimpleNamespace(nodes=[], edges=[], statistics={})
+        return {
+            "graph": graph,
+            "findings": [{"issue": "shared address"}],
+            "entities_discovered": 0,
+            "data_sources": {"total_from_real_apis": self.real_api_results}
+        }
+
+
+@pytest.fixture
+def graph_store(monkeypatch):
+    """Small isolated graph store with a stubbed discovery."""
+    store = LRUCache(maxsize=2, ttl=60)
+    monkeypatch.setattr(ownership_routes, "ownership_graphs", store)
+    monkeypatch.setattr(ownership_routes, "_discovery_cache", LRUCache(maxsize=4, ttl=60))
+    monkeypatch.setattr(ownership_routes, "BeneficialOwnershipDiscovery", FakeDiscovery)
+    monkeypatch.setattr(FakeDiscovery, "calls", [])
+    return store
+
+
+class TestOwnershipGraphStore:
+    """Test storage of discovered ownership graphs."""
+    
+    async def test_store_is_bounded(self, graph_store):
+        """Test old graphs are evicted and new graphs never reuse their IDs."""
+        request = OwnershipDiscoveryRequest(seed_entities=["Acme LLC"])
+        ids = [(await ownership_routes.discover_ownership(request)).graph_id for _ in range(3)]
+        
+        assert len(set(ids)) == 3
+        assert list(graph_store.keys()) == ids[1:]
+        
+        with pytest.raises(HTTPException) as exc:
+            await ownership_routes.get_ownership_findings(ids[0])
+        assert exc.value.status_code == 404
+        
+        findings = await ownership_routes.get_ownership_findings(ids[2])
+        assert findings["findings"] == [{"issue": "shared address"}]
+    
+    async def test_repeated_discovery_reuses_result(self, graph_store):
+        """Test identical seed sets (in any order) query the registries once."""
+        first = await ownership_routes.discover_ownership(
+            OwnershipDiscoveryRequest(seed_entities=["Acme LLC", "Beta Inc"], depth=2)
+        )
+        second = await ownership_routes.discover_ownership(
+            OwnershipDiscoveryRequest(seed_entities=["Beta Inc", "Acme LLC"], depth=2)
+        )
+        
+        assert len(FakeDiscovery.calls) == 1
+        assert first.graph_id != second.graph_id
+        assert graph_store[first.graph_id]["graph"] is graph_store[second.graph_id]["graph"]
+        
+        await ownership_routes.discover_ownership(
+            OwnershipDiscoveryRequest(seed_entities=["Acme LLC", "Beta Inc"], depth=1)
+        )
+        assert len(FakeDiscovery.calls) == 2
+
+
+    async def test_mock_only_result_not_cached(self, graph_store, monkeypatch):
+        """Test a discovery without real registry data is run again next time."""
+        monkeypatch.setattr(FakeDiscovery, "real_api_results", 0)
+        request = OwnershipDiscoveryRequest(seed_entities=["Acme LLC"])
+        
+        await ownership_routes.discover_ownership(request)
+        await ownership_routes.discover_ownership(request)
+        
+        assert len(FakeDiscovery.calls) == 2
+
+
+class TestAnalyzeVendors:
+    """Test vendor extraction for GL-seeded discovery."""
+    
+    async def test_vendors_deduplicated_in_gl_order(self, monkeypatch):
+        """Test vendors keep first-seen order and the seed list is capped."""
+        names = [f"Vendor {i:02d}" for i in range(ownership_routes.MAX_SEED_VENDORS + 5)]
+        entries = [SimpleNamespace(vendor_or_customer=n) for n in names + names[::-1] + [None, ""]]
+        store = CompanyStore()
+        store["COMP-001"] = {
+            "gl": SimpleNamespace(entries=entries),
+            "metadata": CompanyMetadata(
+                id="COMP-001", name="Acme", industry=Industry.SAAS,
+                accounting_basis=AccountingBasis.ACCRUAL, reporting_period="FY2024"
+            )
+        }
+        monkeypatch.setattr(company_routes, "companies", store)
+        started = []
+        
+        async def fake_task(company_id, company_name, vendors, graph_id):
+            started.append(vendors)
+        
+        monkeypatch.setattr(ownership_routes, "_run_ownership_discovery_task", fake_task)
+        monkeypatch.setattr(ownership_routes, "spawn_background", lambda coro, name=None: asyncio.ensure_future(coro))
+        
+        try:
+            response = await ownership_routes.analyze_vendors("COMP-001")
+            await asyncio.sleep(0)
+        finally:
+            ownership_routes.progress_tracker.cleanup("vendor_graph_COMP-001")
+        
+        assert started == [names]
+        assert response["vendors_analyzed"] == ownership_routes.MAX_SEED_VENDORS
+
+    
+    async def test_vendor_edges_sent_as_one_batch(self, graph_store):
+        """Test the company-to-vendor edges go out as a single data step."""
+        tracker = ownership_routes.progress_tracker
+        graph_id = "vendor_graph_COMP-002"
+        tracker.start_operation(graph_id, "ownership_discovery")
+        
+        try:
+            await ownership_routes._run_ownership_discovery_task("COMP-002", "Acme", ["V1", "V2", "V3"], graph_id)
+            data_steps = [s["data"] for s in tracker.get_progress(graph_id) if s["type"] == "data"]
+        finally:
+            tracker.cleanup(graph_id)
+        
+        assert [d["data_type"] for d in data_steps] == ["node", "edge_batch"]
+        assert [e["target"] for e in data_steps[1]["payload"]["edges"]] == ["V1", "V2", "V3"]
+
+
+class TestResumeDiscovery:
+    """Test resuming a paused discovery from its checkpoint."""
+    
+    async def test_resume_uses_checkpointed_name(self, monkeypatch):
+        """Test the company name comes from the checkpoint, without loading the company."""
+        tracker = ownership_routes.progress_tracker
+        graph_id = "vendor_graph_COMP-003"
+        tracker.start_operation(graph_id, "ownership_discovery")
+        tracker.save_checkpoint(graph_id, {
+            "company_id": "COMP-003",
+            "company_name": "Acme Holdings",
+            "processed_vendors": ["V1"],
+            "remaining_vendors": ["V2", "V3"]
+        })
+        
+        class NoLoads(CompanyStore):
+            async def load(self, company_id):
+                raise AssertionError("company record should not be loaded")
+        
+        monkeypatch.setattr(company_routes, "companies", NoLoads())
+        started = []
+        
+        async def fake_task(company_id, company_name, vendors, graph_id):
+            started.append((company_id, company_name, vendors))
+        
+        monkeypatch.setattr(ownership_routes, "_run_ownership_discovery_task", fake_task)
+        monkeypatch.setattr(ownership_routes, "spawn_background", lambda coro, name=None: asyncio.ensure_future(coro))
+        
+        try:
+            response = await ownership_routes.resume_ownership_discovery(graph_id)
+            await asyncio.sleep(0)
+        finally:
+            tracker.cleanup(graph_id)
+        
+        assert response["status"] == "running"
+        assert started == [("COMP-003", "Acme Holdings", ["V2", "V3"])]
+
+
+class TestStreamOwnershipProgress:
+    """Test the ownership discovery SSE stream."""
+    
+    async def test_burst_is_coalesced_and_stream_ends(self):
+        """Test queued steps go out in one chunk and end closes the stream."""
+        tracker = ownership_routes.progress_tracker
+        graph_id = "vendor_graph_SSE-001"
+        tracker.start_operation(graph_id, "ownership_discovery")
+        tracker.add_step(graph_id, "info", "Found 3 unique vendors in GL")
+        
+        try:
+            response = await ownership_routes.stream_ownership_progress(graph_id, _make_request())
+            body = response.body_iterator
+            
+            first_chunk = await body.__anext__()
+            assert first_chunk.count(b"data: ") == 2  # started + vendors found
+            
+            tracker.complete_operation(graph_id, {"graph_id": graph_id})
+            rest = b"".join([chunk async for chunk in body])
+            
+            assert b'"type":"completed"' in rest
+            assert rest.endswith(b'{"type":"end","message":"Discovery complete"}\n\n')
+        finally:
+            tracker.cleanup(graph_id)
+    
+    async def test_disconnect_unsubscribes(self):
+        """Test closing the stream early releases the subscriber queue."""
+        tracker = ownership_routes.progress_tracker
+        graph_id = "vendor_graph_SSE-002"
+        tracker.start_operation(graph_id, "ownership_discovery")
+        
+        try:
+            response = await ownership_routes.stream_ownership_progress(graph_id, _make_request())
+            body = response.body_iterator
+            await body.__anext__()
+            assert len(tracker._subscribers[graph_id]) == 1
+            
+            await body.aclose()
+            
+            assert tracker._subscribers[graph_id] == []
+        finally:
+            tracker.cleanup(graph_id)
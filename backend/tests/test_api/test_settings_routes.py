@@ -0,0 +1,60 @@
+"""
+Tests for Settings API routes.
+"""
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from fastapi import HTTPException
+
+from api.routes import settings as settings_routes
+from api.routes.settings import GeminiKeyUpdate
+from config import settings
+
+
+@pytest.fixture
+def probe(monkeypatch):
+    """Stub the key probe and record the keys it is asked about."""
+    probed = []
+    outcome = {"result": (True, "API key validated")}
+    
+    async def fake_probe(api_key):
+        probed.append(api_key)
+        return outcome["result"]
+    
+    monkeypatch.setattr(settings_routes, "probe_api_key", fake_probe)
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "old-key-0000000")
+    return probed, outcome
+
+
+class TestUpdateGeminiKey:
+    """Test runtime Gemini key updates."""
+    
+    async def test_malformed_key_rejected_without_probe(self, probe):
+        """Test keys with whitespace or too few characters never reach the API."""
+        probed, _ = probe
+        for key in ["short", "AIza key with spaces 123"]:
+            with pytest.raises(HTTPException) as exc:
+                await settings_routes.update_gemini_key(GeminiKeyUpdate(api_key=key))
+            assert exc.value.status_code == 400
+        
+        assert probed == []
+    
+    async def test_rejected_key_not_applied(self, probe):
+        """Test a key refused by the API leaves the current key in place."""
+        probed, outcome = probe
+        outcome["result"] = (False, "API key was rejected by the Gemini API")
+        
+        response = await settings_routes.update_gemini_key(GeminiKeyUpdate(api_key="AIzaInvalidKey123456"))
+        
+        assert probed == ["AIzaInvalidKey123456"]
+        assert response.success is False and response.validated is False
+        assert settings.GEMINI_API_KEY == "old-key-0000000"
+    
+    async def test_valid_key_applied(self, probe):
+        """Test an accepted key becomes the configured key."""
+        response = await settings_routes.update_gemini_key(GeminiKeyUpdate(api_key="AIzaValidKey-123_456"))
+        
+        assert response.success is True and response.validated is True
+        assert settings.GEMINI_API_KEY == "AIzaValidKey-123_456"
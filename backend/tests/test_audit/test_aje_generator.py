@@ -0,0 +1,355 @@
+"""
+Tests for the AJE generator.
+"""
+import asyncio
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from audit import aje_generator
+from audit.aje_generator import AJEGenerator, _entries_unbalanced
+from core.audit_trail import AuditRecord
+from core.schemas import AccountingStandard
+
+
+def _findings(n: int) -> list[dict]:
+    return [
+        {"finding_id": f"F-{i}", "category": "classification", "issue": "Expense misclassified", "details": "$500.00"}
+        for i in range(n)
+    ]
+
+
+class TestGenerateAjesConcurrency:
+    """Test concurrent dispatch of per-finding Gemini calls."""
+
+    @pytest.fixture(autouse=True)
+    def one_per_call(self, monkeypatch):
+        monkeypatch.setattr(aje_generator, "AJE_BATCH_SIZE", 1)
+
+    @pytest.fixture
+    def generator(self):
+        return AJEGenerator()
+
+    @pytest.fixture
+    def record(self):
+        return AuditRecord(audit_id="AUD-TEST", company_id="COMP-TEST")
+
+    async def test_calls_overlap_and_keep_order(self, generator, record, sample_coa, monkeypatch):
+        """Test findings are generated concurrently, bounded, and returned in finding order."""
+        monkeypatch.setattr(aje_generator, "MAX_CONCURRENT_AJE_REQUESTS", 3)
+        inflight = 0
+        peak = 0
+
+        async def fake_generate(finding, coa_summary, audit_record):
+            nonlocal inflight, peak
+            inflight += 1
+            peak = max(peak, inflight)
+            # Later findings finish first
+            await asyncio.sleep(0.01 * (10 - int(finding["finding_id"].split("-")[1])))
+            inflight -= 1
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+        streamed = []
+
+        ajes = await generator.generate_ajes(_findings(8), sample_coa, record, on_aje_callback=streamed.append)
+
+        assert [a["aje_id"] for a in ajes] == [f"AJE-F-{i}" for i in range(8)]
+        assert len(streamed) == 8
+        assert peak == 3
+
+    async def test_quota_stops_queued_findings(self, generator, record, sample_coa, monkeypatch):
+        """Test findings still queued when the quota runs out are not sent to Gemini."""
+        monkeypatch.setattr(aje_generator, "MAX_CONCURRENT_AJE_REQUESTS", 1)
+        calls = []
+
+        async def fake_generate(finding, coa_summary, audit_record):
+            calls.append(finding["finding_id"])
+            if len(calls) == 2:
+                generator.quota_exceeded = True
+                return None
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+
+        ajes = await generator.generate_ajes(_findings(5), sample_coa, record)
+
+        assert calls == ["F-0", "F-1"]
+        assert [a["aje_id"] for a in ajes] == ["AJE-F-0"]
+
+    async def test_failed_finding_does_not_drop_others(self, generator, record, sample_coa, monkeypatch):
+        """Test an exception for one finding leaves the other AJEs intact."""
+        async def fake_generate(finding, coa_summary, audit_record):
+            if finding["finding_id"] == "F-1":
+                raise RuntimeError("boom")
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+
+        ajes = await generator.generate_ajes(_findings(3), sample_coa, record)
+
+        assert [a["aje_id"] for a in ajes] == ["AJE-F-0", "AJE-F-2"]
+
+    
+    async def test_async_callback_awaited(self, generator, record, sample_coa, monkeypatch):
+        """Test a coroutine callback is awaited and a failing one does not stop generation."""
+        async def fake_generate(finding, coa_summary, audit_record):
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+        streamed = []
+
+        async def on_aje(aje):
+            await asyncio.sleep(0)
+            if aje["aje_id"] == "AJE-F-0":
+                raise RuntimeError("client went away")
+            streamed.append(aje["aje_id"])
+
+        ajes = await generator.generate_ajes(_findings(3), sample_coa, record, on_aje_callback=on_aje)
+
+        assert sorted(streamed) == ["AJE-F-1", "AJE-F-2"]
+        assert len(ajes) == 3
+
+    async def test_coa_summary_built_once(self, generator, record, sample_coa, monkeypatch):
+        """Test every finding's prompt gets the same chart of accounts summary."""
+        summaries = []
+        
+        async def fake_generate(finding, coa_summary, audit_record):
+            summaries.append(coa_summary)
+            return None
+        
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+        
+        await generator.generate_ajes(_findings(3), sample_coa, record)
+        
+        first = sample_coa.accounts[0]
+        assert len(summaries) == 3
+        assert all(s is summaries[0] for s in summaries)
+        assert summaries[0].startswith(f"{first.code}: {first.name}")
+
+    
+    async def test_known_quota_skips_gemini(self, generator, record, sample_coa, monkeypatch):
+        """Test an already exhausted quota goes straight to the deterministic rules."""
+        calls = []
+        
+        async def fake_generate(finding, coa_summary, audit_record):
+            calls.append(finding["finding_id"])
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+        
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+        generator.quota_exceeded = True
+        generator._quota_client = generator.gemini
+        
+        ajes = await generator.generate_ajes(_findings(3), sample_coa, record)
+        
+        assert calls == []
+        assert [a["rule_applied"] for a in ajes] == ["RULE_EXPENSE_RECLASSIFICATION_GAAP"] * 3
+    
+    async def test_new_client_clears_quota(self, generator, record, sample_coa, monkeypatch):
+        """Test a replaced Gemini client (new API key) is tried again."""
+        async def fake_generate(finding, coa_summary, audit_record):
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+        
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+        generator.quota_exceeded = True
+        generator._quota_client = object()
+        
+        ajes = await generator.generate_ajes(_findings(2), sample_coa, record)
+        
+        assert [a["aje_id"] for a in ajes] == ["AJE-F-0", "AJE-F-1"]
+        assert generator.quota_exceeded is False
+
+
+class TestBatchedGeneration:
+    """Test several findings sharing one Gemini call."""
+
+    @pytest.fixture
+    def generator(self):
+        return AJEGenerator()
+
+    @pytest.fixture
+    def record(self):
+        return AuditRecord(audit_id="AUD-TEST", company_id="COMP-TEST")
+
+    def _respond(self, generator, monkeypatch, respond):
+        calls = []
+
+        async def generate_json(prompt, **kwargs):
+            calls.append(kwargs)
+            return respond(prompt, kwargs)
+
+        monkeypatch.setattr(generator.gemini, "generate_json", generate_json)
+        return calls
+
+    @staticmethod
+    def _aje(index, debit=500.0, credit=500.0):
+        return {
+            "finding_index": index,
+            "entries": [
+                {"account_code": "6000", "account_name": "Expense", "debit": debit, "credit": 0},
+                {"account_code": "2000", "account_name": "Payable", "debit": 0, "credit": credit}
+            ],
+            "description": f"Fix {index}", "rationale": "", "standard_reference": "ASC 250"
+        }
+
+    async def test_one_call_per_batch(self, generator, record, sample_coa, monkeypatch):
+        """Test a batch of findings is answered by a single call and mapped back in order."""
+        monkeypatch.setattr(aje_generator, "AJE_BATCH_SIZE", 3)
+        calls = self._respond(generator, monkeypatch, lambda prompt, kwargs: {
+            "parsed": {"ajes": [self._aje(i) for i in (3, 1, 2)] if "FINDING 3" in prompt else [self._aje(1)]},
+            "error": None
+        })
+        streamed = []
+
+        ajes = await generator.generate_ajes(_findings(4), sample_coa, record, on_aje_callback=streamed.append)
+
+        assert len(calls) == 2
+        assert calls[0]["response_schema"] is aje_generator.AJE_BATCH_RESPONSE_SCHEMA
+        assert [a["finding_reference"] for a in ajes] == ["F-0", "F-1", "F-2", "F-3"]
+        assert len(streamed) == 4
+
+    async def test_prompts_share_prefix(self, generator, record, sample_coa, monkeypatch):
+        """Test prompts in a run differ only after the chart of accounts, where the findings start."""
+        monkeypatch.setattr(aje_generator, "AJE_BATCH_SIZE", 2)
+        prompts = []
+
+        def respond(prompt, kwargs):
+            prompts.append(prompt)
+            return {"parsed": {"ajes": []}, "error": None}
+
+        self._respond(generator, monkeypatch, respond)
+        findings = _findings(4)
+        findings[2]["issue"] = "Revenue recognized early"
+
+        await generator.generate_ajes(findings, sample_coa, record)
+
+        batch_prompts = [p for p in prompts if "FINDING 1:" in p]
+        head = batch_prompts[0].split("FINDING 1:")[0]
+        assert len(batch_prompts) == 2
+        assert sample_coa.accounts[0].name in head
+        assert all(p.startswith(head) for p in batch_prompts)
+        assert batch_prompts[0] != batch_prompts[1]
+
+    async def test_missing_and_unbalanced_retried(self, generator, record, sample_coa, monkeypatch):
+        """Test findings without a usable entry in the batch response are retried alone."""
+        self._respond(generator, monkeypatch, lambda prompt, kwargs: {
+            "parsed": {"ajes": [self._aje(1), self._aje(2, credit=400.0), self._aje(9)]},
+            "error": None
+        })
+        singles = []
+
+        async def fake_generate(finding, coa_summary, audit_record):
+            singles.append(finding["finding_id"])
+            return {"aje_id": f"AJE-{finding['finding_id']}", "finding_reference": finding["finding_id"]}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+
+        ajes = await generator.generate_ajes(_findings(3), sample_coa, record)
+
+        assert singles == ["F-1", "F-2"]
+        assert [a["finding_reference"] for a in ajes] == ["F-0", "F-1", "F-2"]
+
+    async def test_null_amounts_count_as_zero(self, generator, record, sample_coa, monkeypatch):
+        """Test entry lines with null debit or credit still total correctly."""
+        aje = self._aje(1)
+        aje["entries"][0]["credit"] = None
+        aje["entries"][1]["debit"] = None
+        self._respond(generator, monkeypatch, lambda prompt, kwargs: {"parsed": {"ajes": [aje, self._aje(2)]}, "error": None})
+        ajes = await generator.generate_ajes(_findings(2), sample_coa, record)
+
+        assert [(a["total_debits"], a["total_credits"]) for a in ajes] == [(500.0, 500.0)] * 2
+        assert ajes[0]["entries"][0]["credit"] == 0
+
+    async def test_failed_batch_falls_back_to_single_calls(self, generator, record, sample_coa, monkeypatch):
+        """Test a batch call that errors is retried one finding at a time."""
+        self._respond(generator, monkeypatch, lambda prompt, kwargs: {"parsed": None, "error": "JSON parse error"})
+        singles = []
+
+        async def fake_generate(finding, coa_summary, audit_record):
+            singles.append(finding["finding_id"])
+            return {"aje_id": f"AJE-{finding['finding_id']}"}
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+
+        ajes = await generator.generate_ajes(_findings(2), sample_coa, record)
+
+        assert singles == ["F-0", "F-1"]
+        assert [a["aje_id"] for a in ajes] == ["AJE-F-0", "AJE-F-1"]
+
+    async def test_quota_in_batch_not_retried(self, generator, record, sample_coa, monkeypatch):
+        """Test an exhausted quota skips the per-finding retries."""
+        self._respond(generator, monkeypatch, lambda prompt, kwargs: {"parsed": None, "error": "quota", "quota_exceeded": True})
+
+        async def fake_generate(finding, coa_summary, audit_record):
+            raise AssertionError("should not be called")
+
+        monkeypatch.setattr(generator, "_generate_aje_for_finding", fake_generate)
+
+        ajes = await generator.generate_ajes(_findings(2), sample_coa, record)
+
+        assert generator.quota_exceeded is True
+        assert [a["rule_applied"] for a in ajes] == ["RULE_EXPENSE_RECLASSIFICATION_GAAP"] * 2
+
+
+class TestDeterministicRules:
+    """Test the rule table used when Gemini is unavailable."""
+
+    @pytest.fixture
+    def generator(self):
+        return AJEGenerator()
+
+    def test_first_matching_rule_applied(self, generator):
+        """Test rules are matched case-insensitively and in table order."""
+        aje = generator._apply_aje_rule(
+            {"finding_id": "F-1", "category": "timing", "issue": "Revenue Recognition before delivery",
+             "details": "Invoice for $12,500.00 booked early"}
+        )
+
+        assert aje["rule_applied"] == "RULE_REVENUE_DEFERRAL_GAAP"
+        assert aje["total_debits"] == aje["total_credits"] == 12500.0
+        assert [(e["account_code"], e["debit"], e["credit"]) for e in aje["entries"]] == [
+            ("4000", 12500.0, 0), ("2200", 0, 12500.0)
+        ]
+
+    def test_table_order_beats_text_order(self, generator):
+        """Test a keyword appearing earlier in the issue does not outrank an earlier rule."""
+        aje = generator._apply_aje_rule(
+            {"finding_id": "F-3", "category": "fraud", "issue": "Vendor paid twice: duplicate invoice"}
+        )
+
+        assert aje["rule_applied"] == "RULE_FRAUD_PROVISION_GAAP"
+
+    def test_ifrs_wording(self, generator):
+        """Test IFRS rationale and references are used for IFRS audits."""
+        generator.accounting_standard = AccountingStandard.IFRS
+
+        aje = generator._apply_aje_rule({"finding_id": "F-2", "category": "structural", "issue": "Other"})
+
+        assert aje["rule_applied"] == "RULE_GENERIC_CORRECTION_IFRS"
+        assert aje["rationale"] == "Correction required per IFRS audit finding"
+        assert aje["total_debits"] == 1000.0
+
+    def test_no_rule_for_other_categories(self, generator):
+        """Test findings outside the correctable categories produce no AJE."""
+        assert generator._apply_aje_rule({"category": "anomaly", "issue": "Unusual amount"}) is None
+
+
+class TestEntriesBalanceCheck:
+    """Test early imbalance detection on partially streamed AJE responses."""
+
+    def test_waits_for_complete_entries(self):
+        """Test nothing is decided while the entries array is still streaming."""
+        assert _entries_unbalanced('{"entries": [{"account_code": "6000", "debit": 100, "cre') is False
+
+    def test_unbalanced_entries_detected(self):
+        """Test a finished entries array with unequal sides is flagged before the rest arrives."""
+        partial = ('{"entries": [{"account_code": "6000", "debit": 100, "credit": 0}, '
+                   '{"account_code": "2100", "debit": 0, "credit": 90}], "descr')
+        assert _entries_unbalanced(partial) is True
+
+    def test_brackets_in_strings_ignored(self):
+        """Test brackets inside account names do not end the array early."""
+        partial = ('{"entries": [{"account_name": "Accrued [short-term]", "debit": 50, "credit": 0}, '
+                   '{"account_name": "Cash", "debit": 0, "credit": 50}], "rationale": "')
+        assert _entries_unbalanced(partial) is False
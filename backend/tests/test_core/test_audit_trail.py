@@ -305,3 +305,16 @@ class TestMultipleRecords:
         assert trail.get_record("AUD-001") is not None
         assert trail.get_record("AUD-002") is not None
         assert trail.get_record("AUD-003") is not None
+    
+    def test_records_bounded(self):
+        """Test least recently used records are evicted beyond the limit."""
+        trail = AuditTrail(max_records=2)
+        
+        trail.create_record("AUD-001", "COMP-001")
+        trail.create_record("AUD-002", "COMP-001")
+        trail.get_record("AUD-001")
+        trail.create_record("AUD-003", "COMP-001")
+        
+        assert trail.get_record("AUD-002") is None
+        assert trail.get_record("AUD-001") is not None
+        assert trail.get_record("AUD-003") is not None
@@ -0,0 +1,84 @@
+"""
+Tests for bounded in-memory caches.
+"""
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core import cache as cache_module
+from core.cache import LRUCache
+
+
+class TestLRUCache:
+    """Test LRU eviction behavior."""
+    
+    def test_basic_mapping_operations(self):
+        """Test dict-like get/set/delete."""
+        cache = LRUCache(maxsize=3)
+        cache["a"] = 1
+        
+        assert cache["a"] == 1
+        assert "a" in cache
+        assert cache.get("missing") is None
+        
+        del cache["a"]
+        assert "a" not in cache
+        assert len(cache) == 0
+    
+    def test_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted."""
+        cache = LRUCache(maxsize=2)
+        cache["a"] = 1
+        cache["b"] = 2
+        _ = cache["a"]  # refresh "a"
+        cache["c"] = 3
+        
+        assert "b" not in cache
+        assert list(cache) == ["a", "c"]
+    
+    def test_on_evict_callback(self):
+        """Test eviction hook receives key and value."""
+        evicted = []
+        cache = LRUCache(maxsize=1, on_evict=lambda k, v: evicted.append((k, v)))
+        cache["a"] = 1
+        cache["b"] = 2
+        
+        assert evicted == [("a", 1)]
+    
+    def test_ttl_expiry(self, monkeypatch):
+        """Test entries expire after ttl seconds."""
+        now = [1000.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = LRUCache(maxsize=10, ttl=60)
+        cache["a"] = 1
+        
+        now[0] += 30
+        assert cache.get("a") == 1
+        
+        now[0] += 31
+        assert "a" not in cache
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_evicts_by_weight(self):
+        """Test entries are evicted once their summed weight exceeds maxweight."""
+        cache = LRUCache(maxsize=10, maxweight=10, weigher=len)
+        cache["a"] = b"x" * 4
+        cache["b"] = b"x" * 4
+        cache["a"] = b"x" * 5  # replacing re-weighs the entry
+        
+        assert cache.total_weight == 9
+        
+        cache["c"] = b"x" * 3
+        assert list(cache) == ["a", "c"]
+        assert cache.total_weight == 8
+        
+        cache["d"] = b"x" * 11  # heavier than the whole budget
+        assert len(cache) == 0
+        assert cache.total_weight == 0
+    
+    def test_invalid_maxsize(self):
+        """Test maxsize must be positive."""
+        with pytest.raises(ValueError):
+            LRUCache(maxsize=0)
@@ -0,0 +1,150 @@
+"""
+Tests for the SQLite-backed company store.
+"""
+import pytest
+import sys
+import threading
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.company_store import CompanyStore
+from core.schemas import CompanyMetadata, Industry, AccountingBasis, GeneralLedger, JournalEntry
+
+
+def _make_company(company_id: str, name: str = "Test Co") -> dict:
+    metadata = CompanyMetadata(
+        id=company_id,
+        name=name,
+        industry=Industry.SAAS,
+        accounting_basis=AccountingBasis.ACCRUAL,
+        reporting_period="FY2024"
+    )
+    gl = GeneralLedger(
+        company_id=company_id,
+        period_start="2024-01-01",
+        period_end="2024-01-31",
+        entries=[JournalEntry(
+            entry_id="JE-1", date="2024-01-05", account_code="1000",
+            account_name="Cash", description="Deposit", debit=100.0
+        )]
+    )
+    return {"metadata": metadata, "gl": gl, "coa": None, "tb": None}
+
+
+class TestCompanyStore:
+    """Test dict-like access, eviction and persistence."""
+    
+    def test_set_get_contains(self):
+        """Test basic mapping behaviour."""
+        store = CompanyStore(cache_size=4)
+        company = _make_company("C-1")
+        
+        store["C-1"] = company
+        
+        assert "C-1" in store
+        assert "C-2" not in store
+        assert store["C-1"] is company
+        assert store.get("C-2") is None
+        assert len(store) == 1
+        assert list(store) == ["C-1"]
+    
+    def test_evicted_company_rehydrated(self):
+        """Test companies dropped from the memory cache load back from SQLite."""
+        store = CompanyStore(cache_size=1)
+        store["C-1"] = _make_company("C-1")
+        store["C-2"] = _make_company("C-2")
+        
+        company = store["C-1"]
+        
+        assert company["metadata"].id == "C-1"
+        assert company["gl"].entries[0].debit == 100.0
+    
+    def test_file_store_shared_between_instances(self, tmp_path):
+        """Test a file-backed store is visible to another store (e.g. another worker)."""
+        path = str(tmp_path / "companies.db")
+        writer = CompanyStore(path=path)
+        reader = CompanyStore(path=path)
+        
+        writer["C-1"] = _make_company("C-1", name="Shared Co")
+        
+        assert reader["C-1"]["metadata"].name == "Shared Co"
+    
+    def test_update_keeps_order_and_metadata(self):
+        """Test reassignment updates metadata without reordering listings."""
+        store = CompanyStore()
+        store["C-1"] = _make_company("C-1", name="First")
+        store["C-2"] = _make_company("C-2", name="Second")
+        
+        store["C-1"] = _make_company("C-1", name="Renamed")
+        
+        assert [m.name for m in store.list_metadata()] == ["Renamed", "Second"]
+    
+    def test_delete(self):
+        """Test deleting removes the company from memory and SQLite."""
+        store = CompanyStore()
+        store["C-1"] = _make_company("C-1")
+        
+        del store["C-1"]
+        
+        assert "C-1" not in store
+        with pytest.raises(KeyError):
+            del store["C-1"]
+    
+    def test_rewrite_by_other_worker_seen(self, tmp_path):
+        """Test a cached company is reloaded once another store rewrites its row."""
+        path = str(tmp_path / "nested" / "companies.db")
+        reader = CompanyStore(path=path)
+        writer = CompanyStore(path=path)
+        writer["C-1"] = _make_company("C-1", name="Original")
+        cached = reader["C-1"]
+        
+        assert reader["C-1"] is cached
+        
+        writer["C-1"] = _make_company("C-1", name="Rewritten")
+        assert reader["C-1"]["metadata"].name == "Rewritten"
+        
+        del writer["C-1"]
+        assert reader.get("C-1") is None
+
+
+class TestCompanyStoreAsync:
+    """Test the event-loop friendly load/save API."""
+    
+    async def test_serialization_off_event_loop(self, monkeypatch):
+        """Test save and a cache-missing load pickle in a worker thread."""
+        import pickle
+        from core import company_store
+        
+        threads = []
+        real_dumps, real_loads = pickle.dumps, pickle.loads
+        
+        def dumps(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return real_dumps(*args, **kwargs)
+        
+        def loads(*args, **kwargs):
+            threads.append(threading.current_thread())
+            return real_loads(*args, **kwargs)
+        
+        monkeypatch.setattr(company_store.pickle, "dumps", dumps)
+        monkeypatch.setattr(company_store.pickle, "loads", loads)
+        store = CompanyStore(cache_size=1)
+        
+        await store.save("C-1", _make_company("C-1"))
+        await store.save("C-2", _make_company("C-2"))
+        company = await store.load("C-1")
+        
+        assert company["metadata"].id == "C-1"
+        assert await store.load("C-404") is None
+        assert len(threads) == 3
+        assert threading.main_thread() not in threads
+    
+    async def test_older_write_does_not_win(self, tmp_path):
+        """Test a write stamped earlier than the stored row leaves the newer data."""
+        path = str(tmp_path / "companies.db")
+        store = CompanyStore(path=path)
+        await store.save("C-1", _make_company("C-1", name="Newer"))
+        
+        store._write("C-1", _make_company("C-1", name="Older"), 0.0)
+        
+        assert CompanyStore(path=path)["C-1"]["metadata"].name == "Newer"
@@ -0,0 +1,164 @@
+"""
+Tests for the shared Gemini client.
+"""
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from config import settings
+from core import gemini_client
+from audit.aje_generator import AJEGenerator
+
+
+@pytest.fixture
+def no_key(monkeypatch):
+    """Run without a configured key so no real client is built."""
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(gemini_client, "_shared_client", None)
+
+
+class TestSharedClient:
+    """Test the process-wide Gemini client."""
+    
+    def test_client_reused(self, no_key):
+        """Test repeated lookups return the same instance."""
+        assert gemini_client.get_gemini_client() is gemini_client.get_gemini_client()
+    
+    def test_components_share_client(self, no_key):
+        """Test long-lived components resolve the shared client."""
+        assert AJEGenerator().gemini is gemini_client.get_gemini_client()
+    
+    def test_rebuilt_on_key_change(self, no_key, monkeypatch):
+        """Test a runtime API key update replaces the shared client."""
+        first = gemini_client.get_gemini_client()
+        monkeypatch.setattr(gemini_client.GeminiClient, "_initialize_client", lambda self: None)
+        monkeypatch.setattr(settings, "GEMINI_API_KEY", "new-test-key")
+        
+        second = gemini_client.get_gemini_client()
+        
+        assert second is not first
+        assert second.api_key == "new-test-key"
+
+
+class TestGenerateJson:
+    """Test parsing of JSON responses."""
+    
+    @pytest.fixture
+    def client(self, no_key):
+        return gemini_client.get_gemini_client()
+    
+    def _respond(self, client, monkeypatch, text):
+        async def fake_generate(**kwargs):
+            return {"text": text, "error": None}
+        monkeypatch.setattr(client, "generate", fake_generate)
+    
+    async def test_fenced_json_parsed(self, client, monkeypatch):
+        """Test JSON inside a markdown code block is parsed."""
+        self._respond(client, monkeypatch, '```json\n{"columns": {"date": "Posted"}}\n```')
+        
+        result = await client.generate_json(prompt="map columns")
+        
+        assert result["parsed"] == {"columns": {"date": "Posted"}}
+    
+    async def test_invalid_json_reported(self, client, monkeypatch):
+        """Test malformed output is reported as a parse error."""
+        self._respond(client, monkeypatch, "{not json")
+        
+        result = await client.generate_json(prompt="map columns")
+        
+        assert result["parsed"] is None
+        assert result["error"].startswith("JSON parse error")
+
+
+class TestStreamedStop:
+    """Test abandoning a streamed response once the caller rejects it."""
+    
+    @pytest.fixture
+    def streaming_client(self, no_key):
+        from types import SimpleNamespace
+        from google.genai import types
+        
+        client = gemini_client.get_gemini_client()
+        closed = []
+        
+        def generate_content_stream(model, contents, config):
+            def chunks():
+                try:
+                    for text in ['{"entries": [1', ', 2]', ', "rationale": "', 'never sent"}']:
+                        yield SimpleNamespace(text=text)
+                finally:
+                    closed.append(True)
+            return chunks()
+        
+        client.client = SimpleNamespace(models=SimpleNamespace(generate_content_stream=generate_content_stream))
+        client.client_type = "google_genai"
+        client.model = "test-model"
+        client.genai_types = types
+        return client, closed
+    
+    async def test_stop_when_abandons_stream(self, streaming_client):
+        """Test the stream is closed as soon as stop_when matches."""
+        client, closed = streaming_client
+        
+        result = await client.generate(prompt="aje", stop_when=lambda text: "2]" in text)
+        
+        assert result["stopped"] is True
+        assert result["text"] == '{"entries": [1, 2]'
+        assert closed == [True]
+    
+    async def test_full_stream_when_never_stopped(self, streaming_client):
+        """Test an accepted stream is returned whole and parsed."""
+        client, _ = streaming_client
+        
+        result = await client.generate_json(prompt="aje", stop_when=lambda text: False)
+        
+        assert result["error"] is None
+        assert result["parsed"] == {"entries": [1, 2], "rationale": "never sent"}
+
+
+class TestProbeApiKey:
+    """Test the lightweight API key probe."""
+    
+    def _fake_client(self, monkeypatch, list_models):
+        from types import SimpleNamespace
+        from google import genai
+        
+        def make_client(api_key):
+            return SimpleNamespace(aio=SimpleNamespace(models=SimpleNamespace(list=list_models)))
+        monkeypatch.setattr(genai, "Client", make_client)
+    
+    async def test_accepted_key(self, monkeypatch):
+        """Test a successful model listing validates the key."""
+        async def list_models(config=None):
+            assert config == {"page_size": 1}
+            return []
+        self._fake_client(monkeypatch, list_models)
+        
+        assert (await gemini_client.probe_api_key("AIzaValidKey123456"))[0] is True
+    
+    async def test_rejected_key(self, monkeypatch):
+        """Test a client error from the API marks the key invalid."""
+        from google.genai import errors
+        
+        async def list_models(config=None):
+            raise errors.ClientError(400, {"error": {"code": 400, "message": "API key not valid", "status": "INVALID_ARGUMENT"}})
+        self._fake_client(monkeypatch, list_models)
+        
+        valid, message = await gemini_client.probe_api_key("AIzaInvalidKey123456")
+        
+        assert valid is False
+        assert "rejected" in message
+    
+    async def test_timeout(self, monkeypatch):
+        """Test a probe that does not answer in time is not treated as valid."""
+        import asyncio
+        
+        async def list_models(config=None):
+            await asyncio.sleep(1)
+        self._fake_client(monkeypatch, list_models)
+        
+        valid, message = await gemini_client.probe_api_key("AIzaSlowKey1234567", timeout=0.01)
+        
+        assert valid is False
+        assert "Timed out" in message
@@ -0,0 +1,240 @@
+"""
+Tests for progress tracking and SSE encoding.
+"""
+import pytest
+import sys
+import json
+import asyncio
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import numpy as np
+
+from core.progress import (
+    format_sse, encode_step, heartbeat_loop, drain_queue, HEARTBEAT_FRAME,
+    MAX_SSE_FRAME_BYTES, SSE_PREVIEW_CHARS, SUBSCRIBER_QUEUE_MAX_ITEMS,
+    ProgressTracker, StepBatch, SubscriberQueue, sse_stream
+)
+
+
+class TestFormatSSE:
+    """Test SSE frame encoding."""
+    
+    def test_frame_layout(self):
+        """Test frame is a single data line terminated by a blank line."""
+        frame = format_sse({"type": "heartbeat"})
+        
+        assert isinstance(frame, bytes)
+        assert frame.startswith(b"data: ")
+        assert frame.endswith(b"\n\n")
+        assert json.loads(frame[6:]) == {"type": "heartbeat"}
+    
+    def test_numpy_and_non_string_keys(self):
+        """Test payloads with numpy scalars and int keys serialize."""
+        frame = format_sse({"score": np.float64(1.5), "counts": {1: 2}})
+        
+        assert json.loads(frame[6:]) == {"score": 1.5, "counts": {"1": 2}}
+    
+    def test_small_frame_not_truncated(self):
+        """Test payloads under the size limit are sent verbatim."""
+        payload = {"type": "gemini_call", "data": {"prompt": "x" * 1000}}
+        
+        assert json.loads(format_sse(payload)[6:]) == payload
+    
+    def test_oversized_frame_truncated(self):
+        """Test oversized payloads keep their shape with previews of long strings."""
+        prompt = "p" * (MAX_SSE_FRAME_BYTES * 2)
+        payload = {"type": "gemini_call", "data": {"purpose": "explain", "prompt": prompt}}
+        
+        frame = format_sse(payload)
+        decoded = json.loads(frame[6:])
+        
+        assert len(frame) < MAX_SSE_FRAME_BYTES
+        assert decoded["truncated"] is True
+        assert decoded["type"] == "gemini_call"
+        assert decoded["data"]["purpose"] == "explain"
+        assert decoded["data"]["prompt"] == "p" * SSE_PREVIEW_CHARS + "..."
+        # Stored step is not modified
+        assert payload["data"]["prompt"] is prompt
+
+
+class TestHeartbeat:
+    """Test heartbeat and queue draining helpers."""
+    
+    async def test_heartbeat_loop_pushes_marker(self):
+        """Test heartbeat marker is queued after the interval."""
+        queue = asyncio.Queue()
+        task = asyncio.create_task(heartbeat_loop(queue, interval=0.01))
+        try:
+            step = await asyncio.wait_for(queue.get(), timeout=1.0)
+        finally:
+            task.cancel()
+        
+        assert step == {"type": "heartbeat"}
+    
+    def test_drain_queue(self):
+        """Test draining returns the first step followed by queued steps."""
+        queue = asyncio.Queue()
+        queue.put_nowait({"n": 2})
+        queue.put_nowait({"n": 3})
+        
+        assert drain_queue(queue, {"n": 1}) == [{"n": 1}, {"n": 2}, {"n": 3}]
+        assert queue.empty()
+    
+    def test_heartbeat_frame_constant(self):
+        """Test the precomputed heartbeat frame matches a freshly encoded one."""
+        assert HEARTBEAT_FRAME == format_sse({"type": "heartbeat"})
+
+
+class TestSseEncoding:
+    """Test content negotiation for SSE streams."""
+    
+    @pytest.mark.parametrize("accept_encoding, gzipped", [
+        ("gzip, deflate, br", True),
+        ("GZIP;q=0.5", True),
+        ("gzip;q=0", False),
+        ("br, x-gzip-custom", False),
+        ("", False),
+    ])
+    def test_gzip_only_when_accepted(self, accept_encoding, gzipped):
+        """Test q=0 and coding names that merely contain "gzip" get an identity stream."""
+        async def chunks():
+            yield b"data: {}\n\n"
+        
+        body = chunks()
+        stream, headers = sse_stream(body, accept_encoding)
+        
+        assert (headers.get("Content-Encoding") == "gzip") is gzipped
+        assert (stream is body) is not gzipped
+
+
+class TestStepFanout:
+    """Test steps are encoded once and shared across subscribers."""
+    
+    def test_subscribers_share_encoded_frame(self):
+        """Test every subscriber and replay reuses one encoded frame."""
+        tracker = ProgressTracker()
+        tracker.start_operation("op-1", "audit")
+        live = tracker.subscribe("op-1")
+        tracker.add_step("op-1", "info", "Checking journal entries")
+        replay = tracker.subscribe("op-1")
+        
+        live_step = drain_queue(live, live.get_nowait())[-1]
+        replay_step = drain_queue(replay, replay.get_nowait())[-1]
+        
+        assert live_step is replay_step
+        assert encode_step(live_step) is encode_step(replay_step)
+        assert json.loads(encode_step(live_step)[6:])["message"] == "Checking journal entries"
+    
+    def test_plain_dict_encoded(self):
+        """Test ad-hoc markers that are plain dicts still encode."""
+        assert encode_step({"type": "heartbeat"}) == HEARTBEAT_FRAME
+
+
+class TestSubscriberQueue:
+    """Test overflow handling for slow SSE subscribers."""
+    
+    @staticmethod
+    def _data_step(data_type: str, n: int) -> dict:
+        return {"type": "data", "data": {"data_type": data_type, "payload": {"n": n}}}
+    
+    def test_overflow_merges_data_steps_without_dropping(self):
+        """Test same-type data steps past the bound share one slot and drain in order."""
+        history = []
+        queue = SubscriberQueue(history, maxsize=3)
+        for n in range(10):
+            history.append(self._data_step("node", n))
+            queue.put_nowait(history[-1])
+        queue.put_nowait({"type": "end"})
+        
+        assert queue.qsize() == 4  # three slots, the last one batched, plus end
+        steps = drain_queue(queue, queue.get_nowait())
+        assert steps[:-1] == history
+        assert steps[-1] == {"type": "end"}
+    
+    def test_only_same_data_type_merged(self):
+        """Test a change of data_type or a non-data step takes its own slot."""
+        history = []
+        queue = SubscriberQueue(history, maxsize=1)
+        for step in (
+            self._data_step("node", 0), self._data_step("node", 1),
+            self._data_step("edge", 2), {"type": "info", "message": "x"},
+            {"type": "error", "message": "failed"}
+        ):
+            history.append(step)
+            queue.put_nowait(step)
+        
+        assert queue.qsize() == 4
+        assert isinstance(queue.get_nowait(), StepBatch)
+        assert [queue.get_nowait()["type"] for _ in range(3)] == ["data", "info", "error"]
+    
+    def test_batch_is_a_history_range(self):
+        """Test a batch covers its steps without copying them."""
+        history = []
+        queue = SubscriberQueue(history, maxsize=1)
+        for n in range(500):
+            history.append(self._data_step("node", n))
+            queue.put_nowait(history[-1])
+        
+        batch = queue.get_nowait()
+        assert isinstance(batch, StepBatch)
+        assert (batch.start, batch.stop) == (0, 500)
+        assert list(batch) == history
+    
+    def test_slow_subscriber_receives_every_step(self):
+        """Test a subscriber that falls behind still gets the completion signal."""
+        tracker = ProgressTracker()
+        tracker.start_operation("op-slow", "audit")
+        queue = tracker.subscribe("op-slow")
+        for n in range(2000):
+            tracker.add_step("op-slow", "data", f"Streaming node {n}", data={"data_type": "node", "payload": {"n": n}})
+        tracker.complete_operation("op-slow")
+        
+        assert queue.qsize() <= SUBSCRIBER_QUEUE_MAX_ITEMS + 2
+        steps = drain_queue(queue, queue.get_nowait())
+        
+        assert len(steps) == 1 + 2000 + 1 + 1  # started, data, completed, end
+        assert steps[-1]["type"] == "end"
+    
+    async def test_heartbeat_skipped_when_full(self):
+        """Test keep-alives are not queued behind a backlog."""
+        queue = SubscriberQueue([], maxsize=1)
+        queue.put_nowait({"n": 1})
+        task = asyncio.create_task(heartbeat_loop(queue, interval=0.01))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        
+        assert drain_queue(queue, queue.get_nowait()) == [{"n": 1}]
+
+
+
+class TestCheckpoints:
+    """Test checkpoint deltas and deduplication."""
+    
+    def test_merge_keeps_earlier_phase_data(self):
+        """Test a small delta does not drop data saved by an earlier phase."""
+        tracker = ProgressTracker()
+        findings = [{"finding_id": "F-001"}]
+        
+        tracker.merge_checkpoint("op-1", "aje", {"findings": findings}, accounting_standard="gaap")
+        tracker.merge_checkpoint("op-1", "quota_exceeded", {"partial_results": True}, accounting_standard="gaap")
+        
+        checkpoint = tracker.get_checkpoint("op-1")
+        assert checkpoint["phase"] == "quota_exceeded"
+        assert checkpoint["accounting_standard"] == "gaap"
+        assert checkpoint["data"]["findings"] is findings
+        assert checkpoint["data"]["partial_results"] is True
+    
+    def test_unchanged_checkpoint_skipped(self):
+        """Test re-saving identical state keeps the original checkpoint."""
+        tracker = ProgressTracker()
+        findings = [{"finding_id": "F-001"}]
+        
+        tracker.merge_checkpoint("op-1", "structural", {"findings": findings})
+        first = tracker._checkpoints["op-1"]
+        tracker.merge_checkpoint("op-1", "structural", {"findings": findings})
+        
+        assert tracker._checkpoints["op-1"] is first
+        
+        tracker.merge_checkpoint("op-1", "analysis_complete", {"findings": findings})
+        assert tracker._checkpoints["op-1"] is not first
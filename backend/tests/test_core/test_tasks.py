@@ -0,0 +1,87 @@
+"""
+Tests for the background task registry.
+"""
+import pytest
+import sys
+import asyncio
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from core.tasks import spawn_background, pending_background_tasks, cancel_background_tasks
+
+
+class TestBackgroundTasks:
+    """Test tracked fire-and-forget tasks."""
+    
+    async def test_task_tracked_until_done(self):
+        """Test a spawned task is referenced while running and released after."""
+        release = asyncio.Event()
+        
+        async def work():
+            await release.wait()
+            return "done"
+        
+        before = pending_background_tasks()
+        task = spawn_background(work())
+        assert pending_background_tasks() == before + 1
+        
+        release.set()
+        assert await task == "done"
+        await asyncio.sleep(0)
+        assert pending_background_tasks() == before
+    
+    async def test_cancel_outstanding(self):
+        """Test shutdown cancels tasks that are still running."""
+        task = spawn_background(asyncio.sleep(60))
+        
+        await cancel_background_tasks(timeout=1.0)
+        
+        assert task.cancelled()
+        assert pending_background_tasks() == 0
+
+
+class TestRunCpuBound:
+    """Test CPU-bound work is dispatched off the event loop."""
+    
+    async def test_runs_in_process_pool(self, monkeypatch):
+        """Test the function runs in a worker process and the pool can be shut down."""
+        import os
+        from config import settings
+        from core import tasks
+        monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 1)
+        
+        try:
+            pid = await tasks.run_cpu_bound(os.getpid)
+            assert pid != os.getpid()
+        finally:
+            tasks.shutdown_process_pool()
+        assert tasks._process_pool is None
+    
+    async def test_pool_replaced_after_worker_dies(self, monkeypatch):
+        """Test a crashed worker does not break later calls."""
+        import os
+        from concurrent.futures.process import BrokenProcessPool
+        from config import settings
+        from core import tasks
+        monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 1)
+        
+        try:
+            with pytest.raises(BrokenProcessPool):
+                await tasks.run_cpu_bound(os._exit, 1)
+            
+            pid = await tasks.run_cpu_bound(os.getpid)
+            assert pid != os.getpid()
+        finally:
+            tasks.shutdown_process_pool()
+    
+    async def test_zero_workers_uses_thread(self, monkeypatch):
+        """Test PROCESS_POOL_WORKERS = 0 falls back to a worker thread."""
+        import threading
+        from config import settings
+        from core import tasks
+        monkeypatch.setattr(settings, "PROCESS_POOL_WORKERS", 0)
+        
+        thread_id = await tasks.run_cpu_bound(threading.get_ident)
+        
+        assert thread_id != threading.get_ident()
+        assert tasks._process_pool is None
@@ -29,3 +29,50 @@ def test_pandas_excel_creation():
     buffer.seek(0)
     # Check magic bytes for ZIP (xlsx is zip)
     assert buffer.getvalue().startswith(b"PK")
+
+def test_ajes_xlsx_rows():
+    from openpyxl import load_workbook
+    from exports.excel_export import generate_ajes_xlsx, AJE_HEADER
+    ajes = [{
+        "aje_id": "AJE-001",
+        "description": "Accrue rent",
+        "entries": [
+            {"account_code": "6000", "debit": 500, "credit": 0},
+            {"account_code": "2100", "debit": 0, "credit": 500}
+        ],
+        "total_debits": 500,
+        "rationale": "Unrecorded expense"
+    }]
+    ws = load_workbook(generate_ajes_xlsx(ajes))["AJEs"]
+    rows = list(ws.values)
+    assert rows[0] == AJE_HEADER
+    assert rows[1] == ("AJE-001", "Accrue rent", "6000", "2100", 500, "Unrecorded expense")
+
+def test_ajes_xlsx_empty():
+    from openpyxl import load_workbook
+    from exports.excel_export import generate_ajes_xlsx, AJE_HEADER
+    ws = load_workbook(generate_ajes_xlsx([]))["AJEs"]
+    assert list(ws.values) == [AJE_HEADER]
+
+def test_ajes_xlsx_escapes_text():
+    from openpyxl import load_workbook
+    from exports.excel_export import generate_ajes_xlsx
+    ajes = [{"aje_id": "<AJE & 1>", "description": "  Tab\there\x01", "entries": [], "total_debits": 12.5, "rationale": None}]
+    ws = load_workbook(generate_ajes_xlsx(ajes))["AJEs"]
+    assert list(ws.values)[1] == ("<AJE & 1>", "  Tab\there", "", "", 12.5, None)
+
+def test_ajes_xlsx_uses_precomputed_account_strings():
+    from openpyxl import load_workbook
+    from exports.excel_export import generate_ajes_xlsx, aje_account_strings
+    aje = {
+        "aje_id": "AJE-001",
+        "entries": [
+            {"account_code": "6000", "debit": 500, "credit": 0},
+            {"account_code": "6100", "debit": 100, "credit": 0},
+            {"account_code": "2100", "debit": 0, "credit": 600}
+        ]
+    }
+    assert aje_account_strings(aje) == ("6000, 6100", "2100")
+    
+    ws = load_workbook(generate_ajes_xlsx([aje], account_strings=[("stored-dr", "stored-cr")]))["AJEs"]
+    assert list(ws.values)[1][2:4] == ("stored-dr", "stored-cr")
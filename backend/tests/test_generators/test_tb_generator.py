@@ -56,3 +56,16 @@ class TestTBGenerator:
         
         revenue_row = next(r for r in tb.rows if r.account_code == "4000")
         assert revenue_row.ending_balance == -10000
+    
+    def test_orphan_accounts_included(self, generator, sample_gl, sample_coa):
+        """Test GL accounts missing from the COA still get TB rows and count toward totals."""
+        sample_gl.entries.append(JournalEntry(entry_id="3", date="2024-06-20", account_code="9999", account_name="Mystery", debit=500, credit=0, description="Unmapped"))
+        sample_gl.entries.append(JournalEntry(entry_id="3", date="2024-06-20", account_code="1000", account_name="Cash", debit=0, credit=500, description="Unmapped"))
+        
+        tb = generator.derive_from_gl(company_id="test-123", gl=sample_gl, coa=sample_coa, reporting_period="Q2 2024")
+        
+        orphan_row = tb.rows[-1]
+        assert orphan_row.account_code == "9999"
+        assert orphan_row.account_name == "Unknown Account (9999)"
+        assert orphan_row.ending_balance == 500
+        assert tb.total_debits == tb.total_credits == 12500
@@ -0,0 +1,73 @@
+"""
+Tests for the upload data normalizer.
+"""
+import pytest
+import sys
+from pathlib import Path
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import pandas as pd
+
+from config import settings
+from core import gemini_client
+from parsers.normalizer import DataNormalizer
+
+
+@pytest.fixture
+def normalizer(monkeypatch):
+    """Normalizer whose Gemini client returns a fixed column mapping."""
+    monkeypatch.setattr(settings, "GEMINI_API_KEY", "")
+    monkeypatch.setattr(gemini_client, "_shared_client", None)
+    normalizer = DataNormalizer()
+    
+    async def fake_generate_json(prompt, purpose=None, context=None):
+        return {"error": None, "parsed": {"column_mapping": {
+            "entry_id": "Ref", "date": "Posted", "account_code": "Acct",
+            "account_name": "Name", "debit": "Dr", "credit": "Cr"
+        }}}
+    monkeypatch.setattr(normalizer.gemini, "generate_json", fake_generate_json)
+    return normalizer
+
+
+class TestAiParseGl:
+    """Test GL parsing with AI-detected column mappings."""
+    
+    async def test_dates_normalized_once_per_value(self, normalizer, monkeypatch):
+        """Test repeated dates are parsed once and mixed formats still normalize."""
+        df = pd.DataFrame({
+            "Ref": ["1", "2", "3", "4"],
+            "Posted": ["03/15/2024", "03/15/2024", "03/15/2024", "2024-03-31"],
+            "Acct": ["1000", "4000", "1000", "6000"],
+            "Name": ["Cash", "Revenue", "Cash", "Rent"],
+            "Dr": [100.0, 0.0, 50.0, 0.0],
+            "Cr": [0.0, 100.0, 0.0, 50.0],
+        })
+        calls = []
+        original = normalizer._normalize_date
+        monkeypatch.setattr(normalizer, "_normalize_date", lambda value, fmt=None: calls.append(value) or original(value, fmt))
+        
+        gl = await normalizer._ai_parse_gl(df, "gl.csv")
+        
+        assert [e.date for e in gl.entries] == ["2024-03-15", "2024-03-15", "2024-03-15", "2024-03-31"]
+        assert calls == ["03/15/2024", "2024-03-31"]
+        assert (gl.period_start, gl.period_end) == ("2024-03-15", "2024-03-31")
+    
+    async def test_account_strings_shared(self, normalizer):
+        """Test entries for the same account share one code and name string."""
+        df = pd.DataFrame({
+            "Ref": ["1", "2", "3"],
+            "Posted": ["2024-03-15"] * 3,
+            "Acct": [1000, 1000, 4000],
+            "Name": ["Cash", "Cash", "Revenue"],
+            "Dr": [100.0, 50.0, 0.0],
+            "Cr": [0.0, 0.0, 150.0],
+        })
+        
+        gl = await normalizer._ai_parse_gl(df, "gl.csv")
+        
+        first, second, third = gl.entries
+        assert first.account_code == "1000"
+        assert first.account_code is second.account_code
+        assert first.account_name is second.account_name
+        assert third.account_code == "4000"
+
@@ -521,6 +521,9 @@ export default function CompanyPage({ params }: PageProps) {
               } else if (dataType === 'edge') {
                 // Add edge to streaming graph
                 setStreamingEdges(prev => [...prev, payload]);
+              } else if (dataType === 'edge_batch') {
+                // Add several edges in one update (e.g. all vendor edges)
+                setStreamingEdges(prev => [...prev, ...(payload.edges || [])]);
               } else if (dataType === 'circular_edge') {
                 // Mark edges as circular (fraud pattern)
                 setStreamingEdges(prev => {